@@ -0,0 +1,151 @@
+"""Benchmark how reset & step throughput scale with the size of the cell.
+
+Times `Simulator.reset()`, `Simulator.step()`, `D2DEnv.step()` and each observation & reward function,
+for every path loss model at each size (`num_cues` = `num_due_pairs` = size),
+and prints one JSON object per (benchmark, path loss model, size), e.g.:
+
+    python benchmarks/bench_scaling.py --sizes 25 100 500 --output results.jsonl
+
+Each result records calls/sec & mean seconds per call, plus the peak memory (bytes) allocated by a single call,
+measured separately with `tracemalloc` so it doesn't slow down the timed calls.
+`LinearObsFunction` observations grow quadratically with the number of agents,
+so skip the obs & env benchmarks for sizes in the thousands, e.g. `--benchmarks simulator.reset simulator.step`.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator
+
+import numpy as np
+
+from gym_d2d.envs import D2DEnv
+from gym_d2d.envs.obs_fn import LinearObsFunction
+from gym_d2d.envs.reward_fn import CueSinrShannonRewardFunction, ShannonRewardFunction, SystemCapacityRewardFunction
+from gym_d2d.path_loss import CorrelatedShadowingPathLoss, CostHataPathLoss, LogDistancePathLoss, ShadowingPathLoss
+
+
+PATH_LOSS_MODELS = {model.__name__: model for model in [
+    LogDistancePathLoss, ShadowingPathLoss, CorrelatedShadowingPathLoss, CostHataPathLoss]}
+OBS_FNS = {fn.__name__: fn for fn in [LinearObsFunction]}
+REWARD_FNS = {fn.__name__: fn for fn in [
+    SystemCapacityRewardFunction, ShannonRewardFunction, CueSinrShannonRewardFunction]}
+BENCHMARKS = ['simulator.reset', 'simulator.step', 'env.step',
+              *[f'obs_fn.{name}' for name in OBS_FNS], *[f'reward_fn.{name}' for name in REWARD_FNS]]
+
+
+def time_calls(fn: Callable[[], object], min_time_s: float, min_calls: int) -> Dict[str, float]:
+    """Call a function repeatedly until both `min_time_s` seconds & `min_calls` calls have passed.
+
+    :param fn: The function to time.
+    :param min_time_s: The minimum total time to run for.
+    :param min_calls: The minimum number of calls.
+    :returns: A dict of the number of calls, mean seconds per call & calls per second.
+    """
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time_s or calls < min_calls:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return {'calls': calls, 'mean_s': elapsed / calls, 'calls_per_sec': calls / elapsed}
+
+
+def peak_memory(fn: Callable[[], object]) -> int:
+    """Measure the peak memory allocated by a single call.
+
+    :param fn: The function to measure.
+    :returns: The peak traced memory in bytes.
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def benchmark_fns(env: D2DEnv, benchmarks: list) -> Iterator[tuple]:
+    """Build the function to benchmark for each benchmark name, against a reset environment.
+
+    :param env: The environment to benchmark.
+    :param benchmarks: The names of the benchmarks to run.
+    :returns: A generator of (benchmark name, function) tuples.
+    """
+    env.reset()
+    simulator, actions, state, devices = env.simulator, env.actions, env.state, env.simulator.devices
+    raw_actions = {':'.join(tx_rx_id): env._agent_num_pwr_actions[i] * int(action.rb) + int(action.tx_pwr_dBm)
+                   for i, (tx_rx_id, action) in enumerate(actions.items())}
+    fns = {
+        'simulator.reset': simulator.reset,
+        'simulator.step': lambda: simulator.step(actions),
+        'env.step': lambda: env.step(raw_actions),
+    }
+    for name, obs_fn in OBS_FNS.items():
+        fns[f'obs_fn.{name}'] = lambda fn=obs_fn(): fn.get_state(actions, state, devices)
+    for name, reward_fn in REWARD_FNS.items():
+        fns[f'reward_fn.{name}'] = lambda fn=reward_fn(): fn(actions, state)
+    for name in benchmarks:
+        yield name, fns[name]
+
+
+def run(sizes: list, path_loss_models: list, benchmarks: list, sinr_engine: str,
+        min_time_s: float, min_calls: int) -> Iterator[dict]:
+    for size in sizes:
+        for model_name in path_loss_models:
+            env_config = {
+                'num_cues': size,
+                'num_due_pairs': size,
+                'path_loss_model': PATH_LOSS_MODELS[model_name],
+                'sinr_engine': sinr_engine,
+            }
+            env = D2DEnv(env_config)
+            for name, fn in benchmark_fns(env, benchmarks):
+                result = {
+                    'benchmark': name,
+                    'path_loss_model': model_name,
+                    'num_cues': size,
+                    'num_due_pairs': size,
+                    'sinr_engine': sinr_engine,
+                    **time_calls(fn, min_time_s, min_calls),
+                    'peak_memory_bytes': peak_memory(fn),
+                }
+                yield result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[25, 100, 500, 1000],
+                        help='the number of CUEs & DUE pairs')
+    parser.add_argument('--path-loss-models', nargs='+', choices=list(PATH_LOSS_MODELS),
+                        default=list(PATH_LOSS_MODELS))
+    parser.add_argument('--benchmarks', nargs='+', choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument('--sinr-engine', choices=['python', 'numpy'], default='python')
+    parser.add_argument('--min-time', type=float, default=1.0, help='minimum seconds to time each benchmark for')
+    parser.add_argument('--min-calls', type=int, default=3, help='minimum calls to time each benchmark for')
+    parser.add_argument('--output', help='append results to this file as JSON lines, instead of printing them')
+    args = parser.parse_args()
+
+    metadata = {
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+    }
+    fid = open(args.output, 'a') if args.output else sys.stdout
+    try:
+        for result in run(args.sizes, args.path_loss_models, args.benchmarks, args.sinr_engine,
+                          args.min_time, args.min_calls):
+            print(json.dumps({**result, **metadata}), file=fid, flush=True)
+    finally:
+        if fid is not sys.stdout:
+            fid.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Benchmark how `SubprocVectorD2DEnv` throughput scales with the number of worker processes.
+
+Prints environment steps/sec for each worker count, e.g.:
+
+    python benchmarks/bench_subproc_vector_env.py --num-envs 32 --workers 1 2 4 8
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from gym_d2d.envs import SubprocVectorD2DEnv
+
+
+def bench(num_envs: int, num_workers: int, num_steps: int, env_config: dict) -> float:
+    vec_env = SubprocVectorD2DEnv(num_envs, dict(env_config), num_workers=num_workers)
+    try:
+        vec_env.reset()
+        actions = np.zeros((num_envs, vec_env.num_agents), dtype=int)
+        start = time.perf_counter()
+        for _ in range(num_steps):
+            vec_env.step(actions)
+        elapsed = time.perf_counter() - start
+    finally:
+        vec_env.close()
+    return num_envs * num_steps / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--num-envs', type=int, default=16)
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, 4, mp.cpu_count()}))
+    parser.add_argument('--steps', type=int, default=50)
+    parser.add_argument('--num-cues', type=int, default=25)
+    parser.add_argument('--num-due-pairs', type=int, default=25)
+    parser.add_argument('--json', action='store_true', help='print results as JSON lines')
+    args = parser.parse_args()
+
+    env_config = {'num_cues': args.num_cues, 'num_due_pairs': args.num_due_pairs}
+    baseline = None
+    for num_workers in args.workers:
+        steps_per_sec = bench(args.num_envs, num_workers, args.steps, env_config)
+        baseline = baseline or steps_per_sec
+        if args.json:
+            print(json.dumps({'num_envs': args.num_envs, 'num_workers': num_workers, 'steps_per_sec': steps_per_sec}))
+        else:
+            print(f'{num_workers:>3} workers: {steps_per_sec:>10.1f} steps/sec ({steps_per_sec / baseline:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,8 @@ from gym_d2d.path_loss import PathLoss
 class FooPathLoss(PathLoss):
     """Define your own custom path loss implementation.
     If you have a path loss model that isn't included, why not submit a pull request so others can use it too.
+    For large cells, also implement `batch_path_loss_dB()` to calculate many pairs at once with numpy,
+    otherwise `__call__()` is called for each pair.
     """
 
     def __call__(self, tx: Device, rx: Device) -> float:
@@ -1,8 +1,11 @@
 from collections import UserDict, defaultdict
 from dataclasses import dataclass
-from typing import Dict, Set
+from typing import Callable, Dict, List, Mapping, Set, Tuple
+
+import numpy as np
 
 from gym_d2d.device import Device
+from gym_d2d.id import Id
 from gym_d2d.link_type import LinkType
 
 
@@ -15,17 +18,126 @@ class Action:
     tx_pwr_dBm: float
 
 
+@dataclass
+class LinkArrays:
+    """Actions as parallel arrays, with devices referred to by their index in a `DeviceArrays` registry."""
+    tx_idxs: np.ndarray
+    rx_idxs: np.ndarray
+    rbs: np.ndarray
+    tx_pwrs_dBm: np.ndarray
+    link_types: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.rbs)
+
+
+class RxPowerIndex:
+    """The total power received by each receiver on each RB, from every transmitter using that RB.
+
+    A link's interference is the total at its receiver on its RB, minus its own transmitter's contribution,
+    so after building the index (one pass over each RB's co-channel pairs) each link's interference is O(1).
+    """
+
+    def __init__(self, actions: 'Actions', rx_pwr_mW: Callable[[Action, Device], float]) -> None:
+        super().__init__()
+        self.totals_mW: Dict[Tuple[int, Id], float] = {}
+        self._own_mW: Dict[Tuple[Id, Id], float] = {}
+        for rb, rb_keys in actions.get_keys_by_rb().items():
+            rb_actions = [actions[key] for key in rb_keys]
+            for rx in {action.rx.id: action.rx for action in rb_actions}.values():
+                total_mW = 0.0
+                for key, action in zip(rb_keys, rb_actions):
+                    pwr_mW = rx_pwr_mW(action, rx)
+                    total_mW += pwr_mW
+                    if action.rx is rx:
+                        self._own_mW[key] = pwr_mW
+                self.totals_mW[(rb, rx.id)] = total_mW
+
+    def interference_mW(self, key: Tuple[Id, Id], action: Action) -> float:
+        """Calculate the power received by a link's receiver from every other transmitter on its RB.
+
+        :param key: The link's tx-rx ID pair.
+        :param action: The link's action.
+        :returns: The interference power in mW.
+        """
+        return max(self.totals_mW[(action.rb, action.rx.id)] - self._own_mW[key], 0.0)
+
+
 class Actions(UserDict):
     def __init__(self, *args, **kwargs) -> None:
-        super().__init__(*args, **kwargs)
         self._rbs: Dict[int, Set[Action]] = defaultdict(set)
+        self._rb_keys: Dict[int, List[Tuple[Id, Id]]] = defaultdict(list)
+        self._rbs_stale = True
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, key, action: Action) -> None:
+        super().__setitem__(key, action)
+        self._rbs_stale = True
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        self._rbs_stale = True
 
     def clear(self) -> None:
         super().clear()
         self._rbs.clear()
+        self._rb_keys.clear()
+        self._rbs_stale = True
 
     def get_actions_by_rb(self, rb: int) -> Set[Action]:
-        if not self._rbs:
-            for action in self.data.values():
-                self._rbs[action.rb].add(action)
+        self._index_rbs()
         return self._rbs[rb]
+
+    def get_keys_by_rb(self) -> Dict[int, List[Tuple[Id, Id]]]:
+        """Group the tx-rx ID pairs of the actions by RB.
+
+        :returns: A dict mapping each RB in use to a list of the tx-rx ID pairs using it.
+        """
+        self._index_rbs()
+        return self._rb_keys
+
+    def rb_totals(self, values: Mapping[Tuple[Id, Id], float]) -> Dict[int, float]:
+        """Sum a per-link value over the links on each RB.
+
+        Callers can subtract their own value to get the total of every other co-channel link.
+
+        :param values: A dict mapping the actions' tx-rx ID pairs to values.
+        :returns: A dict mapping RBs to totals, 0 for unused RBs.
+        """
+        totals = defaultdict(float)
+        for key, action in self.data.items():
+            totals[action.rb] += values[key]
+        return totals
+
+    def rx_power_by_rb(self, rx_pwr_mW: Callable[[Action, Device], float]) -> RxPowerIndex:
+        """Aggregate the power received by each receiver on each RB.
+
+        :param rx_pwr_mW: A callable giving the power (mW) an action's transmitter delivers to a receiver.
+        :returns: An index of the total received power per (RB, receiver).
+        """
+        return RxPowerIndex(self, rx_pwr_mW)
+
+    def _index_rbs(self) -> None:
+        if self._rbs_stale:
+            self._rbs.clear()
+            self._rb_keys.clear()
+            for key, action in self.data.items():
+                self._rbs[action.rb].add(action)
+                self._rb_keys[action.rb].append(key)
+            self._rbs_stale = False
+
+    def link_arrays(self, index: Dict[Id, int]) -> LinkArrays:
+        """Convert the actions to parallel arrays, in the same order as the actions.
+
+        :param index: Mapping of device IDs to registry indices, e.g. `devices.arrays.index`.
+        :returns: The actions' links as arrays.
+        """
+        actions = self.data.values()
+        num_links = len(actions)
+        return LinkArrays(
+            np.fromiter((index[action.tx.id] for action in actions), dtype=np.intp, count=num_links),
+            np.fromiter((index[action.rx.id] for action in actions), dtype=np.intp, count=num_links),
+            np.fromiter((action.rb for action in actions), dtype=int, count=num_links),
+            np.fromiter((action.tx_pwr_dBm for action in actions), dtype=float, count=num_links),
+            np.fromiter((action.link_type.value for action in actions), dtype=np.int8, count=num_links),
+        )
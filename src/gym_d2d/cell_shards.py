@@ -0,0 +1,210 @@
+import multiprocessing as mp
+import traceback
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import numpy as np
+
+from .actions import Actions
+from .rng import Seed, seed_sequence
+from .sinr_engine import STATE_KEYS, _metrics
+
+if TYPE_CHECKING:
+    from .simulator import Simulator
+
+
+def shard_interference(simulator: 'Simulator',
+                       tx_idxs: np.ndarray,
+                       rx_idxs: np.ndarray,
+                       rbs: np.ndarray,
+                       tx_pwrs_dBm: np.ndarray,
+                       num_rbs: int,
+                       own_cells: np.ndarray,
+                       ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Calculate a shard's received signal levels, its exact intra-shard interference,
+    and the interference it causes at every other cell's base station on each RB.
+
+    :param simulator: A simulator with the same devices, positions & path loss model as the full simulation.
+    :param tx_idxs: The registry indices of the shard's (S,) link TXs.
+    :param rx_idxs: The registry indices of the shard's (S,) link RXs.
+    :param rbs: The (S,) RB used by each link.
+    :param tx_pwrs_dBm: The (S,) TX power of each link.
+    :param num_rbs: The number of RBs.
+    :param own_cells: The cells of the shard, whose base stations' interference isn't returned.
+    :returns: A tuple of the (S,) received signal levels (dBm),
+        the (S,) interference (mW) from the shard's other links,
+        and a (cells, RBs) array of the total interference (mW) from the shard's TXs at each other cell's base station.
+    """
+    arrays, cache = simulator.devices.arrays, simulator.path_loss_cache
+    eirp_dBm = tx_pwrs_dBm + arrays.tx_offset_dB[tx_idxs]
+    co_channel = rbs[:, None] == rbs[None, :]
+    path_loss_dB = cache.matrix(tx_idxs, rx_idxs, mask=co_channel)
+    rx_pwr_dBm = eirp_dBm - np.diagonal(path_loss_dB) + arrays.rx_offset_dB[rx_idxs]
+    np.fill_diagonal(co_channel, False)
+    with np.errstate(invalid='ignore'):
+        ix_pwr_mW = np.where(co_channel, np.power(10.0, (eirp_dBm[:, None] - path_loss_dB) / 10), 0.0)
+    intra_ix_mW = ix_pwr_mW.sum(axis=0)
+
+    bs_idxs = arrays.indices(list(simulator.devices.base_stations))
+    bs_ix_mW = np.power(10.0, (eirp_dBm[:, None] - cache.matrix(tx_idxs, bs_idxs)) / 10)  # (S, cells)
+    num_cells = len(bs_idxs)
+    flat_bins = (np.arange(num_cells)[None, :] * num_rbs + rbs[:, None]).ravel()
+    outgoing_ix_mW = np.bincount(flat_bins, weights=bs_ix_mW.ravel(), minlength=num_cells * num_rbs)
+    outgoing_ix_mW = outgoing_ix_mW.reshape(num_cells, num_rbs)
+    outgoing_ix_mW[own_cells] = 0.0
+    return rx_pwr_dBm, intra_ix_mW, outgoing_ix_mW
+
+
+def _worker(conn, env_config: dict, path_loss_seed: Seed, worker: int, num_workers: int, cells: List[int]) -> None:
+    from .simulator import Simulator
+
+    try:
+        simulator = Simulator({**env_config, 'num_shard_workers': 0})
+        own_cells = np.array(cells, dtype=np.intp)
+
+        def seed(seed_: Seed) -> None:
+            if simulator.path_loss.cacheable:
+                # the same stream as the coordinator, so models with per-topology state (e.g. shadowing maps) agree
+                simulator.path_loss.seed(seed_)
+            else:
+                simulator.path_loss.seed(seed_sequence(seed_).spawn(num_workers)[worker])
+
+        seed(path_loss_seed)
+        while True:
+            cmd, data = conn.recv()
+            try:
+                if cmd == 'step':
+                    conn.send(('ok', shard_interference(simulator, *data, own_cells)))
+                    continue
+                elif cmd == 'reset':
+                    positions, scenario = data
+                    if scenario is not None:
+                        simulator.reset(scenario)
+                    else:
+                        simulator.path_loss.reset(simulator.config.layout_radius_m)
+                        simulator.devices.arrays.set_positions(positions)
+                elif cmd == 'move':
+                    simulator.devices.arrays.set_positions(*data)
+                elif cmd == 'seed':
+                    seed(data)
+                elif cmd == 'close':
+                    conn.send(('ok', None))
+                    break
+                else:
+                    raise ValueError(f'Unknown command "{cmd}"')
+                conn.send(('ok', None))
+            except Exception:
+                conn.send(('error', traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+class CellShards:
+    """Steps a multi-cell simulation's cells in parallel worker processes.
+
+    The cells are split between the workers, each holding a copy of the simulation with the same devices & topology.
+    Links are sharded by the cell of their receiver.
+    Each worker calculates the interference between its own links exactly,
+    and only exchanges with the others the total interference its transmitters cause at each other cell's
+    base station on each RB.
+    Each link then receives the inter-shard interference aggregated at its cell's base station on its RB,
+    which is exact for uplinks and approximates it for D2D receivers by their base station's position.
+    With a single worker, every link's interference is exact.
+
+    Workers are created from the simulator's env config, so devices' configs mustn't be changed after creation.
+
+    :param simulator: The coordinating simulator, which places the devices.
+    :param env_config: The simulator's env config.
+    :param path_loss_seed: The seed of the simulator's path loss model.
+    :param num_workers: The number of worker processes, at most the number of cells.
+    :param start_method: The multiprocessing start method, the platform's default if omitted.
+    """
+
+    def __init__(self, simulator: 'Simulator', env_config: dict, path_loss_seed: Seed, num_workers: int,
+                 start_method: Optional[str] = None) -> None:
+        super().__init__()
+        self.simulator = simulator
+        num_cells = simulator.config.num_cells
+        self.num_workers = min(int(num_workers), num_cells)
+        worker_cells = np.array_split(np.arange(num_cells), self.num_workers)
+        self.worker_of_cell = np.empty(num_cells, dtype=np.intp)
+        for worker, cells in enumerate(worker_cells):
+            self.worker_of_cell[cells] = worker
+
+        ctx = mp.get_context(start_method)
+        self._conns = []
+        self._processes = []
+        for worker, cells in enumerate(worker_cells):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(target=_worker, daemon=True, args=(
+                child_conn, env_config, path_loss_seed, worker, self.num_workers, cells.tolist()))
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+        self.closed = False
+
+    def seed(self, path_loss_seed: Seed) -> None:
+        self._send_all('seed', [path_loss_seed] * self.num_workers)
+
+    def reset(self, positions: np.ndarray, scenario: Optional[int] = None) -> None:
+        """Copy a new topology to the workers.
+
+        :param positions: The (N, 2) positions of every device.
+        :param scenario: With a topology bank, the scenario loaded, which workers load themselves.
+        """
+        self._send_all('reset', [(positions, scenario)] * self.num_workers)
+
+    def move(self, positions: np.ndarray, idxs: np.ndarray) -> None:
+        """Copy the new positions of devices that moved during an episode to the workers.
+
+        :param positions: The (M, 2) new positions.
+        :param idxs: The registry indices of the (M,) devices that moved.
+        """
+        self._send_all('move', [(positions, idxs)] * self.num_workers)
+
+    def step(self, actions: Actions) -> dict:
+        arrays, devices = self.simulator.devices.arrays, self.simulator.devices
+        links = actions.link_arrays(arrays.index)
+        tx_idxs, rx_idxs, rbs = links.tx_idxs, links.rx_idxs, links.rbs
+        num_rbs = max(self.simulator.config.num_rbs, int(rbs.max(initial=-1)) + 1)
+        rx_cells = devices.cells[rx_idxs]
+        link_workers = self.worker_of_cell[rx_cells]
+        shards = [np.flatnonzero(link_workers == worker) for worker in range(self.num_workers)]
+        results = self._send_all('step', [
+            (tx_idxs[shard], rx_idxs[shard], rbs[shard], links.tx_pwrs_dBm[shard], num_rbs) for shard in shards])
+
+        rx_pwr_dBm = np.empty(len(links))
+        sum_ix_pwr_mW = np.empty(len(links))
+        incoming_ix_mW = np.zeros((len(devices.base_stations), num_rbs))
+        for shard, (shard_rx_pwr_dBm, intra_ix_mW, outgoing_ix_mW) in zip(shards, results):
+            rx_pwr_dBm[shard] = shard_rx_pwr_dBm
+            sum_ix_pwr_mW[shard] = intra_ix_mW
+            incoming_ix_mW += outgoing_ix_mW
+        sum_ix_pwr_mW += incoming_ix_mW[rx_cells, rbs]
+        metrics = _metrics(rx_pwr_dBm, sum_ix_pwr_mW, arrays.thermal_noise_dBm[rx_idxs], arrays.noise_mW[rx_idxs],
+                           arrays.rx_sensitivity_dBm[rx_idxs], arrays.rb_bandwidth_Hz[tx_idxs])
+        ids = list(actions.keys())
+        return {key: dict(zip(ids, metrics[key].tolist())) for key in STATE_KEYS}
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self._send_all('close', [None] * self.num_workers)
+        for process in self._processes:
+            process.join()
+        self.closed = True
+
+    def _send_all(self, cmd: str, data: list) -> list:
+        for conn, worker_data in zip(self._conns, data):
+            conn.send((cmd, worker_data))
+        results = []
+        for conn in self._conns:
+            status, result = conn.recv()
+            if status == 'error':
+                raise RuntimeError(f'Cell shard worker failed on "{cmd}":\n{result}')
+            results.append(result)
+        return results
+
+    def __del__(self):
+        if not getattr(self, 'closed', True):
+            self.close()
@@ -1,3 +1,6 @@
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
 from .conversion import dB_to_linear, dBm_to_W
 from .id import Id
 from .position import Position
@@ -41,13 +44,72 @@ DEFAULT_UE_CONFIG = merge_dicts(dict(DEFAULT_DEVICE_CONFIG), {
 })
 
 
+@dataclass(frozen=True)
+class LinkBudget:
+    """A device's link budget compiled into constant offsets, so links can be evaluated without config lookups.
+
+    EIRP (dBm) = TX power (dBm) + `tx_offset_dB`
+    RX signal level (dBm) = EIRP (dBm) - path loss (dB) + `rx_offset_dB`
+    """
+    tx_offset_dB: float
+    rx_offset_dB: float
+    noise_mW: float  # thermal noise in linear scale
+    rx_sensitivity_dBm: float
+
+
 class Device:
     def __init__(self, id_, config: dict) -> None:
         super().__init__()
         self.id = Id(id_)
+        self._position_listeners: List[Callable[['Device'], None]] = []
+        self._config_listeners: List[Callable[['Device'], None]] = []
+        self._link_budget: Optional[LinkBudget] = None
         self.config: dict = config
         self.position: Position = Position(0, 0)
 
+    @property
+    def config(self) -> dict:
+        return self._config
+
+    @config.setter
+    def config(self, config: dict) -> None:
+        self._config = config
+        self._link_budget = None
+        for listener in self._config_listeners:
+            listener(self)
+
+    def update_config(self, config: dict) -> None:
+        """Overwrite config values, recompiling the link budget.
+
+        Always change configs with this (or by assigning a new `config`),
+        changes made directly to the `config` dict aren't seen by the link budget or the simulator's caches.
+
+        :param config: The config values to overwrite.
+        """
+        self.config = merge_dicts(dict(self._config), config)
+
+    @property
+    def link_budget(self) -> LinkBudget:
+        """The device's compiled link budget, compiled on first use and again after each config change."""
+        if self._link_budget is None:
+            self._link_budget = self.compile_link_budget()
+        return self._link_budget
+
+    def compile_link_budget(self) -> LinkBudget:
+        """Compile the device's link budget.
+
+        Subclasses that override `eirp_dBm()` or `rx_signal_level_dBm()` with terms that are constant offsets
+        are included automatically, others can override this to contribute to the budget.
+
+        :returns: The device's link budget.
+        """
+        return LinkBudget(
+            tx_offset_dB=self.eirp_dBm(0.0),
+            rx_offset_dB=self.rx_signal_level_dBm(0.0, 0.0),
+            noise_mW=dB_to_linear(self.thermal_noise_dBm),
+            rx_sensitivity_dBm=self.rx_sensitivity_dBm,
+        )
+
     def eirp_dBm(self, tx_pwr_dBm: float) -> float:
         """Calculate the Effective Isotropically Radiated Power (EIRP).
 
@@ -81,6 +143,22 @@ class Device:
 
     def set_position(self, pos: Position) -> None:
         self.position = pos
+        for listener in self._position_listeners:
+            listener(self)
+
+    def add_position_listener(self, listener: Callable[['Device'], None]) -> None:
+        """Register a callback to be notified each time the device is moved with `set_position()`.
+
+        :param listener: A callable taking the moved device.
+        """
+        self._position_listeners.append(listener)
+
+    def add_config_listener(self, listener: Callable[['Device'], None]) -> None:
+        """Register a callback to be notified each time the device's config is changed.
+
+        :param listener: A callable taking the changed device.
+        """
+        self._config_listeners.append(listener)
 
     @property
     def num_subcarriers(self) -> int:
@@ -0,0 +1,181 @@
+"""Columnar device configurations, stored as NumPy `.npz` files.
+
+Convert between the JSON & columnar formats with:
+
+    python -m gym_d2d.device_config device_config.json device_config.npz
+"""
+
+import argparse
+from collections.abc import Mapping
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Union
+
+import numpy as np
+
+from .id import Id
+
+
+class DeviceConfigTable(Mapping):
+    """A device configuration stored as columns, with one array per field instead of one dict per device.
+
+    Reads like the JSON device configuration, mapping each device ID to a dict with an optional `position`
+    and an optional `config` dict, but positions can be looked up for many devices at once with `get_positions()`,
+    and it saves to & loads from a compressed `.npz` file without parsing a dict per device.
+    Config values must be numeric, missing positions & config values are stored as NaN.
+
+    :param ids: The (N,) device IDs.
+    :param positions: An (N, 2) array of positions, NaN for devices without a fixed position.
+    :param config_keys: The (K,) config fields.
+    :param config_values: An (N, K) array of config values, NaN where a device doesn't set a field.
+    :param int_keys: The config fields with integer values.
+    """
+
+    def __init__(self,
+                 ids: Sequence[str],
+                 positions: np.ndarray,
+                 config_keys: Sequence[str],
+                 config_values: np.ndarray,
+                 int_keys: Iterable[str] = ()
+                 ) -> None:
+        super().__init__()
+        self.ids: List[Id] = [Id(device_id) for device_id in ids]
+        self.index: Dict[Id, int] = {device_id: i for i, device_id in enumerate(self.ids)}
+        self.positions = np.asarray(positions, dtype=float).reshape(len(self.ids), 2)
+        self.config_keys: List[str] = [str(key) for key in config_keys]
+        self.config_values = np.asarray(config_values, dtype=float).reshape(len(self.ids), len(self.config_keys))
+        self.int_keys = set(int_keys)
+
+    def __getitem__(self, device_id: str) -> dict:
+        i = self.index[device_id]
+        device = {}
+        if not np.isnan(self.positions[i]).any():
+            device['position'] = tuple(self.positions[i].tolist())
+        config = {key: int(value) if key in self.int_keys else value
+                  for key, value in zip(self.config_keys, self.config_values[i].tolist()) if value == value}
+        if config:
+            device['config'] = config
+        return device
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def get_positions(self, ids: Sequence[str]) -> np.ndarray:
+        """Look up the fixed positions of many devices at once.
+
+        :param ids: The device IDs.
+        :returns: An (len(ids), 2) array of positions, NaN for devices without a fixed position or not in the table.
+        """
+        idxs = np.fromiter((self.index.get(device_id, -1) for device_id in ids), dtype=np.intp, count=len(ids))
+        positions = np.full((len(ids), 2), np.nan)
+        found = idxs >= 0
+        positions[found] = self.positions[idxs[found]]
+        return positions
+
+    @classmethod
+    def from_dict(cls, devices: dict) -> 'DeviceConfigTable':
+        """Convert a device configuration in the JSON format.
+
+        :param devices: A dict mapping device IDs to dicts with an optional `position` & `config`.
+        :returns: The columnar device configuration.
+        """
+        ids = list(devices.keys())
+        config_keys = list(dict.fromkeys(key for device in devices.values() for key in device.get('config', {})))
+        key_index = {key: k for k, key in enumerate(config_keys)}
+        positions = np.full((len(ids), 2), np.nan)
+        config_values = np.full((len(ids), len(config_keys)), np.nan)
+        int_keys = set(config_keys)
+        for i, device in enumerate(devices.values()):
+            if 'position' in device:
+                positions[i] = device['position']
+            for key, value in device.get('config', {}).items():
+                if not isinstance(value, (int, float)):
+                    raise ValueError(f'Invalid value {value!r} for config "{key}", columnar configs must be numeric.')
+                config_values[i, key_index[key]] = value
+                if not isinstance(value, int):
+                    int_keys.discard(key)
+        return cls(ids, positions, config_keys, config_values, int_keys)
+
+    def to_dict(self) -> dict:
+        """Convert to the JSON device configuration format.
+
+        :returns: A dict mapping device IDs to dicts with an optional `position` & `config`.
+        """
+        return {device_id: self[device_id] for device_id in self.ids}
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'DeviceConfigTable':
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['ids'].tolist(), data['positions'], data['config_keys'].tolist(), data['config_values'],
+                       data['int_keys'].tolist())
+
+    def save(self, path: Union[str, Path]) -> None:
+        with Path(path).open(mode='wb') as fid:
+            np.savez_compressed(
+                fid,
+                ids=np.array(self.ids, dtype=str),
+                positions=self.positions,
+                config_keys=np.array(self.config_keys, dtype=str),
+                config_values=self.config_values,
+                int_keys=np.array(sorted(self.int_keys), dtype=str),
+            )
+
+
+def load_device_config(path: Path) -> Mapping:
+    """Load a device configuration, columnar from `.npz` files, otherwise from JSON.
+
+    :param path: The filepath to load from.
+    :returns: A mapping of device IDs to dicts with an optional `position` & `config`.
+    """
+    if path.suffix == '.npz':
+        return DeviceConfigTable.load(path)
+    with path.open(mode='r') as fid:
+        return json.load(fid)
+
+
+def save_device_config(devices: Mapping, path: Path) -> None:
+    """Save a device configuration, columnar to `.npz` files, otherwise to JSON.
+
+    :param devices: A mapping of device IDs to dicts with an optional `position` & `config`.
+    :param path: The filepath to save to.
+    """
+    if path.suffix == '.npz':
+        table = devices if isinstance(devices, DeviceConfigTable) else DeviceConfigTable.from_dict(dict(devices))
+        table.save(path)
+    else:
+        if isinstance(devices, DeviceConfigTable):
+            devices = devices.to_dict()
+        with path.open(mode='w') as fid:
+            json.dump(dict(devices), fid)
+
+
+def get_positions(devices: Mapping, ids: Sequence[str]) -> np.ndarray:
+    """Look up the fixed positions of many devices in a device configuration.
+
+    :param devices: A mapping of device IDs to dicts with an optional `position` & `config`.
+    :param ids: The device IDs.
+    :returns: An (len(ids), 2) array of positions, NaN for devices without a fixed position.
+    """
+    if isinstance(devices, DeviceConfigTable):
+        return devices.get_positions(ids)
+    positions = np.full((len(ids), 2), np.nan)
+    for i, device_id in enumerate(ids):
+        position = devices.get(device_id, {}).get('position')
+        if position is not None:
+            positions[i] = position
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert device configurations between the JSON & `.npz` formats.')
+    parser.add_argument('src', type=Path, help='the device configuration file to convert')
+    parser.add_argument('dst', type=Path, help='the filepath to save to, the format is chosen by its suffix')
+    args = parser.parse_args()
+    save_device_config(load_device_config(args.src), args.dst)
+
+
+if __name__ == '__main__':
+    main()
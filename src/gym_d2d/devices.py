@@ -1,28 +1,158 @@
 from collections.abc import Mapping
-from typing import Dict, Tuple
+from enum import Enum
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from gym_d2d.device import Device, BaseStation, UserEquipment
 from gym_d2d.id import Id
+from gym_d2d.position import Position
+
+
+class DeviceType(Enum):
+    BASE_STATION = 0
+    CUE = 1
+    DUE = 2
+
+
+# the config columns of `DeviceArrays`, each mapped to the function reading its value from a device
+CONFIG_COLUMNS: Dict[str, Callable[[Device], float]] = {
+    'antenna_height_m': lambda d: d.antenna_height_m,
+    'max_tx_power_dBm': lambda d: d.max_tx_power_dBm,
+    'tx_antenna_gain_dBi': lambda d: d.tx_antenna_gain_dBi,
+    'rx_antenna_gain_dBi': lambda d: d.rx_antenna_gain_dBi,
+    'ix_margin_dB': lambda d: d.ix_margin_dB,
+    'body_loss_dB': lambda d: d.config.get('body_loss_dB', 0.0),
+    'cable_loss_dB': lambda d: d.config.get('cable_loss_dB', 0.0),
+    'masthead_amplifier_gain_dB': lambda d: d.config.get('masthead_amplifier_gain_dB', 0.0),
+    'thermal_noise_dBm': lambda d: d.thermal_noise_dBm,
+    'noise_figure_dB': lambda d: d.noise_figure_dB,
+    'rb_bandwidth_Hz': lambda d: d.rb_bandwidth_kHz * 1000,
+    # compiled link budgets, see `LinkBudget`
+    'tx_offset_dB': lambda d: d.link_budget.tx_offset_dB,
+    'rx_offset_dB': lambda d: d.link_budget.rx_offset_dB,
+    'noise_mW': lambda d: d.link_budget.noise_mW,
+    'rx_sensitivity_dBm': lambda d: d.link_budget.rx_sensitivity_dBm,
+}
+
+
+class DeviceArrays:
+    """A structure-of-arrays registry of device positions & configs.
+
+    Each attribute is a contiguous array with one entry per device, in the same order as `ids`,
+    so hot paths can gather values for many devices at once by index instead of looking devices up by ID.
+    Columns are kept in sync as devices move with `set_position()` or change config with `update_config()`.
+    Many devices can be moved at once with `set_positions()`.
+    """
+
+    def __init__(self, devices: Sequence[Device], device_types: Sequence[DeviceType]) -> None:
+        super().__init__()
+        self.devices: List[Device] = list(devices)
+        self.ids: List[Id] = [device.id for device in self.devices]
+        self.index: Dict[Id, int] = {device_id: i for i, device_id in enumerate(self.ids)}
+        self.device_type = np.array([device_type.value for device_type in device_types], dtype=np.int8)
+        self.positions = np.array([device.position.as_tuple() for device in self.devices], dtype=float).reshape(-1, 2)
+        self._move_listeners: List[Callable[[np.ndarray], None]] = []
+        for device in self.devices:
+            device.add_position_listener(self._on_move)
+            device.add_config_listener(self._on_config_change)
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Rebuild the config columns from each device's config."""
+        for name, fn in CONFIG_COLUMNS.items():
+            setattr(self, name, np.array([fn(device) for device in self.devices], dtype=float))
+
+    def indices(self, ids: Sequence[Id]) -> np.ndarray:
+        """Look up the registry indices of many devices.
+
+        :param ids: The device IDs.
+        :returns: An int array of indices.
+        """
+        index = self.index
+        return np.fromiter((index[device_id] for device_id in ids), dtype=np.intp, count=len(ids))
+
+    def set_positions(self, positions: np.ndarray, idxs: Optional[np.ndarray] = None) -> None:
+        """Move many devices at once.
+
+        Devices' per-device position listeners aren't notified, instead listeners registered with
+        `add_move_listener()` are notified once with the indices of every moved device.
+
+        :param positions: An (M, 2) array of the new x, y coordinates.
+        :param idxs: The registry indices of the (M,) devices to move, all devices if omitted.
+        """
+        idxs = np.arange(len(self)) if idxs is None else np.asarray(idxs, dtype=np.intp)
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        self.positions[idxs] = positions
+        devices = self.devices
+        for idx, (x, y) in zip(idxs.tolist(), positions.tolist()):
+            devices[idx].position = Position(x, y)
+        for listener in self._move_listeners:
+            listener(idxs)
+
+    def add_move_listener(self, listener: Callable[[np.ndarray], None]) -> None:
+        """Register a callback to be notified each time devices are moved with `set_positions()`.
+
+        :param listener: A callable taking an array of the registry indices of the moved devices.
+        """
+        self._move_listeners.append(listener)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _on_move(self, device: Device) -> None:
+        self.positions[self.index[device.id]] = device.position.as_tuple()
+
+    def _on_config_change(self, device: Device) -> None:
+        # only the changed device's row, so changing every device's config stays linear in the number of devices
+        idx = self.index[device.id]
+        for name, fn in CONFIG_COLUMNS.items():
+            getattr(self, name)[idx] = fn(device)
 
 
 class Devices(Mapping):
+    """The devices in a simulation: one or more base stations (cells), cellular UEs & D2D UE pairs.
+
+    Each UE is associated with the cell of one base station, published in `serving_bs`.
+    By default there's a single cell & every UE is associated with `bs`.
+
+    :param bs: The base station of the first (central) cell.
+    :param cues: The cellular UEs.
+    :param due_pairs: The D2D UE pairs.
+    :param base_stations: Every cell's base station, including `bs`, in cell order. Defaults to `bs` alone.
+    :param serving_bs: Maps UE IDs to the ID of the base station serving them. UEs not in it are served by `bs`.
+    """
+
     def __init__(self,
                  bs: BaseStation,
                  cues: Dict[Id, UserEquipment],
-                 due_pairs: Dict[Tuple[Id, Id], Tuple[UserEquipment, UserEquipment]]
+                 due_pairs: Dict[Tuple[Id, Id], Tuple[UserEquipment, UserEquipment]],
+                 base_stations: Optional[Dict[Id, BaseStation]] = None,
+                 serving_bs: Optional[Dict[Id, Id]] = None
                  ) -> None:
         super().__init__()
         self.bs: BaseStation = bs
+        self.base_stations: Dict[Id, BaseStation] = base_stations or {bs.id: bs}
         self.cues: Dict[Id, UserEquipment] = cues
         self.dues: Dict[Tuple[Id, Id], Tuple[UserEquipment, UserEquipment]] = due_pairs
         self.due_pairs = {}
         self.due_pairs_inv = {}
-        self._devices: Dict[Id, Device] = {bs.id: bs, **cues}
+        self._devices: Dict[Id, Device] = {**self.base_stations, **cues}
         for (tx_id, rx_id), (tx, rx) in due_pairs.items():
             self._devices[tx_id] = tx
             self._devices[rx_id] = rx
             self.due_pairs[tx_id] = rx_id
             self.due_pairs_inv[rx_id] = tx_id
+        serving_bs = serving_bs or {}
+        self.serving_bs: Dict[Id, Id] = {device_id: serving_bs.get(device_id, bs.id) for device_id in self._devices
+                                         if device_id not in self.base_stations}
+        device_types = [DeviceType.BASE_STATION] * len(self.base_stations) + [DeviceType.CUE] * len(cues) \
+            + [DeviceType.DUE] * len(due_pairs) * 2
+        self.arrays = DeviceArrays(list(self._devices.values()), device_types)
+        # the cell (index into `base_stations`) of each device in the registry, a base station's cell is its own
+        cell_index = {bs_id: cell for cell, bs_id in enumerate(self.base_stations)}
+        self.cells = np.array([cell_index[self.serving_bs.get(device_id, device_id)] for device_id in self.arrays.ids],
+                              dtype=np.intp)
 
     def __getitem__(self, key: Id) -> Device:
         return self._devices[key]
@@ -1,4 +1,7 @@
 from gym_d2d.envs.d2d_env import D2DEnv
+from gym_d2d.envs.recorder import TrajectoryDataset, TrajectoryRecorder
+from gym_d2d.envs.subproc_vector_env import SubprocVectorD2DEnv
+from gym_d2d.envs.vector_env import VectorD2DEnv
 
 
-__all__ = ['D2DEnv']
+__all__ = ['D2DEnv', 'SubprocVectorD2DEnv', 'TrajectoryDataset', 'TrajectoryRecorder', 'VectorD2DEnv']
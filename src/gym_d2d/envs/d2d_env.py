@@ -1,21 +1,34 @@
-import json
 from pathlib import Path
-from typing import Dict, Tuple, Any
+from typing import Any, Dict, List, Tuple
 
 import gym
 from gym import spaces
 import numpy as np
 
 from gym_d2d.actions import Action, Actions
+from gym_d2d.device_config import save_device_config
+from gym_d2d.devices import Devices
 from gym_d2d.envs.obs_fn import LinearObsFunction
 from gym_d2d.envs.reward_fn import SystemCapacityRewardFunction
 from gym_d2d.id import Id
 from gym_d2d.link_type import LinkType
-from gym_d2d.simulator import Simulator, BASE_STATION_ID
+from gym_d2d.rng import Seed
+from gym_d2d.simulator import Simulator
 
 EPISODE_LENGTH = 10
 DEFAULT_OBS_FN = LinearObsFunction
 DEFAULT_REWARD_FN = SystemCapacityRewardFunction
+# map state keys to the names used in info dicts
+INFO_KEYS = {'snrs_db': 'snr_db', 'sinrs_db': 'sinr_db', 'rate_bps': 'rate_bps', 'capacity_mbps': 'capacity_mbps'}
+
+
+def agent_tx_rx_ids(devices: Devices) -> List[Tuple[Id, Id]]:
+    """List the (TX, RX) IDs of every agent, in the same order as the initial actions generated by `D2DEnv.reset()`.
+
+    :param devices: The devices in the simulation.
+    :returns: A list of tx-rx ID pairs.
+    """
+    return [(cue_id, devices.serving_bs[cue_id]) for cue_id in devices.cues.keys()] + list(devices.dues.keys())
 
 
 class D2DEnv(gym.Env):
@@ -27,6 +40,7 @@ class D2DEnv(gym.Env):
         self.obs_fn = env_config.pop('obs_fn', DEFAULT_OBS_FN)()
         self.reward_fn = env_config.pop('reward_fn', DEFAULT_REWARD_FN)()
         self.simulator = Simulator(env_config)
+        self.profiler = self.simulator.profiler
         self.observation_space = self.obs_fn.get_obs_space(self.simulator.config)
         self.num_pwr_actions = {  # +1 because include max value, i.e. from [0, ..., max]
             'due': self.simulator.config.due_max_tx_power_dBm - self.simulator.config.due_min_tx_power_dBm + 1,
@@ -42,34 +56,136 @@ class D2DEnv(gym.Env):
         self.state = None
         self.num_steps = 0
 
+        # the fixed order of agents used by the array API, `step_arrays()`
+        self._tx_rx_ids: List[Tuple[Id, Id]] = agent_tx_rx_ids(self.simulator.devices)
+        self.agent_ids: List[str] = [':'.join(tx_rx_id) for tx_rx_id in self._tx_rx_ids]
+        self._agent_actions: List[Action] = [self._extract_action(*tx_rx_id, 0) for tx_rx_id in self._tx_rx_ids]
+        self._agent_num_pwr_actions = np.array([
+            self.num_pwr_actions['due' if action.link_type == LinkType.SIDELINK else 'cue']
+            for action in self._agent_actions], dtype=int)
+
     def reset(self):
-        self.num_steps = 0
-        self.simulator.reset()
-        # take a step with random D2D actions to generate initial SINRs
-        self.actions = self._reset_random_actions()
-        self.state = self.simulator.step(self.actions)
-        obs = self.obs_fn.get_state(self.actions, self.state, self.simulator.devices)
+        with self.profiler.phase('env.reset'):
+            self.num_steps = 0
+            self.simulator.reset()
+            # take a step with random D2D actions to generate initial SINRs
+            self.actions = self.random_actions()
+            self.state = self.simulator.step(self.actions)
+            obs = self.obs_fn.get_state(self.actions, self.state, self.simulator.devices)
         return obs
 
-    def _reset_random_actions(self) -> Actions:
-        cue_actions = {
-            (tx_id, BASE_STATION_ID): self._extract_action(tx_id, BASE_STATION_ID, self.action_space['cue'].sample())
-            for tx_id in self.simulator.devices.cues.keys()}
-        due_actions = {tx_rx_id: self._extract_action(*tx_rx_id, self.action_space['due'].sample())
-                       for tx_rx_id in self.simulator.devices.dues.keys()}
-        return Actions({**cue_actions, **due_actions})
+    def random_actions(self) -> Actions:
+        """Draw a random RB & TX power for every agent from `simulator.action_rng`, as used by `reset()`.
+
+        :returns: The actions, in the fixed order of `agent_ids`.
+        """
+        num_actions = self._agent_num_pwr_actions * self.simulator.config.num_rbs
+        return self._decode_actions_array(self.simulator.action_rng.integers(num_actions))
+
+    def seed(self, seed: Seed = None) -> List[Seed]:
+        """Seed the environment's random number generators, used for device placement, shadowing & the initial actions.
+
+        :param seed: An int, a `SeedSequence` (e.g. from `gym_d2d.rng.spawn_seeds()`),
+            or None for fresh, unpredictable entropy.
+        :returns: A list containing the seed.
+        """
+        self.simulator.seed(seed)
+        return [seed]
 
     def step(self, raw_actions: Dict[str, Any]):
-        self.actions = self._extract_actions(raw_actions)
-        self.state = self.simulator.step(self.actions)
-        self.num_steps += 1
-        obs = self.obs_fn.get_state(self.actions, self.state, self.simulator.devices)
-        rewards = self.reward_fn(self.actions, self.state)
-        game_over = {'__all__': self.num_steps >= EPISODE_LENGTH}
-        info = self._infos(self.actions, self.state)
+        profiler = self.profiler
+        with profiler.phase('env.step'):
+            with profiler.phase('decode_actions'):
+                self.actions = self._extract_actions(raw_actions)
+            self.simulator.move()
+            self.state = self.simulator.step(self.actions)
+            traffic = self._serve_traffic()
+            self.num_steps += 1
+            with profiler.phase('obs_fn'):
+                obs = self.obs_fn.get_state(self.actions, self.state, self.simulator.devices)
+            with profiler.phase('reward_fn'):
+                rewards = self.reward_fn(self.actions, self.state)
+            game_over = {'__all__': self.num_steps >= EPISODE_LENGTH}
+            with profiler.phase('infos'):
+                info = self._infos(self.actions, self.state)
+                for key, values in traffic.items():
+                    for agent_info, value in zip(info.values(), values.tolist()):
+                        agent_info[key] = value
+        profiler.tick()
 
         return obs, rewards, game_over, info
 
+    def step_arrays(self, raw_actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, bool, Dict[str, np.ndarray]]:
+        """Take a step with actions & results as arrays, with agents in the fixed order of `agent_ids`.
+
+        :param raw_actions: An (agents,) array of discrete actions, as in `step()`,
+            or an (agents, 2) array of (RB, TX power in dBm) pairs.
+        :returns: A tuple of an (agents, ...) array of observations, an (agents,) array of rewards,
+            whether the episode is over and a dict of (agents,) arrays of link metrics, with the same keys as `step()`.
+        """
+        profiler = self.profiler
+        with profiler.phase('env.step'):
+            with profiler.phase('decode_actions'):
+                self.actions = self._decode_actions_array(raw_actions)
+            self.simulator.move()
+            self.state = self.simulator.step(self.actions)
+            traffic = self._serve_traffic()
+            self.num_steps += 1
+            with profiler.phase('obs_fn'):
+                obs = self.obs_fn.get_state_array(self.actions, self.state, self.simulator.devices)
+            with profiler.phase('reward_fn'):
+                rewards = self.reward_fn(self.actions, self.state)
+                rewards = np.fromiter((rewards[agent_id] for agent_id in self.agent_ids), dtype=float,
+                                      count=len(rewards))
+            with profiler.phase('infos'):
+                info = {'rb': np.fromiter((action.rb for action in self.actions.values()), dtype=int),
+                        'tx_pwr_dbm': np.fromiter((action.tx_pwr_dBm for action in self.actions.values()), dtype=int)}
+                for state_key, info_key in INFO_KEYS.items():
+                    values = self.state[state_key]
+                    info[info_key] = np.fromiter((values[tx_rx_id] for tx_rx_id in self._tx_rx_ids), dtype=float,
+                                                 count=len(self._tx_rx_ids))
+                info.update(traffic)
+        profiler.tick()
+
+        return obs, rewards, self.num_steps >= EPISODE_LENGTH, info
+
+    def evaluate_batch(self, candidates: np.ndarray) -> Dict[str, np.ndarray]:
+        """Score many candidate actions against the current topology without a step, see `Simulator.evaluate_batch()`.
+
+        :param candidates: An (M, agents) array of discrete actions, as in `step()`,
+            or an (M, agents, 2) array of (RB, TX power in dBm) pairs, with agents in the fixed order of `agent_ids`.
+        :returns: A dict of (M, agents) arrays of link metrics, keyed as in the infos of `step()`,
+            and the reward function's rewards under `rewards`.
+        """
+        candidates = np.asarray(candidates)
+        if candidates.ndim == 2 and candidates.shape[1] == len(self.agent_ids):
+            candidates = np.stack(np.divmod(candidates.astype(int), self._agent_num_pwr_actions), axis=-1)
+        metrics = self.simulator.evaluate_batch(Actions(zip(self._tx_rx_ids, self._agent_actions)), candidates,
+                                                self.reward_fn)
+        return {INFO_KEYS.get(key, key): values for key, values in metrics.items()}
+
+    def _serve_traffic(self) -> Dict[str, np.ndarray]:
+        if self.simulator.traffic is None:
+            return {}
+        links = self.actions.link_arrays(self.simulator.devices.arrays.index)
+        capacities_mbps = self.state['capacity_mbps']
+        return self.simulator.serve(links, np.fromiter((capacities_mbps[key] for key in self.actions), dtype=float,
+                                                       count=len(self.actions)))
+
+    def _decode_actions_array(self, raw_actions: np.ndarray) -> Actions:
+        raw_actions = np.asarray(raw_actions)
+        if raw_actions.shape == (len(self.agent_ids), 2):
+            rbs, tx_pwrs_dBm = raw_actions[:, 0].astype(int), raw_actions[:, 1].astype(int)
+        elif raw_actions.shape == (len(self.agent_ids),):
+            rbs, tx_pwrs_dBm = np.divmod(raw_actions.astype(int), self._agent_num_pwr_actions)
+        else:
+            raise ValueError(f'Unable to decode actions of shape {raw_actions.shape}')
+
+        return Actions({
+            tx_rx_id: Action(action.tx, action.rx, action.link_type, rb, tx_pwr_dBm)
+            for tx_rx_id, action, rb, tx_pwr_dBm
+            in zip(self._tx_rx_ids, self._agent_actions, rbs.tolist(), tx_pwrs_dBm.tolist())})
+
     def _extract_actions(self, raw_actions: Dict[str, Any]) -> Actions:
         actions = Actions()
         for id_pair_str, action in raw_actions.items():
@@ -115,6 +231,9 @@ class D2DEnv(gym.Env):
             'capacity_mbps': state['capacity_mbps'][id_pair],
         }
 
+    def close(self) -> None:
+        self.simulator.close()
+
     def render(self, mode='human'):
         assert self.state is not None and self.actions is not None, \
             'Initialise environment with `reset()` before calling `render()`'
@@ -122,13 +241,12 @@ class D2DEnv(gym.Env):
         print(obs)
 
     def save_device_config(self, config_file: Path) -> None:
-        """Save the environment's device configuration in a JSON file.
+        """Save the environment's device configuration in a JSON file, or a columnar `.npz` file.
 
-        :param config_file: The filepath to save to.
+        :param config_file: The filepath to save to, `.npz` files are saved in the columnar format.
         """
         config = {device.id: {
                 'position': device.position.as_tuple(),
                 'config': device.config,
             } for device in self.simulator.devices.values()}
-        with config_file.open(mode='w') as fid:
-            json.dump(config, fid)
+        save_device_config(config, config_file)
@@ -1,10 +1,20 @@
+from collections.abc import Mapping
 from dataclasses import dataclass
-import json
 from pathlib import Path
 from typing import Optional, Type
 
+import numpy as np
+
+from gym_d2d.device_config import DeviceConfigTable, load_device_config
+from gym_d2d.mobility import MobilityModel, StaticMobility
 from gym_d2d.path_loss import PathLoss, LogDistancePathLoss
-from gym_d2d.traffic_model import TrafficModel, UplinkTrafficModel
+from gym_d2d.position import hex_cell_centres
+from gym_d2d.sinr_engine import SINR_UPDATES
+from gym_d2d.topology_bank import TopologyBank
+from gym_d2d.traffic_model import ArrivalModel, TrafficModel, UplinkTrafficModel
+
+
+SINR_ENGINES = ('python', 'numpy')
 
 
 @dataclass
@@ -13,6 +23,7 @@ class EnvConfig:
     num_cues: int = 25
     num_due_pairs: int = 25
     cell_radius_m: float = 500.0
+    num_cells: int = 1
     d2d_radius_m: float = 20.0
     due_min_tx_power_dBm: int = 0
     due_max_tx_power_dBm: int = 20
@@ -20,18 +31,65 @@ class EnvConfig:
     mbs_max_tx_power_dBm: int = 46
     path_loss_model: Type[PathLoss] = LogDistancePathLoss
     traffic_model: Type[TrafficModel] = UplinkTrafficModel
+    mobility_model: Type[MobilityModel] = StaticMobility
+    step_duration_s: float = 1.0
+    arrival_model: Optional[Type[ArrivalModel]] = None
     carrier_freq_GHz: float = 2.1
     num_subcarriers: int = 12
     subcarrier_spacing_kHz: int = 15
     channel_bandwidth_MHz: float = 20.0
     device_config_file: Optional[Path] = None
+    topology_bank_file: Optional[Path] = None
+    sinr_engine: str = 'python'
+    interference_radius_m: Optional[float] = None
+    interference_threshold_dB: Optional[float] = None
+    sinr_update: str = 'full'
+    profile: bool = False
+    seed: Optional[int] = None
+    profile_summary_every: int = 0
+    num_shard_workers: int = 0
 
     def __post_init__(self):
+        if self.sinr_engine not in SINR_ENGINES:
+            raise ValueError(f'Invalid SINR engine "{self.sinr_engine}", expected one of {SINR_ENGINES}.')
+        if self.interference_radius_m is not None or self.interference_threshold_dB is not None:
+            if self.sinr_engine != 'numpy':
+                raise ValueError('Interference culling requires the "numpy" SINR engine.')
+            if self.interference_radius_m is not None and self.interference_threshold_dB is not None:
+                raise ValueError('Configure either an interference radius or an interference threshold, not both.')
+            if self.interference_radius_m is not None and self.interference_radius_m <= 0:
+                raise ValueError(f'Invalid interference radius {self.interference_radius_m}, expected > 0.')
+        if self.sinr_update not in SINR_UPDATES:
+            raise ValueError(f'Invalid SINR update "{self.sinr_update}", expected one of {SINR_UPDATES}.')
+        if self.sinr_update != 'full':
+            if self.sinr_engine != 'numpy':
+                raise ValueError('Delta SINR updates require the "numpy" SINR engine.')
+            if self.interference_radius_m is not None or self.interference_threshold_dB is not None:
+                raise ValueError('Delta SINR updates can\'t be combined with interference culling.')
+            if self.num_shard_workers > 0:
+                raise ValueError('Delta SINR updates can\'t be combined with cell shards.')
+        if self.step_duration_s <= 0:
+            raise ValueError(f'Invalid step duration {self.step_duration_s}, expected > 0.')
+        if self.num_cells < 1:
+            raise ValueError(f'Invalid number of cells {self.num_cells}, expected >= 1.')
+        if self.num_shard_workers < 0:
+            raise ValueError(f'Invalid number of shard workers {self.num_shard_workers}, expected >= 0.')
+        if self.profile_summary_every < 0:
+            raise ValueError(f'Invalid profile summary interval {self.profile_summary_every}, expected >= 0.')
+        self.cell_centres = hex_cell_centres(self.num_cells, self.cell_radius_m)
+        # the radius of the circle containing every cell
+        self.layout_radius_m = float(np.hypot(*self.cell_centres.T).max()) + self.cell_radius_m
+        self.topology_bank = TopologyBank(self.topology_bank_file) if self.topology_bank_file is not None else None
         self.devices = self.load_device_config()
 
-    def load_device_config(self) -> dict:
+    def load_device_config(self) -> Mapping:
+        devices = {}
+        if self.topology_bank is not None:
+            devices = {device_id: {'config': config}
+                       for device_id, config in self.topology_bank.device_configs.items()}
         if isinstance(self.device_config_file, Path):
-            with self.device_config_file.open(mode='r') as fid:
-                return json.load(fid)
-        else:
-            return {}
+            loaded = load_device_config(self.device_config_file)
+            if not devices:
+                return loaded  # keep columnar configs columnar
+            devices.update(loaded.to_dict() if isinstance(loaded, DeviceConfigTable) else loaded)
+        return devices
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from gym import Space, spaces
 import numpy as np
@@ -7,10 +7,12 @@ import numpy as np
 from gym_d2d.actions import Actions
 from gym_d2d.devices import Devices
 from gym_d2d.envs.env_config import EnvConfig
-from gym_d2d.id import Id
 
 
 class ObsFunction(ABC):
+    # the state keys the function reads, to request from `Simulator.step()` & skip the others, None if unknown
+    required_metrics: Optional[Tuple[str, ...]] = None
+
     @abstractmethod
     def get_obs_space(self, env_config: EnvConfig) -> Space:
         """Calculate the observation space generated by this observation function.
@@ -31,31 +33,111 @@ class ObsFunction(ABC):
         """
         pass
 
+    def get_state_array(self, actions: Actions, state: dict, devices: Devices) -> np.ndarray:
+        """Calculate the next observations for each agent as a single array.
+
+        :param actions: Dict of previous actions (empty 1st step).
+        :param state: Dict of SINRs, etc. representing the simulation state after taking the actions.
+        :param devices: Dict of devices in the simulation.
+        :returns: An (agents, ...) array of observations, in the same order as the actions.
+        """
+        obses = self.get_state(actions, state, devices)
+        return np.stack([obses[':'.join(tx_rx_id)] for tx_rx_id in actions.keys()])
+
+    def get_batch_state(self, links: Dict[str, np.ndarray]) -> np.ndarray:
+        """Calculate the next observations for each agent in a batch of environments at once.
+
+        Optional, batched environments fall back to calling `get_state()` per environment if not implemented.
+
+        :param links: Dict of (B, L) arrays describing each link (agent) in each environment:
+            `tx_pos` & `rx_pos` (B, L, 2), `rb`, `tx_pwr_dBm`, `link_type`, plus the simulation state keys.
+        :returns: A (B, L, ...) array of observations.
+        """
+        raise NotImplementedError
+
 
 class LinearObsFunction(ObsFunction):
+    """Each agent observes the positions, SINR & SNR of its own link, followed by those of every other link.
+
+    Each step, the features of every link are gathered once into an (N, 6) table,
+    and every agent's observation is a permutation of its rows.
+    With `shared_buffers`, observations are float32 views of buffers that are reused every step,
+    so copy them to keep them beyond the next step.
+    """
+    NUM_FEATURES = 6  # tx_x, tx_y, rx_x, rx_y, sinr, snr
+    required_metrics = ('sinrs_db', 'snrs_db')
+
+    def __init__(self, shared_buffers: bool = False) -> None:
+        super().__init__()
+        self.shared_buffers = bool(shared_buffers)
+        self._table = np.zeros((0, self.NUM_FEATURES), dtype=np.float32)
+        self._obs = np.zeros((0, 0, self.NUM_FEATURES), dtype=np.float32)
+        self._order = None
+
     def get_obs_space(self, env_config: EnvConfig) -> Space:
-        r = env_config.cell_radius_m
+        r = env_config.layout_radius_m
         num_txs = env_config.num_cues + env_config.num_due_pairs
-        num_obs = 6  # tx_x, tx_y, rx_x, rx_y, sinr, snr
-        obs_shape = (num_obs * num_txs,)
+        obs_shape = (self.NUM_FEATURES * num_txs,)
         return spaces.Box(low=-r, high=r, shape=obs_shape)
 
     def get_state(self, actions: Actions, state: dict, devices: Devices) -> Dict[str, np.array]:
-        agent_obs = self._agent_obs(actions, state)
-        obses = {}
-        for tx_rx_id in agent_obs:
-            tx_obs_copy = agent_obs[tx_rx_id][:]
-            for other_tx_rx_id, other_obs in agent_obs.items():
-                if other_tx_rx_id != tx_rx_id:
-                    tx_obs_copy.extend(other_obs)
-            obses[':'.join(tx_rx_id)] = np.array(tx_obs_copy)
-
-        return obses
-
-    def _agent_obs(self, actions: Actions, state: dict) -> Dict[Tuple[Id, Id], List[float]]:
-        agent_obs = {}
-        for tx_rx_id, action in actions.items():
-            agent_obs[tx_rx_id] = list(action.tx.position.as_tuple() + action.rx.position.as_tuple())
-            agent_obs[tx_rx_id].append(state['sinrs_db'][tx_rx_id])
-            agent_obs[tx_rx_id].append(state['snrs_db'][tx_rx_id])
-        return agent_obs
+        obs, agent_ids = self._get_obs(actions, state, devices)
+        return dict(zip(agent_ids, obs))
+
+    def get_state_array(self, actions: Actions, state: dict, devices: Devices) -> np.ndarray:
+        obs, _ = self._get_obs(actions, state, devices)
+        return obs
+
+    def _get_obs(self, actions: Actions, state: dict, devices: Devices) -> Tuple[np.ndarray, List[str]]:
+        table, agent_ids = self.get_table(actions, state, devices)
+        num_agents = len(agent_ids)
+        order = self._agent_order(num_agents)
+        if self.shared_buffers:
+            if self._obs.shape[0] != num_agents:
+                self._obs = np.zeros((num_agents, num_agents, self.NUM_FEATURES), dtype=np.float32)
+            obs = np.take(table, order, axis=0, out=self._obs)
+        else:
+            obs = table[order]
+        return obs.reshape(num_agents, num_agents * self.NUM_FEATURES), agent_ids
+
+    def get_table(self, actions: Actions, state: dict, devices: Devices) -> Tuple[np.ndarray, List[str]]:
+        """Gather the features of every link into a single table.
+
+        :param actions: Dict of previous actions (empty 1st step).
+        :param state: Dict of SINRs, etc. representing the simulation state after taking the actions.
+        :param devices: Dict of devices in the simulation.
+        :returns: An (N, 6) array with a row of features per link & a list of the agent ID of each row.
+        """
+        links = actions.link_arrays(devices.arrays.index)
+        num_agents = len(links)
+        if self.shared_buffers:
+            if self._table.shape[0] != num_agents:
+                self._table = np.zeros((num_agents, self.NUM_FEATURES), dtype=np.float32)
+            table = self._table
+        else:
+            table = np.zeros((num_agents, self.NUM_FEATURES))
+        positions = devices.arrays.positions
+        table[:, 0:2] = positions[links.tx_idxs]
+        table[:, 2:4] = positions[links.rx_idxs]
+        sinrs_db, snrs_db = state['sinrs_db'], state['snrs_db']
+        table[:, 4] = np.fromiter((sinrs_db[tx_rx_id] for tx_rx_id in actions.keys()), dtype=float, count=num_agents)
+        table[:, 5] = np.fromiter((snrs_db[tx_rx_id] for tx_rx_id in actions.keys()), dtype=float, count=num_agents)
+        return table, [':'.join(tx_rx_id) for tx_rx_id in actions.keys()]
+
+    def get_batch_state(self, links: Dict[str, np.ndarray]) -> np.ndarray:
+        table = np.concatenate([
+            links['tx_pos'],
+            links['rx_pos'],
+            links['sinrs_db'][..., None],
+            links['snrs_db'][..., None],
+        ], axis=-1)
+        num_envs, num_links, num_obs = table.shape
+        return table[:, self._agent_order(num_links), :].reshape(num_envs, num_links, num_links * num_obs)
+
+    def _agent_order(self, num_agents: int) -> np.ndarray:
+        """Each agent observes its own features first, followed by every other agent's in order."""
+        if self._order is None or self._order.shape[0] != num_agents:
+            agents = np.arange(num_agents)[:, None]
+            others = np.arange(max(num_agents - 1, 0))[None, :]
+            self._order = np.hstack([agents, others + (others >= agents)])
+        return self._order
@@ -0,0 +1,209 @@
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
+
+import gym
+import numpy as np
+
+from gym_d2d.envs.d2d_env import D2DEnv
+
+
+META_FILE = 'meta.json'
+LINK_FIELDS = ('rb', 'tx_pwr_dbm', 'sinr_db', 'snr_db', 'rate_bps', 'capacity_mbps')  # recorded from the step infos
+
+
+def _step_fields(num_agents: int, obs_shape: tuple) -> Dict[str, Tuple[tuple, str]]:
+    """The fields recorded each step & their per-step shapes & dtypes."""
+    return {
+        'obs': ((num_agents, *obs_shape), 'float32'),  # the observations the actions were taken from
+        'next_obs': ((num_agents, *obs_shape), 'float32'),
+        'rb': ((num_agents,), 'int64'),
+        'tx_pwr_dbm': ((num_agents,), 'int64'),
+        'rewards': ((num_agents,), 'float64'),
+        'sinr_db': ((num_agents,), 'float64'),
+        'snr_db': ((num_agents,), 'float64'),
+        'rate_bps': ((num_agents,), 'float64'),
+        'capacity_mbps': ((num_agents,), 'float64'),
+        'episode': ((), 'int64'),
+        'done': ((), 'bool'),
+    }
+
+
+class TrajectoryRecorder(gym.Wrapper):
+    """Records a `D2DEnv`'s trajectories to disk as an offline dataset, readable with `TrajectoryDataset`.
+
+    Each step is written into preallocated buffers of `chunk_size` steps,
+    which are saved as one `.npy` file per field once full, so memory use is bounded however long it records for.
+    Recording into an existing dataset appends to it.
+    Call `close()` to save the last, partially filled chunk.
+
+    Agents are ordered as in the env's `agent_ids`.
+    Both the dict (`step()`) & array (`step_arrays()`) APIs are recorded.
+
+    :param env: The environment to record.
+    :param path: The directory to save the dataset in.
+    :param chunk_size: The number of steps per chunk.
+    """
+
+    def __init__(self, env: D2DEnv, path: Union[str, Path], chunk_size: int = 1024) -> None:
+        super().__init__(env)
+        self.path = Path(path)
+        self.chunk_size = int(chunk_size)
+        if self.chunk_size < 1:
+            raise ValueError(f'Invalid chunk size {chunk_size}, expected >= 1.')
+        self.agent_ids: List[str] = env.agent_ids
+        self.fields = _step_fields(len(self.agent_ids), env.observation_space.shape)
+        self.meta = {'agent_ids': self.agent_ids, 'fields': self.fields, 'chunk_lengths': [], 'num_episodes': 0}
+        meta_file = self.path / META_FILE
+        if meta_file.exists():
+            with meta_file.open(mode='r') as fid:
+                self.meta = json.load(fid)
+            if self.meta['agent_ids'] != self.agent_ids:
+                raise ValueError(f'Dataset "{self.path}" was recorded with different agents.')
+        self.buffers = {field: np.zeros((self.chunk_size, *shape), dtype=dtype)
+                        for field, (shape, dtype) in self.fields.items()}
+        self.num_buffered = 0
+        self.episode = self.meta['num_episodes'] - 1
+        self._obs = None
+
+    def reset(self, **kwargs):
+        obs = self.env.reset(**kwargs)
+        self.episode += 1
+        self.meta['num_episodes'] = self.episode + 1
+        self._obs = np.stack([obs[agent_id] for agent_id in self.agent_ids])
+        return obs
+
+    def step(self, raw_actions: dict):
+        obs, rewards, game_over, infos = self.env.step(raw_actions)
+        self._record(
+            np.stack([obs[agent_id] for agent_id in self.agent_ids]),
+            [rewards[agent_id] for agent_id in self.agent_ids],
+            game_over['__all__'],
+            {key: [infos[agent_id][key] for agent_id in self.agent_ids] for key in LINK_FIELDS})
+        return obs, rewards, game_over, infos
+
+    def step_arrays(self, raw_actions: np.ndarray):
+        obs, rewards, game_over, infos = self.env.step_arrays(raw_actions)
+        self._record(obs, rewards, game_over, infos)
+        return obs, rewards, game_over, infos
+
+    def _record(self, obs: np.ndarray, rewards, game_over: bool, infos: dict) -> None:
+        if self._obs is None:
+            raise RuntimeError('Call `reset()` before `step()`.')
+        i = self.num_buffered
+        buffers = self.buffers
+        buffers['obs'][i] = self._obs
+        buffers['next_obs'][i] = obs
+        buffers['rewards'][i] = rewards
+        for key in LINK_FIELDS:
+            buffers[key][i] = infos[key]
+        buffers['episode'][i] = self.episode
+        buffers['done'][i] = game_over
+        self._obs = obs
+        self.num_buffered += 1
+        if self.num_buffered == self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Save the buffered steps as a new chunk."""
+        if self.num_buffered == 0:
+            return
+        chunk = len(self.meta['chunk_lengths'])
+        for field, buffer in self.buffers.items():
+            field_dir = self.path / field
+            field_dir.mkdir(parents=True, exist_ok=True)
+            np.save(field_dir / f'{chunk:06d}.npy', buffer[:self.num_buffered])
+        self.meta['chunk_lengths'].append(self.num_buffered)
+        self.num_buffered = 0
+        # write the metadata last & atomically, so readers never see chunks that aren't fully saved
+        tmp_file = self.path / f'{META_FILE}.tmp'
+        with tmp_file.open(mode='w') as fid:
+            json.dump(self.meta, fid)
+        tmp_file.replace(self.path / META_FILE)
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+
+class LazyField:
+    """A field of a `TrajectoryDataset`, indexed like an array of steps but only reading the chunks it needs."""
+
+    def __init__(self, dataset: 'TrajectoryDataset', field: str) -> None:
+        super().__init__()
+        self.dataset = dataset
+        self.field = field
+        shape, dtype = dataset.fields[field]
+        self.shape = (len(dataset), *shape)
+        self.dtype = np.dtype(dtype)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, idxs) -> np.ndarray:
+        if isinstance(idxs, (int, np.integer)):
+            idx = int(idxs) + len(self) if idxs < 0 else int(idxs)
+            if not 0 <= idx < len(self):
+                raise IndexError(f'Step {idxs} out of range for {len(self)} steps')
+            chunk = int(np.searchsorted(self.dataset.chunk_offsets, idx, side='right')) - 1
+            return np.asarray(self.dataset.chunk(self.field, chunk)[idx - self.dataset.chunk_offsets[chunk]])
+        if isinstance(idxs, slice):
+            idxs = np.arange(len(self))[idxs]
+        idxs = np.asarray(idxs)
+        if idxs.dtype == bool:
+            idxs = np.flatnonzero(idxs)
+        idxs = np.where(idxs < 0, idxs + len(self), idxs)
+        out = np.empty((len(idxs), *self.shape[1:]), dtype=self.dtype)
+        chunks = np.searchsorted(self.dataset.chunk_offsets, idxs, side='right') - 1
+        for chunk in np.unique(chunks):
+            in_chunk = chunks == chunk
+            out[in_chunk] = self.dataset.chunk(self.field, chunk)[idxs[in_chunk] - self.dataset.chunk_offsets[chunk]]
+        return out
+
+
+class TrajectoryDataset:
+    """Reads a dataset saved by `TrajectoryRecorder` lazily, memory-mapping chunks as they're accessed.
+
+        dataset = TrajectoryDataset('trajectories')
+        rewards = dataset['rewards'][1000:2000]  # reads only the chunks holding those steps
+
+    :param path: The dataset's directory.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        super().__init__()
+        self.path = Path(path)
+        with (self.path / META_FILE).open(mode='r') as fid:
+            meta = json.load(fid)
+        self.agent_ids: List[str] = meta['agent_ids']
+        self.fields: Dict[str, Tuple[tuple, str]] = {field: (tuple(shape), dtype)
+                                                     for field, (shape, dtype) in meta['fields'].items()}
+        self.chunk_lengths: List[int] = meta['chunk_lengths']
+        self.chunk_offsets = np.concatenate([[0], np.cumsum(self.chunk_lengths)]).astype(int)
+        self.num_episodes: int = meta['num_episodes']
+
+    def __len__(self) -> int:
+        return int(self.chunk_offsets[-1])
+
+    def __getitem__(self, field: str) -> LazyField:
+        if field not in self.fields:
+            raise KeyError(field)
+        return LazyField(self, field)
+
+    def chunk(self, field: str, chunk: int) -> np.ndarray:
+        """Memory-map one chunk of a field.
+
+        :param field: The field, e.g. `rewards`.
+        :param chunk: The index of the chunk.
+        :returns: A read-only (chunk length, ...) array.
+        """
+        return np.load(self.path / field / f'{int(chunk):06d}.npy', mmap_mode='r')
+
+    def iter_chunks(self, field: str) -> Iterator[np.ndarray]:
+        """Memory-map each chunk of a field in order.
+
+        :param field: The field, e.g. `rewards`.
+        :returns: A generator of read-only (chunk length, ...) arrays.
+        """
+        for chunk in range(len(self.chunk_lengths)):
+            yield self.chunk(field, chunk)
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from math import log2
-from typing import Dict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
 
 from gym_d2d.actions import Actions
 from gym_d2d.conversion import dB_to_linear
@@ -8,6 +10,9 @@ from gym_d2d.link_type import LinkType
 
 
 class RewardFunction(ABC):
+    # the state keys the function reads, see `ObsFunction.required_metrics`
+    required_metrics: Optional[Tuple[str, ...]] = None
+
     @abstractmethod
     def __call__(self, actions: Actions, state: dict) -> Dict[str, float]:
         """Calculate rewards for each action.
@@ -18,33 +23,67 @@ class RewardFunction(ABC):
         """
         pass
 
+    def get_batch_rewards(self, links: Dict[str, np.ndarray]) -> np.ndarray:
+        """Calculate rewards for each agent in a batch of environments at once.
+
+        Optional, batched environments fall back to calling the reward function per environment if not implemented.
+
+        :param links: Dict of (B, L) arrays describing each link (agent) in each environment,
+            see `ObsFunction.get_batch_state()`.
+        :returns: A (B, L) array of rewards.
+        """
+        raise NotImplementedError
+
+
+def co_channel_sums(rbs: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Sum a value over all the links sharing each link's RB (itself included).
+
+    :param rbs: A (B, L) array of the RB used by each link.
+    :param values: A (B, L) array of values to sum.
+    :returns: A (B, L) array of the per-RB totals, as seen by each link.
+    """
+    num_envs = rbs.shape[0]
+    num_rbs = int(rbs.max()) + 1 if rbs.size else 0
+    flat_rbs = (rbs + np.arange(num_envs)[:, None] * num_rbs).ravel()
+    totals = np.bincount(flat_rbs, weights=values.ravel(), minlength=num_envs * num_rbs)
+    return totals[flat_rbs].reshape(rbs.shape)
+
 
 class SystemCapacityRewardFunction(RewardFunction):
+    required_metrics = ('capacity_mbps',)
+
     def __init__(self, min_capacity_mbps=0.0) -> None:
         super().__init__()
         self.min_capacity_mbps = float(min_capacity_mbps)
 
     def __call__(self, actions: Actions, state: dict) -> Dict[str, float]:
-        reward = -1.0
-        for tx_rx_id, action in actions.items():
-            if action.link_type != LinkType.SIDELINK:
-                continue
-            ix_actions = actions.get_actions_by_rb(action.rb).difference({action})
-            for ix_action in ix_actions:
-                if ix_action.link_type == LinkType.SIDELINK:
-                    continue
-                if state['capacity_mbps'][(ix_action.tx.id, ix_action.rx.id)] <= self.min_capacity_mbps:
-                    break
-            else:
-                continue
-            break
+        capacities_mbps = state['capacity_mbps']
+        is_failing_cue = {tx_rx_id: action.link_type != LinkType.SIDELINK
+                          and capacities_mbps[tx_rx_id] <= self.min_capacity_mbps
+                          for tx_rx_id, action in actions.items()}
+        num_failing_cues = actions.rb_totals(is_failing_cue)
+        # any D2D link sharing its RB with a failing cellular link fails everyone
+        if any(action.link_type == LinkType.SIDELINK and num_failing_cues[action.rb] > 0
+               for action in actions.values()):
+            reward = -1.0
         else:
-            reward = sum(state['capacity_mbps'].values()) / len(actions)
+            reward = sum(capacities_mbps.values()) / len(actions)
 
         return {':'.join(tx_rx_id): reward for tx_rx_id in actions.keys()}
 
+    def get_batch_rewards(self, links: Dict[str, np.ndarray]) -> np.ndarray:
+        is_sidelink = links['link_type'] == LinkType.SIDELINK.value
+        is_failing_cue = ~is_sidelink & (links['capacity_mbps'] <= self.min_capacity_mbps)
+        # a D2D link sharing its RB with a failing cellular link
+        is_interfering = is_sidelink & (co_channel_sums(links['rb'], is_failing_cue) > 0)
+        rewards = links['capacity_mbps'].sum(axis=1) / links['rb'].shape[1]
+        rewards[is_interfering.any(axis=1)] = -1.0
+        return np.repeat(rewards[:, None], links['rb'].shape[1], axis=1)
+
 
 class ShannonRewardFunction(RewardFunction):
+    required_metrics = ('sinrs_db',)
+
     def __init__(self, min_sinr=-70.0) -> None:
         super().__init__()
         self.min_sinr = float(min_sinr)
@@ -56,23 +95,37 @@ class ShannonRewardFunction(RewardFunction):
             rewards[':'.join(tx_rx_id)] = log2(1 + dB_to_linear(sinr)) if sinr >= self.min_sinr else -1.0
         return rewards
 
+    def get_batch_rewards(self, links: Dict[str, np.ndarray]) -> np.ndarray:
+        sinrs_db = links['sinrs_db']
+        return np.where(sinrs_db >= self.min_sinr, np.log2(1 + np.power(10.0, sinrs_db / 10)), -1.0)
+
 
 class CueSinrShannonRewardFunction(RewardFunction):
+    required_metrics = ('sinrs_db',)
+
     def __init__(self, sinr_threshold_dB=0.0) -> None:
         super().__init__()
         self.sinr_threshold_dB = float(sinr_threshold_dB)
 
     def __call__(self, actions: Actions, state: dict) -> Dict[str, float]:
+        sinrs_db = state['sinrs_db']
+        is_failing_cue = {tx_rx_id: (action.link_type != LinkType.SIDELINK
+                                     and sinrs_db[tx_rx_id] < self.sinr_threshold_dB)
+                          for tx_rx_id, action in actions.items()}
+        num_failing_cues = actions.rb_totals(is_failing_cue)
         rewards = {}
         for tx_rx_id, action in actions.items():
-            reward = -1.0
-            ix_actions = actions.get_actions_by_rb(action.rb).difference({action})
-            for ix_action in ix_actions:
-                if ix_action.link_type != LinkType.SIDELINK:
-                    cue_sinr_dB = state['sinrs_db'][(ix_action.tx.id, ix_action.rx.id)]
-                    if cue_sinr_dB < self.sinr_threshold_dB:
-                        break
+            # exclude the link's own contribution to its RB's count of failing cellular links
+            if num_failing_cues[action.rb] - is_failing_cue[tx_rx_id] > 0:
+                reward = -1.0
             else:
-                reward = log2(1 + dB_to_linear(state['sinrs_db'][tx_rx_id]))
+                reward = log2(1 + dB_to_linear(sinrs_db[tx_rx_id]))
             rewards[':'.join(tx_rx_id)] = reward
         return rewards
+
+    def get_batch_rewards(self, links: Dict[str, np.ndarray]) -> np.ndarray:
+        sinrs_db = links['sinrs_db']
+        is_failing_cue = (links['link_type'] != LinkType.SIDELINK.value) & (sinrs_db < self.sinr_threshold_dB)
+        # exclude each link's own contribution from its RB's count of failing cellular links
+        num_failing_cues = co_channel_sums(links['rb'], is_failing_cue) - is_failing_cue
+        return np.where(num_failing_cues > 0, -1.0, np.log2(1 + np.power(10.0, sinrs_db / 10)))
@@ -0,0 +1,225 @@
+import multiprocessing as mp
+import traceback
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from gym_d2d.envs.d2d_env import D2DEnv
+from gym_d2d.rng import Seed, spawn_seeds
+
+
+# info keys written to shared memory each step & their dtypes
+INFO_DTYPES = {
+    'rb': np.int64,
+    'tx_pwr_dbm': np.int64,
+    'snr_db': np.float64,
+    'sinr_db': np.float64,
+    'rate_bps': np.float64,
+    'capacity_mbps': np.float64,
+}
+
+
+def _buffer_specs(num_envs: int, num_agents: int, obs_shape: tuple) -> Dict[str, Tuple[tuple, type]]:
+    return {
+        'actions': ((num_envs, num_agents), np.int64),
+        'obs': ((num_envs, num_agents, *obs_shape), np.float64),
+        'terminal_obs': ((num_envs, num_agents, *obs_shape), np.float64),
+        'rewards': ((num_envs, num_agents), np.float64),
+        'game_over': ((num_envs,), np.bool_),
+        **{key: ((num_envs, num_agents), dtype) for key, dtype in INFO_DTYPES.items()},
+    }
+
+
+def _attach(shms: dict, specs: dict) -> Dict[str, np.ndarray]:
+    return {key: np.ndarray(shape, dtype=dtype, buffer=shms[key].buf) for key, (shape, dtype) in specs.items()}
+
+
+def _worker(conn, env_config: dict, shm_names: Dict[str, str], specs: dict, env_idxs: List[int]) -> None:
+    from multiprocessing import shared_memory
+
+    shms = {key: shared_memory.SharedMemory(name=name) for key, name in shm_names.items()}
+    buffers = _attach(shms, specs)
+    try:
+        envs = {b: D2DEnv(dict(env_config)) for b in env_idxs}
+        agent_ids = envs[env_idxs[0]].agent_ids
+
+        def write_obs(b: int, obses: dict) -> None:
+            for i, agent_id in enumerate(agent_ids):
+                buffers['obs'][b, i] = obses[agent_id]
+
+        while True:
+            cmd, data = conn.recv()
+            try:
+                if cmd == 'reset':
+                    for b, env in envs.items():
+                        write_obs(b, env.reset())
+                elif cmd == 'step':
+                    for b, env in envs.items():
+                        obs, rewards, game_over, infos = env.step_arrays(buffers['actions'][b])
+                        buffers['rewards'][b] = rewards
+                        buffers['game_over'][b] = game_over
+                        for key in INFO_DTYPES:
+                            buffers[key][b] = infos[key]
+                        if game_over:
+                            buffers['terminal_obs'][b] = obs
+                            write_obs(b, env.reset())
+                        else:
+                            buffers['obs'][b] = obs
+                elif cmd == 'seed':
+                    for b, env in envs.items():
+                        env.seed(data[b])
+                elif cmd == 'call':
+                    method, args = data
+                    conn.send(('ok', {b: getattr(env, method)(*args) for b, env in envs.items()}))
+                    continue
+                elif cmd == 'close':
+                    conn.send(('ok', None))
+                    break
+                else:
+                    raise ValueError(f'Unknown command "{cmd}"')
+                conn.send(('ok', None))
+            except Exception:
+                conn.send(('error', traceback.format_exc()))
+    finally:
+        buffers.clear()  # release the views before closing the shared memory they point to
+        for shm in shms.values():
+            shm.close()
+        conn.close()
+
+
+class SubprocVectorD2DEnv:
+    """Steps a batch of `D2DEnv`s in parallel worker processes.
+
+    For when per-environment Python customisation (custom obs/reward functions, path loss models, etc.)
+    rules out `VectorD2DEnv`.
+    Each worker owns a contiguous slice of the environments and writes their observations, rewards and link metrics
+    directly into preallocated shared memory arrays, so only small control messages are sent over pipes.
+
+    Each environment gets an independent random stream spawned from the config's `seed`, see `seed()`,
+    so results don't depend on the number of workers.
+    Agents are ordered as in `agent_ids`.
+    The arrays returned by `reset()` & `step()` are views of the shared buffers,
+    which are overwritten by the next call, so copy them to keep them.
+    Requires Python 3.8 or greater (`multiprocessing.shared_memory`).
+    """
+
+    def __init__(self, num_envs: int, env_config=None, num_workers: int = None, start_method: str = None) -> None:
+        super().__init__()
+        try:
+            from multiprocessing import shared_memory
+        except ImportError:
+            raise ImportError('`SubprocVectorD2DEnv` requires Python 3.8 or greater')
+
+        env_config = env_config or {}
+        self.num_envs = int(num_envs)
+        self.num_workers = min(int(num_workers or mp.cpu_count()), self.num_envs)
+        # a probe env for the spaces & agent order, closed so it doesn't keep any cell shard workers running
+        env = D2DEnv(dict(env_config))
+        try:
+            self.observation_space = env.observation_space
+            self.action_space = env.action_space
+            self.agent_ids: List[str] = env.agent_ids
+        finally:
+            env.close()
+
+        specs = _buffer_specs(self.num_envs, len(self.agent_ids), self.observation_space.shape)
+        self._shms = {}
+        for key, (shape, dtype) in specs.items():
+            size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            self._shms[key] = shared_memory.SharedMemory(create=True, size=size)
+        self.buffers: Dict[str, np.ndarray] = _attach(self._shms, specs)
+
+        ctx = mp.get_context(start_method)
+        shm_names = {key: shm.name for key, shm in self._shms.items()}
+        self._conns = []
+        self._processes = []
+        for env_idxs in np.array_split(np.arange(self.num_envs), self.num_workers):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(target=_worker, daemon=True,
+                                  args=(child_conn, env_config, shm_names, specs, env_idxs.tolist()))
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+        self.closed = False
+        self.seed(env_config.get('seed'))
+
+    @property
+    def num_agents(self) -> int:
+        return len(self.agent_ids)
+
+    def seed(self, seed: Seed = None) -> List[np.random.SeedSequence]:
+        """Seed each environment with an independent stream spawned from a single seed.
+
+        :param seed: An int, a `SeedSequence`, or None for fresh, unpredictable entropy.
+        :returns: The seed of each environment, environment `b` behaves like a `D2DEnv` seeded with `seeds[b]`.
+        """
+        seeds = spawn_seeds(seed, self.num_envs)
+        self._send_all('seed', seeds)
+        return seeds
+
+    def reset(self) -> np.ndarray:
+        """Reset every environment.
+
+        :returns: A (num_envs, num_agents, ...) array of observations.
+        """
+        self._send_all('reset')
+        return self.buffers['obs']
+
+    def step(self, actions: np.ndarray):
+        """Take a step in every environment.
+
+        :param actions: A (num_envs, num_agents) array of discrete actions, as in `D2DEnv`.
+        :returns: A tuple of (num_envs, num_agents, ...) observations, (num_envs, num_agents) rewards,
+            (num_envs,) game over flags and a dict of (num_envs, num_agents) link metrics.
+            Environments are automatically reset at the end of an episode,
+            their final observations are included in the info dict under `terminal_obs`.
+        """
+        self.buffers['actions'][:] = actions
+        self._send_all('step')
+        infos = {key: self.buffers[key] for key in INFO_DTYPES}
+        if self.buffers['game_over'].any():
+            infos['terminal_obs'] = self.buffers['terminal_obs']
+        return self.buffers['obs'], self.buffers['rewards'], self.buffers['game_over'], infos
+
+    def call(self, method: str, *args) -> list:
+        """Call a method on every environment, e.g. `save_device_config`.
+
+        :param method: The name of the `D2DEnv` method.
+        :param args: Positional arguments to pass to the method.
+        :returns: A list of each environment's return value.
+        """
+        results = {}
+        for result in self._send_all('call', (method, args)):
+            results.update(result)
+        return [results[b] for b in range(self.num_envs)]
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self._send_all('close')
+        for process in self._processes:
+            process.join()
+        self.buffers = {}
+        for shm in self._shms.values():
+            try:
+                shm.close()
+            except BufferError:
+                pass  # the caller still holds views of the buffer, it's freed once they're gone
+            shm.unlink()
+        self.closed = True
+
+    def _send_all(self, cmd: str, data=None) -> list:
+        for conn in self._conns:
+            conn.send((cmd, data))
+        results = []
+        for conn in self._conns:
+            status, result = conn.recv()
+            if status == 'error':
+                raise RuntimeError(f'Worker failed on "{cmd}":\n{result}')
+            results.append(result)
+        return results
+
+    def __del__(self):
+        if not getattr(self, 'closed', True):
+            self.close()
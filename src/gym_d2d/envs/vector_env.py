@@ -0,0 +1,199 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from gym_d2d.actions import Action, Actions
+from gym_d2d.envs.d2d_env import D2DEnv, EPISODE_LENGTH, agent_tx_rx_ids
+from gym_d2d.id import Id
+from gym_d2d.link_type import LinkType
+from gym_d2d.rng import Seed, spawn_seeds
+from gym_d2d.sinr_engine import STATE_KEYS, link_metrics
+
+
+class VectorD2DEnv:
+    """Steps a batch of independent D2D environments at once.
+
+    Each of the `num_envs` environments has its own topology, but they share a configuration,
+    so every environment has the same agents (links), published in `agent_ids`.
+    Each step, the SINRs of all environments are calculated together in a single batched array computation,
+    and observations & rewards are returned as (num_envs, num_agents, ...) arrays.
+    All environments are automatically reset after `EPISODE_LENGTH` steps.
+
+    Uses `D2DEnv` instances for topology generation, so results match separate `D2DEnv`s with the same seeds.
+    Each environment gets an independent random stream spawned from the config's `seed`, see `seed()`.
+    """
+
+    def __init__(self, num_envs: int, env_config=None) -> None:
+        super().__init__()
+        env_config = env_config or {}
+        self.num_envs = int(num_envs)
+        self.envs: List[D2DEnv] = [D2DEnv(dict(env_config)) for _ in range(self.num_envs)]
+        self.seed(env_config.get('seed'))
+        env = self.envs[0]
+        self.obs_fn = env.obs_fn
+        self.reward_fn = env.reward_fn
+        self.observation_space = env.observation_space
+        self.action_space = env.action_space
+        devices = env.simulator.devices
+
+        self._tx_rx_ids: List[Tuple[Id, Id]] = agent_tx_rx_ids(devices)
+        self.agent_ids: List[str] = [':'.join(tx_rx_id) for tx_rx_id in self._tx_rx_ids]
+        tx_types = ['due' if tx_id in devices.due_pairs else 'cue' for tx_id, _ in self._tx_rx_ids]
+        self.num_pwr_actions = np.array([env.num_pwr_actions[tx_type] for tx_type in tx_types])
+        self.link_types = np.array([
+            (LinkType.SIDELINK if tx_type == 'due' else LinkType.UPLINK).value for tx_type in tx_types])
+
+        # every environment's device registry has the same layout
+        registries = [e.simulator.devices.arrays for e in self.envs]
+        self._tx_idxs = registries[0].indices([tx_id for tx_id, _ in self._tx_rx_ids])
+        self._rx_idxs = registries[0].indices([rx_id for _, rx_id in self._tx_rx_ids])
+
+        def column(name: str, idxs: np.ndarray) -> np.ndarray:
+            return np.stack([getattr(registry, name)[idxs] for registry in registries])
+
+        self.tx_offset_dB = column('tx_offset_dB', self._tx_idxs)
+        self.rx_offset_dB = column('rx_offset_dB', self._rx_idxs)
+        self.thermal_noise_dBm = column('thermal_noise_dBm', self._rx_idxs)
+        self.noise_mW = column('noise_mW', self._rx_idxs)
+        self.rx_sensitivity_dBm = column('rx_sensitivity_dBm', self._rx_idxs)
+        self.rb_bandwidth_Hz = column('rb_bandwidth_Hz', self._tx_idxs)
+
+        num_links = len(self.agent_ids)
+        self.tx_pos = np.zeros((self.num_envs, num_links, 2))
+        self.rx_pos = np.zeros((self.num_envs, num_links, 2))
+        self.path_loss_dB = np.zeros((self.num_envs, num_links, num_links))
+        self.links = None
+        self.num_steps = 0
+
+    @property
+    def num_agents(self) -> int:
+        return len(self.agent_ids)
+
+    def seed(self, seed: Seed = None) -> List[np.random.SeedSequence]:
+        """Seed each environment with an independent stream spawned from a single seed.
+
+        :param seed: An int, a `SeedSequence`, or None for fresh, unpredictable entropy.
+        :returns: The seed of each environment, environment `b` behaves like a `D2DEnv` seeded with `seeds[b]`.
+        """
+        seeds = spawn_seeds(seed, self.num_envs)
+        for env, env_seed in zip(self.envs, seeds):
+            env.seed(env_seed)
+        return seeds
+
+    def reset(self) -> np.ndarray:
+        """Reset every environment with new topologies and random actions.
+
+        :returns: A (num_envs, num_agents, ...) array of observations.
+        """
+        self.num_steps = 0
+        rbs = np.zeros((self.num_envs, self.num_agents), dtype=int)
+        tx_pwrs_dBm = np.zeros((self.num_envs, self.num_agents))
+        for b, env in enumerate(self.envs):
+            env.simulator.reset()
+            actions = env.random_actions()
+            links = actions.link_arrays(env.simulator.devices.arrays.index)  # already ordered as `agent_ids`
+            rbs[b], tx_pwrs_dBm[b] = links.rbs, links.tx_pwrs_dBm
+            positions = env.simulator.devices.arrays.positions
+            self.tx_pos[b], self.rx_pos[b] = positions[self._tx_idxs], positions[self._rx_idxs]
+            if env.simulator.path_loss.cacheable:
+                self.path_loss_dB[b] = self._path_loss_matrix(b)
+        obs, _ = self._step(rbs, tx_pwrs_dBm)
+        return obs
+
+    def step(self, actions: np.ndarray):
+        """Take a step in every environment.
+
+        :param actions: A (num_envs, num_agents) array of discrete actions, as in `D2DEnv`,
+            or a (num_envs, num_agents, 2) array of (RB, TX power in dBm) pairs, with agents ordered as `agent_ids`.
+        :returns: A tuple of (num_envs, num_agents, ...) observations, (num_envs, num_agents) rewards,
+            (num_envs,) game over flags and a dict of (num_envs, num_agents) link metrics.
+            When the episode ends the returned observations are from the reset environments,
+            and the final observations are included in the info dict under `terminal_obs`.
+        """
+        actions = np.asarray(actions)
+        if actions.ndim == 3:
+            rbs, tx_pwrs_dBm = actions[..., 0].astype(int), actions[..., 1].astype(float)
+        elif actions.ndim == 2:
+            rbs, tx_pwrs_dBm = np.divmod(actions.astype(int), self.num_pwr_actions)
+        else:
+            raise ValueError(f'Unable to decode actions of shape {actions.shape}')
+
+        self._move()
+        obs, rewards = self._step(rbs, tx_pwrs_dBm.astype(float))
+        self.num_steps += 1
+        game_over = np.full(self.num_envs, self.num_steps >= EPISODE_LENGTH)
+        infos = {
+            'rb': self.links['rb'],
+            'tx_pwr_dbm': self.links['tx_pwr_dBm'],
+            'snr_db': self.links['snrs_db'],
+            'sinr_db': self.links['sinrs_db'],
+            'rate_bps': self.links['rate_bps'],
+            'capacity_mbps': self.links['capacity_mbps'],
+        }
+        if self.envs[0].simulator.traffic is not None:
+            # every agent's link is an uplink or sidelink, so serves its TX's buffer
+            traffic = [env.simulator.traffic.step(self._tx_idxs, self.links['capacity_mbps'][b])
+                       for b, env in enumerate(self.envs)]
+            for key in traffic[0]:
+                infos[key] = np.stack([env_traffic[key] for env_traffic in traffic])
+        if game_over.all():
+            infos['terminal_obs'] = obs
+            obs = self.reset()
+        return obs, rewards, game_over, infos
+
+    def close(self) -> None:
+        """Close every environment, stopping their cell shard workers, if any."""
+        for env in self.envs:
+            env.close()
+
+    def _move(self) -> None:
+        """Advance each environment's mobility model, refreshing the link positions & path losses that moved."""
+        for b, env in enumerate(self.envs):
+            if not len(env.simulator.move()):
+                continue
+            positions = env.simulator.devices.arrays.positions
+            self.tx_pos[b], self.rx_pos[b] = positions[self._tx_idxs], positions[self._rx_idxs]
+            if env.simulator.path_loss.cacheable:
+                self.path_loss_dB[b] = self._path_loss_matrix(b)
+
+    def _step(self, rbs: np.ndarray, tx_pwrs_dBm: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        path_loss_dB = self.path_loss_dB
+        if not self.envs[0].simulator.path_loss.cacheable:
+            path_loss_dB = np.stack([self._path_loss_matrix(b, rbs[b]) for b in range(self.num_envs)])
+        state = link_metrics(path_loss_dB, rbs, tx_pwrs_dBm + self.tx_offset_dB, self.rx_offset_dB,
+                             self.thermal_noise_dBm, self.noise_mW, self.rx_sensitivity_dBm, self.rb_bandwidth_Hz)
+        self.links = {
+            'tx_pos': self.tx_pos,
+            'rx_pos': self.rx_pos,
+            'rb': rbs,
+            'tx_pwr_dBm': tx_pwrs_dBm,
+            'link_type': np.broadcast_to(self.link_types, rbs.shape),
+            **state,
+        }
+        try:
+            obs = self.obs_fn.get_batch_state(self.links)
+        except NotImplementedError:
+            obs = np.stack([self._stack(self.obs_fn.get_state(*self._env_view(b), self.envs[b].simulator.devices))
+                            for b in range(self.num_envs)])
+        try:
+            rewards = self.reward_fn.get_batch_rewards(self.links)
+        except NotImplementedError:
+            rewards = np.stack([self._stack(self.reward_fn(*self._env_view(b))) for b in range(self.num_envs)])
+        return obs, rewards
+
+    def _path_loss_matrix(self, b: int, rbs: np.ndarray = None) -> np.ndarray:
+        mask = None if rbs is None else rbs[:, None] == rbs[None, :]
+        return self.envs[b].simulator.path_loss_cache.matrix(self._tx_idxs, self._rx_idxs, mask)
+
+    def _env_view(self, b: int) -> Tuple[Actions, Dict[str, dict]]:
+        """Build the dict-based actions & state of a single environment, for non-batched obs & reward functions."""
+        devices = self.envs[b].simulator.devices
+        actions = Actions()
+        for i, (tx_id, rx_id) in enumerate(self._tx_rx_ids):
+            actions[(tx_id, rx_id)] = Action(devices[tx_id], devices[rx_id], LinkType(int(self.link_types[i])),
+                                             int(self.links['rb'][b, i]), float(self.links['tx_pwr_dBm'][b, i]))
+        state = {key: dict(zip(self._tx_rx_ids, self.links[key][b].tolist())) for key in STATE_KEYS}
+        return actions, state
+
+    def _stack(self, agent_values: Dict[str, np.ndarray]) -> np.ndarray:
+        return np.stack([agent_values[agent_id] for agent_id in self.agent_ids])
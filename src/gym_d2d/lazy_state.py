@@ -0,0 +1,52 @@
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator
+
+
+class LazyState(MutableMapping):
+    """A dict whose values are each calculated by a factory on first access, then kept.
+
+    Factories may read other keys of the same (or another) `LazyState`,
+    so intermediate results shared by several values are only calculated once, and only if needed.
+    Values can also be set directly, e.g. to add keys, as with a dict.
+    Factories are often closures, so pickling calculates every value & pickles a plain dict instead,
+    e.g. to send a state between processes.
+
+    :param factories: Maps each key to a callable without arguments that calculates its value.
+    """
+
+    def __init__(self, factories: Dict[str, Callable[[], Any]]) -> None:
+        super().__init__()
+        self._factories: Dict[str, Callable[[], Any]] = dict(factories)
+        self._values: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._values[key]
+        except KeyError:
+            value = self._values[key] = self._factories[key]()
+            return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._factories.setdefault(key, None)
+        self._values[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._factories[key]
+        self._values.pop(key, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._factories)
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+    def __contains__(self, key) -> bool:
+        return key in self._factories
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+    def __repr__(self) -> str:
+        values = ', '.join(f'{key!r}: {self._values[key]!r}' if key in self._values else f'{key!r}: <lazy>'
+                           for key in self._factories)
+        return f'{type(self).__name__}({{{values}}})'
@@ -0,0 +1,168 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from .position import get_random_positions
+from .rng import Seed, make_rng
+
+
+class MobilityModel(ABC):
+    """Moves UEs around their cells between steps.
+
+    Models update every mobile UE's position at once with array operations.
+    The simulator only passes the UEs it places at random, CUEs & DUE TXs,
+    and moves each DUE RX with its TX, so D2D pairs stay in range of each other.
+
+    :param step_duration_s: The simulated time between steps, in seconds.
+    """
+    # whether UEs never move, so the simulator can skip the model entirely
+    static = False
+
+    def __init__(self, step_duration_s: float) -> None:
+        super().__init__()
+        self.step_duration_s = float(step_duration_s)
+        self.centres = np.zeros((0, 2))
+        self.radius_m = 0.0
+        self.seed()
+
+    def seed(self, seed: Seed = None) -> None:
+        """Seed the model's random number generator.
+
+        :param seed: An int, a `SeedSequence`, or None for fresh, unpredictable entropy.
+        """
+        self.rng: np.random.Generator = make_rng(seed)
+
+    def reset(self, positions: np.ndarray, centres: np.ndarray, radius_m: float) -> None:
+        """Called at the start of each episode, after devices are placed.
+
+        :param positions: An (M, 2) array of the initial positions of the mobile UEs.
+        :param centres: An (M, 2) array of the centre of each UE's cell.
+        :param radius_m: The radius of the cells, which UEs stay within.
+        """
+        self.centres = np.asarray(centres, dtype=float).reshape(-1, 2)
+        self.radius_m = float(radius_m)
+
+    @abstractmethod
+    def move(self, positions: np.ndarray) -> np.ndarray:
+        """Advance the mobile UEs by one step.
+
+        :param positions: An (M, 2) array of the current positions of the mobile UEs, in the order of `reset()`.
+        :returns: An (M, 2) array of their new positions.
+        """
+        pass
+
+
+class StaticMobility(MobilityModel):
+    """UEs stay where they were placed for the whole episode."""
+    static = True
+
+    def move(self, positions: np.ndarray) -> np.ndarray:
+        return positions
+
+
+class RandomWaypointMobility(MobilityModel):
+    """Each UE walks in a straight line to a random waypoint in its cell, pauses, then picks the next waypoint.
+
+    :param step_duration_s: The simulated time between steps, in seconds.
+    :param min_speed_mps: The minimum walking speed, in metres per second.
+    :param max_speed_mps: The maximum walking speed, in metres per second.
+    :param max_pause_s: The maximum time a UE pauses at each waypoint, in seconds.
+    """
+
+    def __init__(self, step_duration_s: float, min_speed_mps=0.5, max_speed_mps=1.5, max_pause_s=2.0) -> None:
+        super().__init__(step_duration_s)
+        self.min_speed_mps = float(min_speed_mps)
+        self.max_speed_mps = float(max_speed_mps)
+        self.max_pause_s = float(max_pause_s)
+        self.waypoints = np.zeros((0, 2))
+        self.speeds_mps = np.zeros(0)
+        self.pauses_s = np.zeros(0)
+
+    def reset(self, positions: np.ndarray, centres: np.ndarray, radius_m: float) -> None:
+        super().reset(positions, centres, radius_m)
+        num_ues = len(self.centres)
+        self.waypoints = np.empty((num_ues, 2))
+        self.speeds_mps = np.empty(num_ues)
+        self.pauses_s = np.zeros(num_ues)
+        self._next_waypoints(np.arange(num_ues))
+
+    def move(self, positions: np.ndarray) -> np.ndarray:
+        positions = np.array(positions, dtype=float)
+        paused = self.pauses_s > 0
+        self.pauses_s[paused] -= self.step_duration_s
+        walking = np.flatnonzero(~paused)
+        to_waypoint = self.waypoints[walking] - positions[walking]
+        dist_m = np.hypot(*to_waypoint.T)
+        step_m = self.speeds_mps[walking] * self.step_duration_s
+        arrived = dist_m <= step_m
+        fraction = np.minimum(step_m / np.maximum(dist_m, np.finfo(float).tiny), 1.0)
+        positions[walking] += to_waypoint * fraction[:, None]
+        arrivals = walking[arrived]
+        self.pauses_s[arrivals] = self.rng.uniform(0.0, self.max_pause_s, len(arrivals))
+        self._next_waypoints(arrivals)
+        return positions
+
+    def _next_waypoints(self, idxs: np.ndarray) -> None:
+        self.waypoints[idxs] = get_random_positions(self.radius_m, len(idxs), self.rng) + self.centres[idxs]
+        self.speeds_mps[idxs] = self.rng.uniform(self.min_speed_mps, self.max_speed_mps, len(idxs))
+
+
+class GaussMarkovMobility(MobilityModel):
+    """Each UE's speed & direction drift around a mean, with memory set by `alpha`.
+
+    Each step, speed & direction are updated as `s = alpha * s + (1 - alpha) * mean + sqrt(1 - alpha^2) * noise`,
+    so `alpha = 0` is a random walk and `alpha = 1` is constant velocity.
+    UEs near the edge of their cell turn their mean direction towards its centre,
+    and any step beyond the edge is pulled back onto it.
+
+    :param step_duration_s: The simulated time between steps, in seconds.
+    :param alpha: The memory of the speed & direction, in [0, 1].
+    :param mean_speed_mps: The mean speed, in metres per second.
+    :param speed_std_mps: The standard deviation of the speed noise, in metres per second.
+    :param direction_std_rad: The standard deviation of the direction noise, in radians.
+    :param edge_fraction: The fraction of the cell radius beyond which UEs head back towards the centre.
+    """
+
+    def __init__(self, step_duration_s: float, alpha=0.75, mean_speed_mps=1.0, speed_std_mps=0.2,
+                 direction_std_rad=0.4, edge_fraction=0.9) -> None:
+        super().__init__(step_duration_s)
+        if not 0.0 <= alpha <= 1.0:
+            raise ValueError(f'Invalid alpha {alpha}, expected in [0, 1].')
+        self.alpha = float(alpha)
+        self.mean_speed_mps = float(mean_speed_mps)
+        self.speed_std_mps = float(speed_std_mps)
+        self.direction_std_rad = float(direction_std_rad)
+        self.edge_fraction = float(edge_fraction)
+        self.speeds_mps = np.zeros(0)
+        self.directions_rad = np.zeros(0)
+        self.mean_directions_rad = np.zeros(0)
+
+    def reset(self, positions: np.ndarray, centres: np.ndarray, radius_m: float) -> None:
+        super().reset(positions, centres, radius_m)
+        num_ues = len(self.centres)
+        self.speeds_mps = np.full(num_ues, self.mean_speed_mps)
+        self.directions_rad = self.rng.uniform(-np.pi, np.pi, num_ues)
+        self.mean_directions_rad = self.directions_rad.copy()
+
+    def move(self, positions: np.ndarray) -> np.ndarray:
+        positions = np.asarray(positions, dtype=float)
+        num_ues = len(positions)
+        offsets = positions - self.centres
+        near_edge = np.hypot(*offsets.T) > self.edge_fraction * self.radius_m
+        self.mean_directions_rad[near_edge] = np.arctan2(-offsets[near_edge, 1], -offsets[near_edge, 0])
+
+        alpha, noise_scale = self.alpha, np.sqrt(1 - self.alpha ** 2)
+        self.speeds_mps = np.maximum(alpha * self.speeds_mps + (1 - alpha) * self.mean_speed_mps
+                                     + noise_scale * self.rng.normal(0.0, self.speed_std_mps, num_ues), 0.0)
+        # the mean direction relative to the current one, wrapped to [-pi, pi) so UEs turn the shortest way
+        to_mean_rad = (self.mean_directions_rad - self.directions_rad + np.pi) % (2 * np.pi) - np.pi
+        self.directions_rad = self.directions_rad + (1 - alpha) * to_mean_rad \
+            + noise_scale * self.rng.normal(0.0, self.direction_std_rad, num_ues)
+        step_m = self.speeds_mps * self.step_duration_s
+        offsets = offsets + step_m[:, None] * np.stack([np.cos(self.directions_rad),
+                                                        np.sin(self.directions_rad)], axis=-1)
+        # pull UEs that stepped out of their cell back onto its edge
+        dist_m = np.hypot(*offsets.T)
+        outside = dist_m > self.radius_m
+        offsets[outside] *= (self.radius_m / dist_m[outside])[:, None]
+        return self.centres + offsets
@@ -1,15 +1,40 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from enum import Enum
-from math import log10, pi
-from random import gauss
+from math import log10, pi, sqrt
+from typing import Optional, Tuple
+
+import numpy as np
 
 from .device import Device
+from .position import Position
+from .rng import Seed, make_rng
 
 
 SPEED_OF_LIGHT = 299792458  # m/s
+SHADOWING_BATCH_SIZE = 4096  # number of shadowing values drawn from the RNG at a time
+
+
+@dataclass
+class LinkGeometry:
+    """Parallel arrays describing many (TX, RX) pairs, for `PathLoss.batch_path_loss_dB()`."""
+    dist_m: np.ndarray
+    tx_pos: np.ndarray  # (P, 2)
+    rx_pos: np.ndarray  # (P, 2)
+    tx_height_m: np.ndarray
+    rx_height_m: np.ndarray
+    tx_gain_dBi: np.ndarray
+    rx_gain_dBi: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.dist_m)
 
 
 class PathLoss(ABC):
+    # whether the path loss between two devices depends only on their positions & configs,
+    # i.e. it can be memoised until one of them moves
+    cacheable = True
+
     def __init__(self, carrier_freq_GHz: float) -> None:
         super().__init__()
         self.carrier_freq_GHz = float(carrier_freq_GHz)
@@ -24,6 +49,68 @@ class PathLoss(ABC):
         """
         pass
 
+    def batch_path_loss_dB(self, links: LinkGeometry) -> np.ndarray:
+        """Calculate the path losses of many (TX, RX) pairs at once, with array operations.
+
+        Models that only implement `__call__()` raise `NotImplementedError`,
+        and callers fall back to calling them for each pair, see `supports_batch`.
+
+        :param links: The pairs' distances, positions, antenna heights & gains.
+        :return: A (P,) array of path losses in dB.
+        """
+        raise NotImplementedError
+
+    @property
+    def supports_batch(self) -> bool:
+        """Whether `batch_path_loss_dB()` is implemented consistently with `__call__()`.
+
+        Only if it's defined by the same class as `__call__()`, or a subclass of it,
+        so subclasses of built-in models that override `__call__()` alone fall back to the scalar path.
+        """
+        mro = type(self).__mro__
+        call_cls = next(cls for cls in mro if '__call__' in vars(cls))
+        batch_cls = next(cls for cls in mro if 'batch_path_loss_dB' in vars(cls))
+        return batch_cls is not PathLoss and issubclass(batch_cls, call_cls)
+
+    def seed(self, seed: Seed = None) -> None:
+        """Seed the random number generator of models that draw random values, others ignore it.
+
+        :param seed: An int, a `SeedSequence`, or None for fresh, unpredictable entropy.
+        """
+        pass
+
+    def min_path_loss_dB(self, dist_m: float) -> float:
+        """A lower bound on the path loss of any link at least `dist_m` long.
+
+        Used to bound the interference neglected when distant interferers are culled, see `NumpySinrEngine`.
+
+        :param dist_m: The minimum link distance in metres.
+        :return: The lower bound in dB, or NaN for models that can't bound it.
+        """
+        return float('nan')
+
+    def reset(self, cell_radius_m: float) -> None:
+        """Called at the start of each episode, before devices are placed, for models with per-topology state.
+
+        :param cell_radius_m: The radius of the cell devices are placed in.
+        """
+        pass
+
+    def topology_state(self) -> Optional[np.ndarray]:
+        """The per-topology state drawn by the last `reset()`, e.g. a shadowing map, for topology banks to store.
+
+        :returns: An array, or None for models without per-topology state.
+        """
+        return None
+
+    def restore_topology_state(self, cell_radius_m: float, state: np.ndarray) -> None:
+        """Reset with a state saved from `topology_state()`, rather than drawing a new one.
+
+        :param cell_radius_m: The radius of the cell devices are placed in.
+        :param state: The saved state.
+        """
+        self.reset(cell_radius_m)
+
 
 def pl_constant_dB(carrier_freq_GHz: float, ple: float) -> float:
     """Calculate the constant part of Log-Distance Path Loss equation.
@@ -62,21 +149,182 @@ class LogDistancePathLoss(PathLoss):
 
         return self._log_distance_path_loss(tx.position.distance(rx.position))
 
+    def batch_path_loss_dB(self, links: LinkGeometry) -> np.ndarray:
+        return self._log_distance_path_losses(links.dist_m)
+
     def _log_distance_path_loss(self, dist_m: float) -> float:
         return 10 * self.ple * log10(dist_m) + self.pl_constant_dB
 
+    def _log_distance_path_losses(self, dist_m: np.ndarray) -> np.ndarray:
+        with np.errstate(divide='ignore'):
+            return 10 * self.ple * np.log10(dist_m) + self.pl_constant_dB
+
+    def min_path_loss_dB(self, dist_m: float) -> float:
+        return self._log_distance_path_loss(dist_m)
+
 
 class ShadowingPathLoss(LogDistancePathLoss):
+    cacheable = False  # draws a new shadowing value every call
+
     def __init__(self, carrier_freq_GHz: float, ple=2.0, d0_m=100.0, chi_dB=2.7) -> None:
         super().__init__(carrier_freq_GHz, ple)
         self.d0_m = float(d0_m)  # shadowing close-in reference distance (metres)
         self.chi_dB = float(chi_dB)  # shadowing standard deviation (dB), typically 2.7 to 3.5
+        self.seed()
+
+    def seed(self, seed: Seed = None) -> None:
+        self.rng: np.random.Generator = make_rng(seed)
+        self._shadowing_dB = []
+
+    def __call__(self, tx: Device, rx: Device) -> float:
+        d = tx.position.distance(rx.position)
+        if d > self.d0_m:
+            ldpl = self._log_distance_path_loss(self.d0_m)
+            return ldpl + 10 * self.ple * log10(d / self.d0_m) + self._next_shadowing_dB()
+        else:
+            return self._log_distance_path_loss(d)
+
+    def batch_path_loss_dB(self, links: LinkGeometry) -> np.ndarray:
+        path_losses_dB = self._log_distance_path_losses(np.minimum(links.dist_m, self.d0_m))
+        shadowed = np.flatnonzero(links.dist_m > self.d0_m)
+        path_losses_dB[shadowed] += 10 * self.ple * np.log10(links.dist_m[shadowed] / self.d0_m) \
+            + self._next_shadowing_batch_dB(len(shadowed))
+        return path_losses_dB
+
+    def min_path_loss_dB(self, dist_m: float) -> float:
+        # shadowing is unbounded, so bound it at 3 standard deviations, beyond which it's exceeded by 0.13% of links
+        shadowed_dB = self._log_distance_path_loss(max(dist_m, self.d0_m)) - 3 * self.chi_dB
+        return min(self._log_distance_path_loss(dist_m), shadowed_dB)
+
+    def _next_shadowing_dB(self) -> float:
+        # drawing from the RNG in batches is much faster than one value per call
+        if not self._shadowing_dB:
+            self._shadowing_dB = self.rng.normal(0.0, self.chi_dB, SHADOWING_BATCH_SIZE).tolist()
+        return self._shadowing_dB.pop()
+
+    def _next_shadowing_batch_dB(self, n: int) -> np.ndarray:
+        # the same values, in the same order, as n calls of `_next_shadowing_dB()`
+        values = []
+        while len(values) < n:
+            if not self._shadowing_dB:
+                self._shadowing_dB = self.rng.normal(0.0, self.chi_dB, SHADOWING_BATCH_SIZE).tolist()
+            take = min(n - len(values), len(self._shadowing_dB))
+            values.extend(self._shadowing_dB[:-take - 1:-1])
+            del self._shadowing_dB[-take:]
+        return np.array(values, dtype=float)
+
+
+class CorrelatedShadowingPathLoss(LogDistancePathLoss):
+    """Log-distance path loss with spatially correlated shadowing that is fixed for each topology.
+
+    Each `reset()`, a zero-mean, unit variance Gaussian shadow fading map is generated over a grid covering the cell,
+    with the exponential (Gudmundson) spatial correlation `exp(-distance / decorrelation_m)`.
+    Beyond `d0_m`, a link's shadowing is `chi_dB * (map(tx) + map(rx)) / sqrt(2)`,
+    with the map bilinearly interpolated at each end, so it's symmetric & the same every lookup until a device moves,
+    making the model cacheable.
+    To change the map's parameters, configure e.g.
+    `functools.partial(CorrelatedShadowingPathLoss, decorrelation_m=20)`.
+    """
+
+    def __init__(self, carrier_freq_GHz: float, ple=2.0, d0_m=100.0, chi_dB=2.7, decorrelation_m=50.0,
+                 resolution_m=5.0, cell_radius_m=500.0) -> None:
+        super().__init__(carrier_freq_GHz, ple)
+        self.d0_m = float(d0_m)  # shadowing close-in reference distance (metres)
+        self.chi_dB = float(chi_dB)  # shadowing standard deviation (dB), typically 2.7 to 3.5
+        self.decorrelation_m = float(decorrelation_m)  # distance (metres) at which the correlation drops to 1/e
+        self.resolution_m = float(resolution_m)  # grid spacing of the shadowing map (metres)
+        self._spectrum_sqrt: Optional[np.ndarray] = None
+        self.seed()
+        self.reset(cell_radius_m)
+
+    def seed(self, seed: Seed = None) -> None:
+        self.rng: np.random.Generator = make_rng(seed)
+
+    def reset(self, cell_radius_m: float) -> None:
+        self.extent_m, size = self._grid(cell_radius_m)
+        if self._spectrum_sqrt is None or self._spectrum_sqrt.shape != (size, size):
+            self._spectrum_sqrt = self._correlation_spectrum_sqrt(size)
+        white_noise = self.rng.standard_normal((size, size))
+        self.shadowing_map = np.fft.ifft2(self._spectrum_sqrt * np.fft.fft2(white_noise)).real
+
+    def topology_state(self) -> Optional[np.ndarray]:
+        return self.shadowing_map
+
+    def restore_topology_state(self, cell_radius_m: float, state: np.ndarray) -> None:
+        extent_m, size = self._grid(cell_radius_m)
+        if state.shape != (size, size):
+            raise ValueError(f'Invalid shadowing map of shape {state.shape}, expected {(size, size)}.')
+        self.extent_m = extent_m
+        self.shadowing_map = np.array(state, dtype=float)
+
+    def _grid(self, cell_radius_m: float) -> Tuple[float, int]:
+        """The extent of the map from its centre & the number of grid points along each side."""
+        # pad the grid so the FFT's wrap around doesn't correlate opposite edges of the cell
+        extent_m = float(cell_radius_m) + 3 * self.decorrelation_m
+        return extent_m, int(np.ceil(2 * extent_m / self.resolution_m)) + 1
+
+    def _correlation_spectrum_sqrt(self, size: int) -> np.ndarray:
+        # circulant embedding: the FFT of the correlation function over the (wrapped) grid gives the filter
+        # that turns white noise into a field with that correlation
+        offsets = np.minimum(np.arange(size), size - np.arange(size)) * self.resolution_m
+        dists = np.hypot(offsets[:, None], offsets[None, :])
+        spectrum = np.fft.fft2(np.exp(-dists / self.decorrelation_m)).real
+        return np.sqrt(np.maximum(spectrum, 0.0))
+
+    def shadowing_map_at(self, positions: np.ndarray) -> np.ndarray:
+        """Look up the unit variance shadowing map at many positions at once.
+
+        :param positions: An (..., 2) array of x, y coordinates, positions off the map are clamped to its edge.
+        :return: An (...) array of map values.
+        """
+        grid = self.shadowing_map
+        coords = (np.asarray(positions, dtype=float) + self.extent_m) / self.resolution_m
+        coords = np.clip(coords, 0, grid.shape[0] - 1)
+        lower = np.minimum(np.floor(coords).astype(int), grid.shape[0] - 2)
+        frac = coords - lower
+        i, j = lower[..., 0], lower[..., 1]
+        fx, fy = frac[..., 0], frac[..., 1]
+        return (grid[i, j] * (1 - fx) * (1 - fy) + grid[i + 1, j] * fx * (1 - fy)
+                + grid[i, j + 1] * (1 - fx) * fy + grid[i + 1, j + 1] * fx * fy)
+
+    def _map_value(self, pos: Position) -> float:
+        # scalar version of `shadowing_map_at()`, avoiding the overhead of small arrays
+        grid = self.shadowing_map
+        last = grid.shape[0] - 1
+        u = min(max((pos.x + self.extent_m) / self.resolution_m, 0.0), last)
+        v = min(max((pos.y + self.extent_m) / self.resolution_m, 0.0), last)
+        i, j = min(int(u), last - 1), min(int(v), last - 1)
+        fx, fy = u - i, v - j
+        return float(grid[i, j] * (1 - fx) * (1 - fy) + grid[i + 1, j] * fx * (1 - fy)
+                     + grid[i, j + 1] * (1 - fx) * fy + grid[i + 1, j + 1] * fx * fy)
+
+    def shadowing_dB(self, tx_positions: np.ndarray, rx_positions: np.ndarray) -> np.ndarray:
+        """Calculate the shadowing of many links at once.
+
+        :param tx_positions: An (..., 2) array of the TX positions.
+        :param rx_positions: An (..., 2) array of the RX positions.
+        :return: An (...) array of shadowing values in dB.
+        """
+        return self.chi_dB * (self.shadowing_map_at(tx_positions) + self.shadowing_map_at(rx_positions)) / sqrt(2)
+
+    def min_path_loss_dB(self, dist_m: float) -> float:
+        min_shadowing_dB = min(sqrt(2) * self.chi_dB * float(self.shadowing_map.min()), 0.0)
+        shadowed_dB = self._log_distance_path_loss(max(dist_m, self.d0_m)) + min_shadowing_dB
+        return min(self._log_distance_path_loss(dist_m), shadowed_dB)
+
+    def batch_path_loss_dB(self, links: LinkGeometry) -> np.ndarray:
+        path_losses_dB = self._log_distance_path_losses(np.minimum(links.dist_m, self.d0_m))
+        shadowed = np.flatnonzero(links.dist_m > self.d0_m)
+        path_losses_dB[shadowed] += 10 * self.ple * np.log10(links.dist_m[shadowed] / self.d0_m) \
+            + self.shadowing_dB(links.tx_pos[shadowed], links.rx_pos[shadowed])
+        return path_losses_dB
 
     def __call__(self, tx: Device, rx: Device) -> float:
         d = tx.position.distance(rx.position)
         if d > self.d0_m:
             ldpl = self._log_distance_path_loss(self.d0_m)
-            return ldpl + 10 * self.ple * log10(d / self.d0_m) + gauss(0, self.chi_dB)
+            shadowing_dB = self.chi_dB * (self._map_value(tx.position) + self._map_value(rx.position)) / sqrt(2)
+            return ldpl + 10 * self.ple * log10(d / self.d0_m) + shadowing_dB
         else:
             return self._log_distance_path_loss(d)
 
@@ -91,20 +339,40 @@ class CostHataPathLoss(PathLoss):
     def __init__(self, carrier_freq_GHz: float, area_type=AreaType.SUBURBAN) -> None:
         super().__init__(carrier_freq_GHz)
         self.area_type: AreaType = area_type
+        # hoist the terms that only depend on the frequency & area out of the per-pair calculation
+        self.f_MHz = self.carrier_freq_GHz * 1000  # transmission freq (MHz)
+        # constant offset (dB), 0 for med cities & suburban, 3 for metropolitan areas
+        c = 3 if self.area_type == AreaType.URBAN else 0
+        self._constant_dB = 46.3 + 33.9 * log10(self.f_MHz) + c
+        # the antenna height terms, memoised by height since devices share a few heights
+        self._tx_height_terms = {}
+        self._ms_h_corrections = {}
 
     def __call__(self, tx: Device, rx: Device) -> float:
         """
         Lb = 46.3 + 33.9log_10(f) - 13.82log_10(h_tx) - a(h_rx,f) + (44.9 - 6.55log_10(h_tx)log_10(d) + C
         """
-        f = self.carrier_freq_GHz * 1000  # transmission freq (MHz)
         d = tx.position.distance(rx.position) / 1000  # link distance (Km)
         h_tx = tx.antenna_height_m  # TX antenna height (m)
         h_rx = rx.antenna_height_m  # RX antenna height (m)
-        a_hc = self._ms_h_correction(f, h_rx)  # MS antenna height correction factor
-        # constant offset (dB), 0 for med cities & suburban, 3 for metropolitan areas
-        c = 3 if self.area_type == AreaType.URBAN else 0
-        pl = 46.3 + 33.9 * log10(f) - 13.82 * log10(h_tx) - a_hc + (44.9 - 6.55 * log10(h_tx)) * log10(d) + c
-        return pl
+        tx_height_terms = self._tx_height_terms.get(h_tx)
+        if tx_height_terms is None:
+            tx_height_terms = self._tx_height_terms[h_tx] = (13.82 * log10(h_tx), 44.9 - 6.55 * log10(h_tx))
+        a_hc = self._ms_h_corrections.get(h_rx)  # MS antenna height correction factor
+        if a_hc is None:
+            a_hc = self._ms_h_corrections[h_rx] = self._ms_h_correction(self.f_MHz, h_rx)
+        tx_height_dB, slope_dB = tx_height_terms
+        return self._constant_dB - tx_height_dB - a_hc + slope_dB * log10(d)
+
+    def batch_path_loss_dB(self, links: LinkGeometry) -> np.ndarray:
+        # evaluate the height terms once per distinct height
+        tx_heights_m, tx_inverse = np.unique(links.tx_height_m, return_inverse=True)
+        rx_heights_m, rx_inverse = np.unique(links.rx_height_m, return_inverse=True)
+        log_h_tx = np.log10(tx_heights_m)[tx_inverse]
+        a_hc = np.array([self._ms_h_correction(self.f_MHz, h_rx) for h_rx in rx_heights_m.tolist()])[rx_inverse]
+        with np.errstate(divide='ignore'):
+            log_d = np.log10(links.dist_m / 1000)
+        return self._constant_dB - 13.82 * log_h_tx - a_hc + (44.9 - 6.55 * log_h_tx) * log_d
 
     def _ms_h_correction(self, f: float, h_rx: float) -> float:
         """RX antenna height correction factor.
@@ -0,0 +1,180 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .device import Device
+from .devices import DeviceArrays, Devices
+from .id import Id
+from .path_loss import LinkGeometry, PathLoss
+
+
+class PathLossCache:
+    """Memoises the path loss between each pair of devices in a (TX, RX) matrix.
+
+    Entries are calculated on first use and invalidated whenever either device is moved with `set_position()`
+    (or `DeviceArrays.set_positions()`) or changes config with `update_config()`,
+    so a static topology only evaluates the path loss model once per pair each `reset()`.
+    Path loss models that aren't `cacheable` are evaluated on every lookup.
+    Many missing pairs are evaluated at once with the model's `batch_path_loss_dB()` if it `supports_batch`,
+    otherwise by calling the model for each pair.
+    """
+
+    def __init__(self, path_loss: PathLoss, devices: Devices) -> None:
+        super().__init__()
+        self.path_loss: PathLoss = path_loss
+        # share the device registry's indices
+        self.arrays: DeviceArrays = devices.arrays
+        self.devices: List[Device] = devices.arrays.devices
+        self.index: Dict[Id, int] = devices.arrays.index
+        self.path_losses_dB: np.ndarray = np.full((len(self.devices), len(self.devices)), np.nan)
+        self.hits = 0  # lookups served from the cache
+        self.misses = 0  # path loss model evaluations
+        for device in self.devices:
+            device.add_position_listener(self.invalidate)
+            device.add_config_listener(self.invalidate)
+        devices.arrays.add_move_listener(self.invalidate_indices)
+
+    def __call__(self, tx: Device, rx: Device) -> float:
+        """Look up the path loss between a transmitter and a receiver, calculating it on a miss.
+
+        :param tx: The transmitting device.
+        :param rx: The receiving device.
+        :return: The path loss in dB.
+        """
+        tx_idx, rx_idx = self._index_of(tx), self._index_of(rx)
+        if tx_idx is None or rx_idx is None or not self.path_loss.cacheable:
+            self.misses += 1
+            return self.path_loss(tx, rx)
+
+        path_loss_dB = self.path_losses_dB[tx_idx, rx_idx]
+        if np.isnan(path_loss_dB):
+            self.misses += 1
+            path_loss_dB = self.path_losses_dB[tx_idx, rx_idx] = self.path_loss(tx, rx)
+        else:
+            self.hits += 1
+        return float(path_loss_dB)
+
+    def matrix(self, tx_idxs: np.ndarray, rx_idxs: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Look up the path losses between many transmitters and receivers at once.
+
+        :param tx_idxs: The cache indices of the (T,) transmitters.
+        :param rx_idxs: The cache indices of the (R,) receivers.
+        :param mask: An optional (T, R) bool array of the pairs required, others are returned as `inf`.
+        :return: A (T, R) array of path losses in dB.
+        """
+        if mask is None:
+            mask = np.ones((len(tx_idxs), len(rx_idxs)), dtype=bool)
+        if self.path_loss.cacheable:
+            path_losses_dB = self.path_losses_dB[np.ix_(tx_idxs, rx_idxs)]
+            missing = mask & np.isnan(path_losses_dB)
+        else:
+            path_losses_dB = np.full(mask.shape, np.nan)
+            missing = mask
+        missing_t, missing_r = np.nonzero(missing)
+        if len(missing_t):
+            missing_tx_idxs, missing_rx_idxs = tx_idxs[missing_t], rx_idxs[missing_r]
+            path_losses_dB[missing_t, missing_r] = missing_dB = self.evaluate(missing_tx_idxs, missing_rx_idxs)
+            if self.path_loss.cacheable:
+                self.path_losses_dB[missing_tx_idxs, missing_rx_idxs] = missing_dB
+        num_missing = len(missing_t)
+        self.misses += num_missing
+        self.hits += int(mask.sum()) - num_missing
+        return np.where(mask, path_losses_dB, np.inf)
+
+    def pairs(self, tx_idxs: np.ndarray, rx_idxs: np.ndarray) -> np.ndarray:
+        """Look up the path losses of many (transmitter, receiver) pairs at once.
+
+        Unlike `matrix()`, only the given pairs are looked up, for sparse sets of links.
+
+        :param tx_idxs: The cache indices of the (P,) transmitters.
+        :param rx_idxs: The cache indices of the (P,) receivers, pair `p` is `(tx_idxs[p], rx_idxs[p])`.
+        :return: A (P,) array of path losses in dB.
+        """
+        if self.path_loss.cacheable:
+            path_losses_dB = self.path_losses_dB[tx_idxs, rx_idxs]
+            missing = np.flatnonzero(np.isnan(path_losses_dB))
+        else:
+            path_losses_dB = np.empty(len(tx_idxs))
+            missing = np.arange(len(tx_idxs))
+        if len(missing):
+            missing_tx_idxs, missing_rx_idxs = tx_idxs[missing], rx_idxs[missing]
+            path_losses_dB[missing] = missing_dB = self.evaluate(missing_tx_idxs, missing_rx_idxs)
+            if self.path_loss.cacheable:
+                self.path_losses_dB[missing_tx_idxs, missing_rx_idxs] = missing_dB
+        self.misses += len(missing)
+        self.hits += len(tx_idxs) - len(missing)
+        return path_losses_dB
+
+    def evaluate(self, tx_idxs: np.ndarray, rx_idxs: np.ndarray) -> np.ndarray:
+        """Evaluate the path loss model for many (transmitter, receiver) pairs, bypassing the cache.
+
+        :param tx_idxs: The cache indices of the (P,) transmitters.
+        :param rx_idxs: The cache indices of the (P,) receivers.
+        :return: A (P,) array of path losses in dB.
+        """
+        if self.path_loss.supports_batch:
+            return self.path_loss.batch_path_loss_dB(self.link_geometry(tx_idxs, rx_idxs))
+        devices, path_loss = self.devices, self.path_loss
+        return np.fromiter((path_loss(devices[tx_idx], devices[rx_idx])
+                            for tx_idx, rx_idx in zip(tx_idxs.tolist(), rx_idxs.tolist())),
+                           dtype=float, count=len(tx_idxs))
+
+    def link_geometry(self, tx_idxs: np.ndarray, rx_idxs: np.ndarray) -> LinkGeometry:
+        """Gather the geometry of many (transmitter, receiver) pairs from the device registry.
+
+        :param tx_idxs: The cache indices of the (P,) transmitters.
+        :param rx_idxs: The cache indices of the (P,) receivers.
+        :return: The pairs' geometry.
+        """
+        arrays = self.arrays
+        tx_pos, rx_pos = arrays.positions[tx_idxs], arrays.positions[rx_idxs]
+        return LinkGeometry(np.hypot(*(tx_pos - rx_pos).T), tx_pos, rx_pos,
+                            arrays.antenna_height_m[tx_idxs], arrays.antenna_height_m[rx_idxs],
+                            arrays.tx_antenna_gain_dBi[tx_idxs], arrays.rx_antenna_gain_dBi[rx_idxs])
+
+    def prefill(self, tx_idxs: np.ndarray, rx_idxs: np.ndarray, path_losses_dB: np.ndarray) -> None:
+        """Store precomputed path losses, e.g. from a topology bank.
+
+        :param tx_idxs: The cache indices of the (T,) transmitters.
+        :param rx_idxs: The cache indices of the (R,) receivers.
+        :param path_losses_dB: A (T, R) array of path losses in dB.
+        """
+        self.path_losses_dB[np.ix_(tx_idxs, rx_idxs)] = path_losses_dB
+
+    def invalidate(self, device: Device) -> None:
+        """Discard the cached path losses to & from a device.
+
+        :param device: The device that moved or changed config.
+        """
+        idx = self._index_of(device)
+        if idx is not None:
+            self.path_losses_dB[idx, :] = np.nan
+            self.path_losses_dB[:, idx] = np.nan
+
+    def invalidate_indices(self, idxs: np.ndarray) -> None:
+        """Discard the cached path losses to & from many devices.
+
+        :param idxs: The cache indices of the devices that moved.
+        """
+        if len(idxs) == len(self.devices):
+            self.clear()
+        else:
+            self.path_losses_dB[idxs, :] = np.nan
+            self.path_losses_dB[:, idxs] = np.nan
+
+    def clear(self) -> None:
+        self.path_losses_dB.fill(np.nan)
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        num_lookups = self.hits + self.misses
+        return self.hits / num_lookups if num_lookups else 0.0
+
+    def _index_of(self, device: Device) -> Optional[int]:
+        idx = self.index.get(device.id)
+        # devices from outside the simulation may share an ID with one inside it
+        return idx if idx is not None and self.devices[idx] is device else None
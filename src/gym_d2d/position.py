@@ -1,6 +1,9 @@
 from dataclasses import dataclass
 from math import pi, sin, cos, sqrt
 import random
+from typing import Optional
+
+import numpy as np
 
 
 @dataclass
@@ -43,3 +46,71 @@ def get_random_position_nearby(radius: float, anchor_pos: Position, anchor_radiu
         x = anchor_pos.x + r * cos(theta)
         y = anchor_pos.y + r * sin(theta)
     return Position(x, y)
+
+
+def get_random_positions(radius: float, num_positions: int, rng: np.random.Generator) -> np.ndarray:
+    """Generate many random positions uniformly within a circle at once.
+
+    :param radius: The radius within which to generate the random positions.
+    :param num_positions: The number of positions to generate.
+    :param rng: The random number generator to draw from.
+    :return: A (num_positions, 2) array of x, y coordinates.
+    """
+    theta = 2 * np.pi * rng.random(num_positions)
+    r = radius * np.sqrt(rng.random(num_positions))
+    return np.stack([r * np.cos(theta), r * np.sin(theta)], axis=-1)
+
+
+def get_random_positions_nearby(radius: float, anchors: np.ndarray, anchor_radius: float,
+                                rng: np.random.Generator, centres: Optional[np.ndarray] = None) -> np.ndarray:
+    """Generate a random position within range of each of many anchor positions at once.
+
+    Positions falling outside `radius` are redrawn together until every position is inside it.
+
+    :param radius: The radius within which to generate the random positions.
+    :param anchors: An (N, 2) array of the positions each generated position should appear near.
+    :param anchor_radius: The maximum range each random position can be from its anchor.
+    :param rng: The random number generator to draw from.
+    :param centres: An optional (N, 2) array of the centre of the circle each position must be in,
+        the origin if omitted.
+    :return: An (N, 2) array of x, y coordinates.
+    """
+    anchors = np.asarray(anchors, dtype=float).reshape(-1, 2)
+    centres = np.zeros_like(anchors) if centres is None else np.asarray(centres, dtype=float).reshape(-1, 2)
+    positions = np.empty_like(anchors)
+    pending = np.arange(len(anchors))
+    while pending.size:
+        offsets = get_random_positions(anchor_radius, pending.size, rng)
+        candidates = anchors[pending] + offsets
+        inside = ((candidates - centres[pending]) ** 2).sum(axis=-1) <= radius ** 2
+        positions[pending[inside]] = candidates[inside]
+        pending = pending[~inside]
+    return positions
+
+
+# axial hex grid directions, in the order each ring of cells is walked
+HEX_DIRECTIONS = ((1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1))
+
+
+def hex_cell_centres(num_cells: int, cell_radius_m: float) -> np.ndarray:
+    """Lay out cells on a hexagonal grid, ring by ring around a central cell at the origin.
+
+    Neighbouring cells are `sqrt(3) * cell_radius_m` apart (the inter-site distance of hexagons with that
+    circumradius), so 7 cells fill the first ring, 19 the second, and so on.
+
+    :param num_cells: The number of cells.
+    :param cell_radius_m: The radius of each cell in metres.
+    :return: A (num_cells, 2) array of the x, y coordinates of each cell's centre.
+    """
+    axial = [(0, 0)]
+    ring = 1
+    while len(axial) < num_cells:
+        q, r = -ring, ring  # start each ring at its corner in direction (-1, 1), then walk around it
+        for dq, dr in HEX_DIRECTIONS:
+            for _ in range(ring):
+                axial.append((q, r))
+                q, r = q + dq, r + dr
+        ring += 1
+    q, r = np.array(axial[:num_cells], dtype=float).reshape(-1, 2).T
+    inter_site_distance_m = sqrt(3) * cell_radius_m
+    return np.stack([inter_site_distance_m * (q + r / 2), inter_site_distance_m * r * sqrt(3) / 2], axis=-1)
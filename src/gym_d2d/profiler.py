@@ -0,0 +1,139 @@
+from collections import defaultdict
+from contextlib import nullcontext
+import logging
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+_NULL_PHASE = nullcontext()  # reused by every phase while profiling is disabled
+
+
+class PhaseStats:
+    __slots__ = ('calls', 'total_s', 'max_s', 'alloc_blocks')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.alloc_blocks = 0  # net change in the number of memory blocks allocated by the interpreter
+
+    def as_dict(self) -> dict:
+        return {
+            'calls': self.calls,
+            'total_s': self.total_s,
+            'mean_s': self.total_s / self.calls if self.calls else 0.0,
+            'max_s': self.max_s,
+            'alloc_blocks': self.alloc_blocks,
+        }
+
+
+class _Phase:
+    __slots__ = ('stats', 'start_s', 'start_blocks')
+
+    def __init__(self, stats: PhaseStats) -> None:
+        self.stats = stats
+
+    def __enter__(self):
+        self.start_blocks = sys.getallocatedblocks()
+        self.start_s = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed_s = time.perf_counter() - self.start_s
+        stats = self.stats
+        stats.calls += 1
+        stats.total_s += elapsed_s
+        stats.max_s = max(stats.max_s, elapsed_s)
+        stats.alloc_blocks += sys.getallocatedblocks() - self.start_blocks
+
+
+class Profiler:
+    """Opt-in instrumentation of where the time goes in each step.
+
+    Records the wall time, number of calls & net memory blocks allocated by each named phase (e.g. `sinrs`, `obs_fn`),
+    plus counters of the work done (e.g. path loss evaluations).
+    Phases may be nested, each phase's time includes that of the phases inside it.
+    While disabled, `phase()` returns a shared no-op context manager & `count()` returns immediately,
+    so instrumented code pays only a method call.
+
+        with profiler.phase('sinrs'):
+            ...
+        profiler.count('path_loss_evaluations', 10)
+
+    :param enabled: Whether to record anything.
+    :param summary_every: Pass a summary to `summary_fn` every this many steps (see `tick()`), 0 to never.
+    :param summary_fn: Called with each periodic summary, logs it at INFO level by default.
+    """
+
+    def __init__(self, enabled: bool = False, summary_every: int = 0,
+                 summary_fn: Optional[Callable[[str], None]] = None) -> None:
+        super().__init__()
+        self.enabled = bool(enabled)
+        self.summary_every = int(summary_every)
+        self.summary_fn: Callable[[str], None] = summary_fn or logger.info
+        self.phases: Dict[str, PhaseStats] = defaultdict(PhaseStats)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.num_steps = 0
+
+    def phase(self, name: str):
+        """Time a block of code.
+
+        :param name: The name of the phase.
+        :returns: A context manager.
+        """
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self.phases[name])
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Increment a counter.
+
+        :param name: The name of the counter.
+        :param n: The amount to increment by.
+        """
+        if self.enabled:
+            self.counters[name] += n
+
+    def tick(self) -> None:
+        """Mark the end of a step, passing a summary to `summary_fn` every `summary_every` steps."""
+        if not self.enabled:
+            return
+        self.num_steps += 1
+        if self.summary_every > 0 and self.num_steps % self.summary_every == 0:
+            self.summary_fn(self.summary())
+
+    def stats(self) -> dict:
+        """Get everything recorded since the last `reset()`.
+
+        :returns: A dict with the number of `steps`, a dict of `phases` mapping each phase's name to its
+            `calls`, `total_s`, `mean_s`, `max_s` & `alloc_blocks`, and a dict of `counters`.
+        """
+        return {
+            'steps': self.num_steps,
+            'phases': {name: stats.as_dict() for name, stats in self.phases.items()},
+            'counters': dict(self.counters),
+        }
+
+    def summary(self) -> str:
+        """Format the recorded stats as a table, slowest phases first.
+
+        :returns: A multi-line string.
+        """
+        lines = [f'Profile after {self.num_steps} steps:',
+                 f'{"phase":<24} {"calls":>8} {"total (s)":>10} {"mean (ms)":>10} {"max (ms)":>10} {"blocks":>10}']
+        for name, stats in sorted(self.phases.items(), key=lambda item: -item[1].total_s):
+            s = stats.as_dict()
+            lines.append(f'{name:<24} {s["calls"]:>8} {s["total_s"]:>10.3f} {s["mean_s"] * 1e3:>10.3f} '
+                         f'{s["max_s"] * 1e3:>10.3f} {s["alloc_blocks"]:>10}')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'{name:<24} {value:>8}')
+        return '\n'.join(lines)
+
+    def reset(self) -> None:
+        """Discard everything recorded so far."""
+        self.phases.clear()
+        self.counters.clear()
+        self.num_steps = 0
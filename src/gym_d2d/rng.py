@@ -0,0 +1,39 @@
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+
+Seed = Optional[Union[int, Sequence[int], np.random.SeedSequence]]
+
+
+def seed_sequence(seed: Seed = None) -> np.random.SeedSequence:
+    """Wrap a seed in a `SeedSequence`, so independent child streams can be spawned from it.
+
+    Existing `SeedSequence`s are copied, since spawning from one changes the children it spawns next,
+    so seeding twice with the same seed gives the same streams.
+
+    :param seed: An int (or sequence of ints), an existing `SeedSequence`, or None for fresh, unpredictable entropy.
+    :returns: A seed sequence.
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key, pool_size=seed.pool_size)
+    return np.random.SeedSequence(seed)
+
+
+def make_rng(seed: Seed = None) -> np.random.Generator:
+    """Create a random number generator backed by the counter-based Philox bit generator.
+
+    :param seed: An int (or sequence of ints), a `SeedSequence`, or None for fresh, unpredictable entropy.
+    :returns: A NumPy random number generator.
+    """
+    return np.random.Generator(np.random.Philox(seed_sequence(seed)))
+
+
+def spawn_seeds(seed: Seed, num_children: int) -> List[np.random.SeedSequence]:
+    """Derive statistically independent seeds from a single seed, e.g. one per worker or vector env slot.
+
+    :param seed: The parent seed.
+    :param num_children: The number of child seeds.
+    :returns: A list of seed sequences.
+    """
+    return seed_sequence(seed).spawn(num_children)
@@ -1,23 +1,45 @@
 from math import log2
-from typing import Dict, Tuple
+from typing import TYPE_CHECKING, Callable, Collection, Dict, Optional, Tuple
 
-from .actions import Actions
+import numpy as np
+
+from .actions import Action, Actions, LinkArrays
+from .cell_shards import CellShards
 from .conversion import dB_to_linear, linear_to_dB
-from .device import BaseStation, UserEquipment
+from .device import BaseStation, Device, UserEquipment
+from .device_config import get_positions
 from .devices import Devices
 from .envs.env_config import EnvConfig
 from .id import Id
+from .lazy_state import LazyState
+from .link_type import LinkType
+from .mobility import MobilityModel
 from .path_loss import PathLoss
-from .position import get_random_position_nearby, get_random_position, Position
-from .traffic_model import TrafficModel
+from .path_loss_cache import PathLossCache
+from .profiler import Profiler
+from .rng import Seed, make_rng, seed_sequence
+from .position import get_random_positions, get_random_positions_nearby
+from .sinr_engine import STATE_KEYS, NumpySinrEngine, link_metrics, select_metrics
+from .traffic_model import TrafficModel, TrafficQueues
+
+if TYPE_CHECKING:
+    from .envs.reward_fn import RewardFunction
 
 
 BASE_STATION_ID = Id('mbs')
+EVALUATE_BATCH_MAX_ELEMENTS = 2 ** 22  # max elements in the (candidates, links, links) arrays of each sub-batch
+
+
+def base_station_id(cell: int) -> Id:
+    """The ID of a cell's base station, the first (central) cell's is `BASE_STATION_ID`."""
+    return BASE_STATION_ID if cell == 0 else Id(f'{BASE_STATION_ID}{cell:02d}')
 
 
 def create_devices(config: EnvConfig) -> Devices:
     """Initialise devices: BSs, CUEs & DUE pairs as per the env config.
 
+    With several cells, CUEs & DUE pairs are associated with the cells in turn.
+
     :param config: The environment's configuration.
     :returns: A dataclass containing BSs, CUEs, and DUE pairs.
     """
@@ -30,14 +52,20 @@ def create_devices(config: EnvConfig) -> Devices:
     default_due_cfg = {**base_cfg, **{'max_tx_power_dBm': config.due_max_tx_power_dBm}}
     get_config = lambda id_, default_cfg: config.devices.get(id_, {}).get('config', default_cfg)
 
-    # create macro base station
-    bs = BaseStation(Id(BASE_STATION_ID), get_config(BASE_STATION_ID, base_cfg))
+    # create a macro base station per cell
+    base_stations = {}
+    for cell in range(config.num_cells):
+        bs_id = base_station_id(cell)
+        base_stations[bs_id] = BaseStation(bs_id, get_config(bs_id, base_cfg))
+    bs_ids = list(base_stations.keys())
+    serving_bs = {}
 
     # create cellular UEs
     cues = {}
     for i in range(config.num_cues):
         cue_id = Id(f'cue{i:02d}')
         cues[cue_id] = UserEquipment(cue_id, get_config(cue_id, default_cue_cfg))
+        serving_bs[cue_id] = bs_ids[i % len(bs_ids)]
 
     # create D2D UE pairs
     dues = {}
@@ -46,8 +74,9 @@ def create_devices(config: EnvConfig) -> Devices:
         due_tx = UserEquipment(due_tx_id, get_config(due_tx_id, default_due_cfg))
         due_rx = UserEquipment(due_rx_id, get_config(due_rx_id, default_due_cfg))
         dues[(due_tx.id, due_rx.id)] = due_tx, due_rx
+        serving_bs[due_tx_id] = serving_bs[due_rx_id] = bs_ids[(i // 2) % len(bs_ids)]
 
-    return Devices(bs, cues, dues)
+    return Devices(base_stations[BASE_STATION_ID], cues, dues, base_stations, serving_bs)
 
 
 class Simulator:
@@ -57,71 +86,332 @@ class Simulator:
         self.devices: Devices = create_devices(self.config)
         self.traffic_model: TrafficModel = self.config.traffic_model(self.config.num_rbs)
         self.path_loss: PathLoss = self.config.path_loss_model(self.config.carrier_freq_GHz)
+        self.path_loss_cache = PathLossCache(self.path_loss, self.devices)
+        self.mobility: MobilityModel = self.config.mobility_model(self.config.step_duration_s)
+        self.traffic: Optional[TrafficQueues] = None
+        if self.config.arrival_model is not None:
+            # CUEs & DUE TXs generate traffic
+            source_idxs = self.devices.arrays.indices([*self.devices.cues, *self.devices.due_pairs])
+            self.traffic = TrafficQueues(self.config.arrival_model(self.config.step_duration_s),
+                                         len(self.devices.arrays), source_idxs, self.config.step_duration_s)
+        self.profiler = Profiler(self.config.profile, self.config.profile_summary_every)
+        self.shards: Optional[CellShards] = None
+        self.seed(self.config.seed)
+        self.numpy_engine = None
+        if self.config.sinr_engine == 'numpy':
+            self.numpy_engine = NumpySinrEngine(self.devices, self.path_loss_cache, self.config.interference_radius_m,
+                                                self.config.interference_threshold_dB, self.config.sinr_update)
+        self._init_placement()
+        if self.config.num_shard_workers > 0:
+            self.shards = CellShards(self, env_config, self._path_loss_seed, self.config.num_shard_workers)
+
+    def _init_placement(self) -> None:
+        """Precompute the registry indices of the devices placed by each rule in `reset()`."""
+        arrays, devices = self.devices.arrays, self.devices
+        # assume each MBS is fixed at the centre of its cell and everything else builds around them
+        positions = get_positions(self.config.devices, arrays.ids)
+        positions[arrays.indices(list(devices.base_stations))] = self.config.cell_centres
+        is_fixed = ~np.isnan(positions).any(axis=1)
+        self._fixed_idxs = np.flatnonzero(is_fixed)
+        self._fixed_positions = positions[is_fixed]
+        self._cell_centres = self.config.cell_centres[devices.cells]  # of each device's cell
+        # CUEs & DUE TXs are placed anywhere in their cell, DUE RXs near their TX
+        self._random_idxs = arrays.indices([device_id for device_id in [*devices.cues, *devices.due_pairs]
+                                            if not is_fixed[arrays.index[device_id]]])
+        due_rx_ids = [rx_id for rx_id in devices.due_pairs_inv if not is_fixed[arrays.index[rx_id]]]
+        self._nearby_idxs = arrays.indices(due_rx_ids)
+        self._nearby_anchor_idxs = arrays.indices([devices.due_pairs_inv[rx_id] for rx_id in due_rx_ids])
+
+        bank = self.config.topology_bank
+        if bank is not None:
+            if bank.ids != arrays.ids:
+                raise ValueError(f'Topology bank "{bank.path}" has different devices to the environment.')
+            self._bank_tx_idxs = arrays.indices(bank.tx_ids)
+            self._bank_rx_idxs = arrays.indices(bank.rx_ids)
+
+    def seed(self, seed: Seed = None) -> None:
+        """Seed the simulation's random number generators.
+
+        Independent streams are spawned from the seed for device placement (`rng`), the initial actions (`action_rng`),
+        the path loss, mobility & traffic arrival models,
+        so e.g. the topologies don't depend on how many path losses were evaluated.
 
-    def reset(self) -> None:
-        for device in self.devices.values():
-            if device.id == BASE_STATION_ID:
-                pos = Position(0, 0)  # assume MBS fixed at (0,0) and everything else builds around it
-            elif device.id in self.config.devices:
-                pos = Position(*self.config.devices[device.id]['position'])
-            elif any(device.id in d for d in [self.devices.cues, self.devices.due_pairs]):
-                pos = get_random_position(self.config.cell_radius_m)
-            elif device.id in self.devices.due_pairs_inv:
-                due_tx_id = self.devices.due_pairs_inv[device.id]
-                due_tx = self.devices[due_tx_id]
-                pos = get_random_position_nearby(self.config.cell_radius_m, due_tx.position, self.config.d2d_radius_m)
+        :param seed: An int, a `SeedSequence` (e.g. from `gym_d2d.rng.spawn_seeds()`),
+            or None for fresh, unpredictable entropy.
+        """
+        placement_seed, action_seed, self._path_loss_seed, mobility_seed, traffic_seed = seed_sequence(seed).spawn(5)
+        self.rng: np.random.Generator = make_rng(placement_seed)
+        self.action_rng: np.random.Generator = make_rng(action_seed)
+        self.path_loss.seed(self._path_loss_seed)
+        self.mobility.seed(mobility_seed)
+        if self.traffic is not None:
+            self.traffic.arrivals.seed(traffic_seed)
+        if self.shards is not None:
+            self.shards.seed(self._path_loss_seed)
+
+    def reset(self, scenario: Optional[int] = None) -> None:
+        """Place the devices for a new episode.
+
+        :param scenario: With a topology bank, the index of the scenario to load, otherwise a random scenario is drawn.
+        """
+        with self.profiler.phase('simulator.reset'):
+            if self.config.topology_bank is not None:
+                scenario = self._reset_from_bank(scenario)
             else:
-                raise ValueError(f'Invalid configuration for device "{device.id}".')
-            device.set_position(pos)
-
-    def step(self, actions: Actions) -> dict:
-        # self.channels = self.traffic_model.get_traffic(self.devices)
-        sinrs_db = self._calculate_sinrs(actions)
-        capacities = self._calculate_network_capacity(sinrs_db)
-
-        return {
-            'sinrs_db': sinrs_db,
-            'snrs_db': self._calculate_snrs(actions),
-            'rate_bps': self._calculate_rates(sinrs_db),
-            'capacity_mbps': capacities,
+                self._reset()
+            if self.shards is not None:
+                self.shards.reset(self.devices.arrays.positions, scenario)
+            if self.traffic is not None:
+                self.traffic.reset()
+            if not self.mobility.static:
+                mobile_idxs = self._random_idxs
+                self.mobility.reset(self.devices.arrays.positions[mobile_idxs], self._cell_centres[mobile_idxs],
+                                    self.config.cell_radius_m)
+
+    def move(self) -> np.ndarray:
+        """Advance the UEs' positions by one step of the mobility model.
+
+        The mobility model moves the UEs placed at random in `reset()` all at once, and each DUE RX moves with its TX.
+        Only the devices that actually moved are updated,
+        so the path loss cache only discards the rows & columns of those devices.
+
+        :returns: The registry indices of the devices that moved.
+        """
+        if self.mobility.static:
+            return np.empty(0, dtype=np.intp)
+        with self.profiler.phase('simulator.move'):
+            positions = self.devices.arrays.positions
+            mobile_idxs = self._random_idxs
+            displacements = np.zeros_like(positions)
+            displacements[mobile_idxs] = self.mobility.move(positions[mobile_idxs]) - positions[mobile_idxs]
+            displacements[self._nearby_idxs] = displacements[self._nearby_anchor_idxs]
+            moved_idxs = np.flatnonzero(displacements.any(axis=1))
+            new_positions = positions[moved_idxs] + displacements[moved_idxs]
+            self.devices.arrays.set_positions(new_positions, moved_idxs)
+            if self.shards is not None:
+                self.shards.move(new_positions, moved_idxs)
+            self.profiler.count('moved_devices', len(moved_idxs))
+        return moved_idxs
+
+    def _reset_from_bank(self, scenario: Optional[int]) -> int:
+        bank = self.config.topology_bank
+        if scenario is None:
+            scenario = int(self.rng.integers(len(bank)))
+        # restore the scenario's shadowing map, etc., so path losses the bank doesn't have, e.g. after devices move,
+        # are consistent with the ones it does
+        if bank.path_loss_states is not None:
+            self.path_loss.restore_topology_state(self.config.layout_radius_m, bank.path_loss_states[scenario])
+        else:
+            self.path_loss.reset(self.config.layout_radius_m)
+        self.devices.arrays.set_positions(bank.positions[scenario])
+        if bank.path_loss_dB is not None and self.path_loss.cacheable:
+            self.path_loss_cache.prefill(self._bank_tx_idxs, self._bank_rx_idxs, bank.path_loss_dB[scenario])
+        return scenario
+
+    def _reset(self) -> None:
+        radius = self.config.cell_radius_m
+        self.path_loss.reset(self.config.layout_radius_m)
+        positions = np.empty((len(self.devices.arrays), 2))
+        positions[self._fixed_idxs] = self._fixed_positions
+        positions[self._random_idxs] = get_random_positions(radius, len(self._random_idxs), self.rng) \
+            + self._cell_centres[self._random_idxs]
+        positions[self._nearby_idxs] = get_random_positions_nearby(
+            radius, positions[self._nearby_anchor_idxs], self.config.d2d_radius_m, self.rng,
+            self._cell_centres[self._nearby_idxs])
+        self.devices.arrays.set_positions(positions)
+
+    def serve(self, links: LinkArrays, capacity_mbps: np.ndarray) -> Dict[str, np.ndarray]:
+        """Add a step's traffic arrivals to the UEs' buffers & serve each link's UE at the link's capacity.
+
+        :param links: The step's links.
+        :param capacity_mbps: The (L,) capacity of each link, e.g. from the state returned by `step()`.
+        :returns: A dict of (L,) arrays of each link's `served_bits` & remaining `queue_bits`,
+            empty without an arrival model.
+        """
+        if self.traffic is None:
+            return {}
+        with self.profiler.phase('simulator.serve'):
+            ue_idxs = np.where(links.link_types == LinkType.DOWNLINK.value, links.rx_idxs, links.tx_idxs)
+            return self.traffic.step(ue_idxs, capacity_mbps)
+
+    def step(self, actions: Actions, metrics: Optional[Collection[str]] = None) -> Dict[str, dict]:
+        """Calculate the state of a step's actions.
+
+        Only the requested metrics are calculated, sharing their intermediate results,
+        e.g. SINRs & SNRs share the received signal levels, and requesting only SNRs never calculates any interference.
+        Every requested metric is calculated before returning, so the state never depends on later changes.
+
+        :param actions: The step's actions.
+        :param metrics: The `STATE_KEYS` to calculate, e.g. those declared by the obs & reward functions,
+            or None for all of them.
+        :returns: A dict mapping each requested metric to a dict of each link's value, keyed by its (TX, RX) IDs.
+        """
+        profiler = self.profiler
+        if not profiler.enabled:
+            return self._step(actions, metrics)
+
+        cache = self.path_loss_cache
+        hits, misses = cache.hits, cache.misses
+        with profiler.phase('simulator.step'):
+            state = self._step(actions, metrics)
+        profiler.count('links', len(actions))
+        profiler.count('interferer_pairs', sum(len(keys) * (len(keys) - 1)
+                                               for keys in actions.get_keys_by_rb().values()))
+        profiler.count('path_loss_lookups', cache.hits + cache.misses - hits - misses)
+        profiler.count('path_loss_evaluations', cache.misses - misses)
+        return state
+
+    def _step(self, actions: Actions, metrics: Optional[Collection[str]]) -> Dict[str, dict]:
+        profiler = self.profiler
+        if self.shards is not None:
+            with profiler.phase('cell_shards'):
+                return select_metrics(self.shards.step(actions), metrics)
+        if self.numpy_engine is not None:
+            with profiler.phase('numpy_engine'):
+                return self.numpy_engine(actions, metrics)
+
+        def phase(name: str, calculate: Callable[[], dict]) -> Callable[[], dict]:
+            def calculate_in_phase() -> dict:
+                with profiler.phase(name):
+                    return calculate()
+            return calculate_in_phase
+
+        shared = LazyState({
+            'rx_pwr_dBm': phase('rx_pwrs', lambda: {ids: self._rx_signal_level_dBm(action)
+                                                    for ids, action in actions.items()}),
+            'shannon': phase('shannon', lambda: {ids: log2(1 + dB_to_linear(sinr_db))
+                                                 for ids, sinr_db in state['sinrs_db'].items()}),
+        })
+        state = LazyState({
+            'sinrs_db': phase('sinrs', lambda: self._calculate_sinrs(actions, shared['rx_pwr_dBm'])),
+            'snrs_db': phase('snrs', lambda: self._calculate_snrs(actions, shared['rx_pwr_dBm'])),
+            'rate_bps': phase('rates', lambda: self._calculate_rates(state['sinrs_db'], shared['shannon'])),
+            'capacity_mbps': phase('capacities',
+                                   lambda: self._calculate_network_capacity(state['sinrs_db'], shared['shannon'])),
+        })
+        return select_metrics(state, metrics)
+
+    def close(self) -> None:
+        """Stop the cell shard workers, if any."""
+        if self.shards is not None:
+            self.shards.close()
+
+    def evaluate_batch(self, links: Actions, candidates: np.ndarray,
+                       reward_fn: Optional['RewardFunction'] = None) -> Dict[str, np.ndarray]:
+        """Score many candidate RB & TX power assignments of the same links against the current topology.
+
+        The path losses between the links are looked up once from the cache & reused by every candidate,
+        so the cost is dominated by the vectorised SINR calculation of `link_metrics()`.
+        Path loss models that aren't `cacheable` are evaluated once per candidate.
+        Candidates are evaluated in sub-batches to bound the memory used by the (candidates, links, links) arrays.
+
+        :param links: The (L,) links to evaluate, e.g. the last step's actions, their RBs & TX powers are ignored.
+        :param candidates: An (M, L, 2) array of (RB, TX power in dBm) pairs, with links in the order of `links`.
+        :param reward_fn: Optionally, a reward function to also score each candidate with.
+        :returns: A dict mapping each of `STATE_KEYS` to an (M, L) array,
+            and `rewards` to an (M, L) array of rewards if a reward function is given.
+        """
+        candidates = np.asarray(candidates)
+        if candidates.ndim != 3 or candidates.shape[1:] != (len(links), 2):
+            raise ValueError(f'Invalid candidates of shape {candidates.shape}, expected (M, {len(links)}, 2).')
+
+        with self.profiler.phase('simulator.evaluate_batch'):
+            arrays = self.devices.arrays
+            link_arrays = links.link_arrays(arrays.index)
+            tx_idxs, rx_idxs = link_arrays.tx_idxs, link_arrays.rx_idxs
+            cacheable = self.path_loss.cacheable
+            path_loss_dB = self.path_loss_cache.matrix(tx_idxs, rx_idxs) if cacheable else None
+            rbs, tx_pwrs_dBm = candidates[..., 0].astype(int), candidates[..., 1].astype(float)
+            batch_size = max(1, EVALUATE_BATCH_MAX_ELEMENTS // max(1, len(links) ** 2))
+            metrics = {key: np.empty(rbs.shape) for key in STATE_KEYS}
+            for start in range(0, len(candidates), batch_size):
+                batch = slice(start, start + batch_size)
+                batch_path_loss_dB = path_loss_dB
+                if not cacheable:
+                    batch_path_loss_dB = np.stack([self.path_loss_cache.matrix(tx_idxs, rx_idxs, mask=co_channel)
+                                                   for co_channel in rbs[batch, :, None] == rbs[batch, None, :]])
+                batch_metrics = link_metrics(
+                    batch_path_loss_dB,
+                    rbs[batch],
+                    tx_pwrs_dBm[batch] + arrays.tx_offset_dB[tx_idxs],
+                    arrays.rx_offset_dB[rx_idxs],
+                    arrays.thermal_noise_dBm[rx_idxs],
+                    arrays.noise_mW[rx_idxs],
+                    arrays.rx_sensitivity_dBm[rx_idxs],
+                    arrays.rb_bandwidth_Hz[tx_idxs],
+                )
+                for key in STATE_KEYS:
+                    metrics[key][batch] = batch_metrics[key]
+            self.profiler.count('candidates', len(candidates))
+            if reward_fn is not None:
+                metrics['rewards'] = self._batch_rewards(links, link_arrays, rbs, tx_pwrs_dBm, metrics, reward_fn)
+        return metrics
+
+    def _batch_rewards(self, links: Actions, link_arrays: LinkArrays, rbs: np.ndarray, tx_pwrs_dBm: np.ndarray,
+                       metrics: Dict[str, np.ndarray], reward_fn: 'RewardFunction') -> np.ndarray:
+        positions = self.devices.arrays.positions
+        batch_links = {
+            'tx_pos': np.broadcast_to(positions[link_arrays.tx_idxs], (*rbs.shape, 2)),
+            'rx_pos': np.broadcast_to(positions[link_arrays.rx_idxs], (*rbs.shape, 2)),
+            'rb': rbs,
+            'tx_pwr_dBm': tx_pwrs_dBm,
+            'link_type': np.broadcast_to(link_arrays.link_types, rbs.shape),
+            **metrics,
         }
+        try:
+            return reward_fn.get_batch_rewards(batch_links)
+        except NotImplementedError:
+            pass
+        # fall back to building each candidate's actions & state for the reward function
+        keys = list(links.keys())
+        agent_ids = [':'.join(key) for key in keys]
+        rewards = np.empty(rbs.shape)
+        for m in range(len(rbs)):
+            actions = Actions({key: Action(action.tx, action.rx, action.link_type, rb, tx_pwr_dBm)
+                               for key, action, rb, tx_pwr_dBm
+                               in zip(keys, links.values(), rbs[m].tolist(), tx_pwrs_dBm[m].tolist())})
+            state = {key: dict(zip(keys, metrics[key][m].tolist())) for key in STATE_KEYS}
+            candidate_rewards = reward_fn(actions, state)
+            rewards[m] = [candidate_rewards[agent_id] for agent_id in agent_ids]
+        return rewards
 
-    def _calculate_sinrs(self, actions: Actions) -> Dict[Tuple[Id, Id], float]:
+    def _calculate_sinrs(self, actions: Actions,
+                         rx_pwrs_dBm: Optional[Dict[Tuple[Id, Id], float]] = None) -> Dict[Tuple[Id, Id], float]:
         sinrs_db = {}
+        ix_index = actions.rx_power_by_rb(self._ix_pwr_mW)
         for (tx_id, rx_id), action in actions.items():
-            tx, rx = action.tx, action.rx
-            rx_pwr_dBm = rx.rx_signal_level_dBm(tx.eirp_dBm(action.tx_pwr_dBm), self.path_loss(tx, rx))
-
-            ix_actions = actions.get_actions_by_rb(action.rb).difference({action})
-            sum_ix_pwr_mW = 0.0
-            for ix_action in ix_actions:
-                ix_tx = ix_action.tx
-                ix_eirp_dBm = ix_tx.eirp_dBm(ix_action.tx_pwr_dBm)
-                ix_path_loss_dB = self.path_loss(ix_tx, rx)
-                sum_ix_pwr_mW += dB_to_linear(ix_eirp_dBm - ix_path_loss_dB)
-
-            # noise_mW = dB_to_linear(rx.thermal_noise_dBm)  # @todo this can be memoized
-            # ix_and_noise_mW = sum_ix_pwr_mW + noise_mW
-            # sinrs_db[(tx_id, rx_id)] = rx_pwr_dBm - linear_to_dB(ix_and_noise_mW)
+            rx_pwr_dBm = rx_pwrs_dBm[(tx_id, rx_id)] if rx_pwrs_dBm is not None else self._rx_signal_level_dBm(action)
+            sum_ix_pwr_mW = ix_index.interference_mW((tx_id, rx_id), action)
             sinrs_db[(tx_id, rx_id)] = \
-                float(rx_pwr_dBm - linear_to_dB(sum_ix_pwr_mW + dB_to_linear(rx.thermal_noise_dBm)))
+                float(rx_pwr_dBm - linear_to_dB(sum_ix_pwr_mW + action.rx.link_budget.noise_mW))
         return sinrs_db
 
-    def _calculate_snrs(self, actions: Actions) -> Dict[Tuple[Id, Id], float]:
+    def _ix_pwr_mW(self, action: Action, rx: Device) -> float:
+        ix_eirp_dBm = action.tx_pwr_dBm + action.tx.link_budget.tx_offset_dB
+        return dB_to_linear(ix_eirp_dBm - self.path_loss_cache(action.tx, rx))
+
+    def _rx_signal_level_dBm(self, action: Action) -> float:
+        tx, rx = action.tx, action.rx
+        eirp_dBm = action.tx_pwr_dBm + tx.link_budget.tx_offset_dB
+        return eirp_dBm - self.path_loss_cache(tx, rx) + rx.link_budget.rx_offset_dB
+
+    def _calculate_snrs(self, actions: Actions,
+                        rx_pwrs_dBm: Optional[Dict[Tuple[Id, Id], float]] = None) -> Dict[Tuple[Id, Id], float]:
         SNRs_dB = {}
         for ids, action in actions.items():
-            tx, rx = action.tx, action.rx
-            rx_pwr_dBm = rx.rx_signal_level_dBm(tx.eirp_dBm(action.tx_pwr_dBm), self.path_loss(tx, rx))
-            SNRs_dB[ids] = float(rx_pwr_dBm - rx.thermal_noise_dBm)
+            rx_pwr_dBm = rx_pwrs_dBm[ids] if rx_pwrs_dBm is not None else self._rx_signal_level_dBm(action)
+            SNRs_dB[ids] = float(rx_pwr_dBm - action.rx.thermal_noise_dBm)
         return SNRs_dB
 
-    def _calculate_rates(self, sinrs_db: Dict[Tuple[Id, Id], float]) -> Dict[Tuple[Id, Id], float]:
+    def _calculate_rates(self, sinrs_db: Dict[Tuple[Id, Id], float],
+                         shannon: Optional[Dict[Tuple[Id, Id], float]] = None) -> Dict[Tuple[Id, Id], float]:
         rates_bps = {}
         for (tx_id, rx_id), sinr_db in sinrs_db.items():
             _, rx = self.devices[tx_id], self.devices[rx_id]
             # max_path_loss_dB = rx.max_path_loss_dB(tx.eirp_dBm())
-            if sinr_db > rx.rx_sensitivity_dBm:
-                rates_bps[(tx_id, rx_id)] = float(log2(1 + dB_to_linear(sinr_db)))
+            if sinr_db > rx.link_budget.rx_sensitivity_dBm:
+                rates_bps[(tx_id, rx_id)] = float(shannon[(tx_id, rx_id)] if shannon is not None
+                                                  else log2(1 + dB_to_linear(sinr_db)))
             else:
                 rates_bps[(tx_id, rx_id)] = 0.0
         return rates_bps
@@ -141,14 +431,18 @@ class Simulator:
                 capacities[(tx_id, rx_id)] = 0
         return capacities
 
-    def _calculate_network_capacity(self, sinrs_db: Dict[Tuple[Id, Id], float]) -> Dict[Tuple[Id, Id], float]:
+    def _calculate_network_capacity(self, sinrs_db: Dict[Tuple[Id, Id], float],
+                                    shannon: Optional[Dict[Tuple[Id, Id], float]] = None
+                                    ) -> Dict[Tuple[Id, Id], float]:
         capacities_mbps = {}
         for (tx_id, rx_id), sinr_db in sinrs_db.items():
             tx, rx = self.devices[tx_id], self.devices[rx_id]
             # max_path_loss_dB = rx.max_path_loss_dB(tx.eirp_dBm())
-            if sinr_db > rx.rx_sensitivity_dBm:
+            if sinr_db > rx.link_budget.rx_sensitivity_dBm:
                 b = tx.rb_bandwidth_kHz * 1000
-                capacities_mbps[(tx_id, rx_id)] = float(1e-6 * b * log2(1 + dB_to_linear(sinr_db)))
+                spectral_efficiency = shannon[(tx_id, rx_id)] if shannon is not None \
+                    else log2(1 + dB_to_linear(sinr_db))
+                capacities_mbps[(tx_id, rx_id)] = float(1e-6 * b * spectral_efficiency)
             else:
                 capacities_mbps[(tx_id, rx_id)] = 0.0
         return capacities_mbps
@@ -0,0 +1,442 @@
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Collection, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .actions import Actions, LinkArrays
+from .devices import Devices
+from .lazy_state import LazyState
+from .path_loss import PathLoss
+from .path_loss_cache import PathLossCache
+
+
+STATE_KEYS = ('sinrs_db', 'snrs_db', 'rate_bps', 'capacity_mbps')
+NEGLECTED_IX_KEY = 'neglected_ix_mW'  # state key of the bound on the interference neglected by culling
+MAX_CULLING_RADIUS_M = 1e7  # beyond this, interferers are never culled
+SINR_UPDATES = ('full', 'delta', 'check')
+DELTA_SINR_MAX_CHANGED_FRACTION = 0.5  # recompute every link when more than this fraction of links change
+DELTA_SINR_CHECK_RTOL = 1e-6  # the relative tolerance of delta updates in 'check' mode
+
+
+def link_metrics(path_loss_dB: np.ndarray,
+                 rbs: np.ndarray,
+                 eirp_dBm: np.ndarray,
+                 rx_offset_dB: np.ndarray,
+                 thermal_noise_dBm: np.ndarray,
+                 noise_mW: np.ndarray,
+                 rx_sensitivity_dBm: np.ndarray,
+                 rb_bandwidth_Hz: np.ndarray,
+                 ) -> Dict[str, np.ndarray]:
+    """Calculate the SINR, SNR, rate & capacity of every link in one vectorised pass.
+
+    All arguments may carry any number of leading batch dimensions, as long as they agree.
+    Interference is received without the RX's antenna gains & losses, as in `Simulator._calculate_sinrs()`.
+
+    :param path_loss_dB: An (..., L, L) matrix where entry [j, i] is the path loss from link j's TX to link i's RX.
+        Entries for pairs on different RBs are never read and may be `inf`.
+    :param rbs: The (..., L) resource block used by each link.
+    :param eirp_dBm: The (..., L) EIRP of each link's TX.
+    :param rx_offset_dB: The (..., L) gains minus losses each link's RX adds to the received signal level.
+    :param thermal_noise_dBm: The (..., L) thermal noise of each link's RX.
+    :param noise_mW: The same thermal noise in linear scale.
+    :param rx_sensitivity_dBm: The (..., L) sensitivity of each link's RX.
+    :param rb_bandwidth_Hz: The (..., L) RB bandwidth of each link's TX.
+    :returns: A dict mapping each of `STATE_KEYS` to an (..., L) array.
+    """
+    num_links = rbs.shape[-1]
+    diag = np.arange(num_links)
+    rx_pwr_dBm = eirp_dBm - path_loss_dB[..., diag, diag] + rx_offset_dB
+
+    co_channel = rbs[..., :, None] == rbs[..., None, :]
+    co_channel[..., diag, diag] = False
+    with np.errstate(invalid='ignore'):
+        ix_pwr_mW = np.where(co_channel, np.power(10.0, (eirp_dBm[..., :, None] - path_loss_dB) / 10), 0.0)
+    sum_ix_pwr_mW = ix_pwr_mW.sum(axis=-2)
+
+    return _metrics(rx_pwr_dBm, sum_ix_pwr_mW, thermal_noise_dBm, noise_mW, rx_sensitivity_dBm, rb_bandwidth_Hz)
+
+
+def _metrics(rx_pwr_dBm: np.ndarray,
+             sum_ix_pwr_mW: np.ndarray,
+             thermal_noise_dBm: np.ndarray,
+             noise_mW: np.ndarray,
+             rx_sensitivity_dBm: np.ndarray,
+             rb_bandwidth_Hz: np.ndarray,
+             ) -> Dict[str, np.ndarray]:
+    metrics = lazy_metrics(lambda: rx_pwr_dBm, lambda: sum_ix_pwr_mW, thermal_noise_dBm, noise_mW, rx_sensitivity_dBm,
+                           rb_bandwidth_Hz)
+    return {key: metrics[key] for key in STATE_KEYS}
+
+
+def lazy_metrics(rx_pwr_dBm: Callable[[], np.ndarray],
+                 sum_ix_pwr_mW: Callable[[], np.ndarray],
+                 thermal_noise_dBm: np.ndarray,
+                 noise_mW: np.ndarray,
+                 rx_sensitivity_dBm: np.ndarray,
+                 rb_bandwidth_Hz: np.ndarray,
+                 ) -> LazyState:
+    """Link metrics as arrays that are each calculated on first access.
+
+    The received signal & interference levels are given as callables, so they're also only calculated if needed:
+    SNRs only need the received signal levels, so reading only SNRs never calculates any interference.
+    Rates & capacities share the Shannon spectral efficiency of the linear SINRs.
+
+    :param rx_pwr_dBm: Calculates the (..., L) received signal level of each link.
+    :param sum_ix_pwr_mW: Calculates the (..., L) total interference received by each link's RX.
+    :param thermal_noise_dBm: The (..., L) thermal noise of each link's RX.
+    :param noise_mW: The same thermal noise in linear scale.
+    :param rx_sensitivity_dBm: The (..., L) sensitivity of each link's RX.
+    :param rb_bandwidth_Hz: The (..., L) RB bandwidth of each link's TX.
+    :returns: A `LazyState` mapping each of `STATE_KEYS` to an (..., L) array.
+    """
+    shared = LazyState({
+        'rx_pwr_dBm': rx_pwr_dBm,
+        'sum_ix_pwr_mW': sum_ix_pwr_mW,
+        'shannon': lambda: np.log2(1 + np.power(10.0, metrics['sinrs_db'] / 10)),
+        'above_sensitivity': lambda: metrics['sinrs_db'] > rx_sensitivity_dBm,
+    })
+    metrics = LazyState({
+        'sinrs_db': lambda: shared['rx_pwr_dBm'] - 10 * np.log10(shared['sum_ix_pwr_mW'] + noise_mW),
+        'snrs_db': lambda: shared['rx_pwr_dBm'] - thermal_noise_dBm,
+        'rate_bps': lambda: np.where(shared['above_sensitivity'], shared['shannon'], 0.0),
+        'capacity_mbps': lambda: np.where(shared['above_sensitivity'], 1e-6 * rb_bandwidth_Hz * shared['shannon'],
+                                          0.0),
+    })
+    return metrics
+
+
+def select_metrics(state: Mapping[str, Any], metrics: Optional[Collection[str]] = None) -> Dict[str, Any]:
+    """Calculate the requested metrics of a (lazy) state into a plain dict.
+
+    :param state: The state, e.g. a `LazyState` from `lazy_metrics()`.
+    :param metrics: The `STATE_KEYS` to calculate, or None for all of them.
+        Keys other than `STATE_KEYS`, e.g. `NEGLECTED_IX_KEY`, are always kept.
+    :returns: A dict of the requested metrics, in the order of the state.
+    """
+    if metrics is None:
+        metrics = STATE_KEYS
+    else:
+        unknown = set(metrics).difference(STATE_KEYS)
+        if unknown:
+            raise ValueError(f'Unknown state metrics {sorted(unknown)}, expected some of {STATE_KEYS}')
+    return {key: state[key] for key in state if key in metrics or key not in STATE_KEYS}
+
+
+def _link_values(ids: List[Tuple], metrics: Mapping[str, np.ndarray], key: str) -> dict:
+    """Each link's value of a metric, keyed by its (TX, RX) IDs."""
+    return dict(zip(ids, metrics[key].tolist()))
+
+
+def co_channel_pairs_within(tx_pos: np.ndarray, rx_pos: np.ndarray, rbs: np.ndarray,
+                            radius_m: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Find the co-channel interferers within a radius of each link's receiver, with a uniform grid spatial index.
+
+    Transmitters are bucketed into (RB, grid cell) bins with cells `radius_m` wide,
+    so each receiver only checks the transmitters in the 3x3 cells around it,
+    and the cost grows with the number of links times the number of neighbours, rather than quadratically.
+
+    :param tx_pos: An (L, 2) array of each link's TX position.
+    :param rx_pos: An (L, 2) array of each link's RX position.
+    :param rbs: The (L,) resource block used by each link.
+    :param radius_m: The interference radius in metres.
+    :returns: A tuple of (P,) arrays of the interfering & interfered-with (victim) link of each pair,
+        excluding each link's own TX.
+    """
+    tx_cells = np.floor(tx_pos / radius_m).astype(np.int64)
+    rx_cells = np.floor(rx_pos / radius_m).astype(np.int64)
+    # shift the cells so neighbours of every cell are in [0, width), so bins never alias across rows or RBs
+    origin = np.minimum(tx_cells.min(axis=0, initial=0), rx_cells.min(axis=0, initial=0)) - 1
+    tx_cells -= origin
+    rx_cells -= origin
+    width = int(max(tx_cells.max(initial=0), rx_cells.max(initial=0))) + 2
+    rbs = rbs.astype(np.int64)
+    tx_bins = (rbs * width + tx_cells[:, 0]) * width + tx_cells[:, 1]
+    order = np.argsort(tx_bins, kind='stable')
+    sorted_bins = tx_bins[order]
+
+    interferers, victims = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            query_bins = (rbs * width + rx_cells[:, 0] + dx) * width + rx_cells[:, 1] + dy
+            starts = np.searchsorted(sorted_bins, query_bins, side='left')
+            counts = np.searchsorted(sorted_bins, query_bins, side='right') - starts
+            # the sorted positions starts[i], ..., starts[i] + counts[i] - 1 of every victim i, concatenated
+            firsts = np.cumsum(counts) - counts
+            positions = np.arange(counts.sum()) + np.repeat(starts - firsts, counts)
+            interferers.append(order[positions])
+            victims.append(np.repeat(np.arange(len(rbs)), counts))
+    interferers, victims = np.concatenate(interferers), np.concatenate(victims)
+    dists = np.hypot(*(tx_pos[interferers] - rx_pos[victims]).T)
+    keep = (interferers != victims) & (dists <= radius_m)
+    return interferers[keep], victims[keep]
+
+
+def culling_radius_m(path_loss: PathLoss, max_eirp_dBm: float, threshold_dBm: float) -> float:
+    """Find the distance beyond which no transmitter can interfere above a threshold.
+
+    :param path_loss: The path loss model, which must bound its path loss with `min_path_loss_dB()`.
+    :param max_eirp_dBm: The maximum EIRP of any transmitter.
+    :param threshold_dBm: The received power below which interference is neglected.
+    :returns: The radius in metres, `inf` if interferers are above the threshold at `MAX_CULLING_RADIUS_M`.
+    """
+    def is_below(dist_m: float) -> bool:
+        min_path_loss_dB = path_loss.min_path_loss_dB(dist_m)
+        if np.isnan(min_path_loss_dB):
+            raise ValueError(f'{type(path_loss).__name__} can\'t bound its path loss, '
+                             'configure an interference radius instead of a threshold.')
+        return max_eirp_dBm - min_path_loss_dB <= threshold_dBm
+
+    lo, hi = 0.0, 1.0
+    while not is_below(hi):
+        lo, hi = hi, 2 * hi
+        if hi > MAX_CULLING_RADIUS_M:
+            return float('inf')
+    # bisect to within a millimetre, the path loss bound is non-decreasing with distance
+    while hi - lo > 1e-3:
+        mid = (lo + hi) / 2
+        lo, hi = (lo, mid) if is_below(mid) else (mid, hi)
+    return hi
+
+
+@dataclass
+class DeltaSinrState:
+    """The links & interference totals of the last step, which delta SINR updates are applied to."""
+    tx_idxs: np.ndarray
+    rx_idxs: np.ndarray
+    rbs: np.ndarray
+    eirp_dBm: np.ndarray
+    rx_pwr_dBm: np.ndarray
+    # (RBs, L) entry [b, i] is the total power received at link i's RX from the other links' TXs on RB b
+    rb_ix_mW: np.ndarray
+    metrics: Dict[str, np.ndarray]
+
+
+class NumpySinrEngine:
+    """Array-backed replacement for the per-link loops in `Simulator.step()`.
+
+    Gathers device parameters from the device registry by index,
+    looks up a TXxRX path loss matrix for the co-channel links of each step from the simulator's cache,
+    then calculates only the requested metrics of every link with `lazy_metrics()`.
+    Actions must be between the simulation's devices.
+
+    Optionally, interference can be approximated by culling distant interferers, for very large cells:
+    only co-channel transmitters within `interference_radius_m` of a receiver are summed,
+    found with a grid spatial index (see `co_channel_pairs_within()`) instead of a dense path loss matrix.
+    Alternatively, `interference_threshold_dB` derives the radius each step from the highest EIRP transmitting,
+    so that no culled interferer is received above the lowest `rx_noise_floor_dBm` plus the threshold.
+    When culling, the state includes an upper bound on the neglected interference of each link under
+    `NEGLECTED_IX_KEY`, from the path loss model's `min_path_loss_dB()` (NaN if the model can't bound it).
+
+    With `sinr_update='delta'`, the interference every link's RX receives on each RB is kept between steps,
+    and when the same links are stepped again only the contributions of the TXs that changed RB or power are
+    subtracted from their old RB & added to their new one, at the cost of one row of path losses per changed TX.
+    Only links on an affected RB have their metrics recalculated.
+    Every link is recalculated instead on the first step, when the links are different to the last step's,
+    devices have moved or changed config, more than `DELTA_SINR_MAX_CHANGED_FRACTION` of the links changed,
+    or the path loss model isn't `cacheable`.
+    `sinr_update='check'` also recalculates every link each step & raises a `RuntimeError` if they differ.
+
+    :param devices: The simulation's devices.
+    :param path_loss_cache: The simulation's path loss cache.
+    :param interference_radius_m: Optionally, the radius within which to sum interferers.
+    :param interference_threshold_dB: Optionally, the level relative to the noise floor below which to cull.
+    :param sinr_update: How to update link metrics each step, one of `SINR_UPDATES`.
+    """
+
+    def __init__(self,
+                 devices: Devices,
+                 path_loss_cache: PathLossCache,
+                 interference_radius_m: Optional[float] = None,
+                 interference_threshold_dB: Optional[float] = None,
+                 sinr_update: str = 'full'
+                 ) -> None:
+        super().__init__()
+        self.devices: Devices = devices
+        self.path_loss_cache: PathLossCache = path_loss_cache
+        self.interference_radius_m = interference_radius_m
+        self.interference_threshold_dB = interference_threshold_dB
+        self.sinr_update = sinr_update
+        self.delta_state: Optional[DeltaSinrState] = None
+        self.delta_updates = 0  # steps updated from the last step's interference
+        self.full_updates = 0  # steps recalculating every link while delta updating
+        if sinr_update != 'full':
+            for device in devices.arrays.devices:
+                device.add_position_listener(self.invalidate)
+                device.add_config_listener(self.invalidate)
+            devices.arrays.add_move_listener(self.invalidate)
+
+    @property
+    def culling(self) -> bool:
+        return self.interference_radius_m is not None or self.interference_threshold_dB is not None
+
+    def __call__(self, actions: Actions, metrics: Optional[Collection[str]] = None) -> Dict[str, dict]:
+        """Calculate the state of a step's actions.
+
+        :param actions: The step's actions.
+        :param metrics: The `STATE_KEYS` to calculate, or None for all of them.
+            Without culling or delta updates, the others are skipped,
+            so e.g. interference is never calculated if only SNRs are requested.
+        :returns: A dict mapping each requested metric (and `NEGLECTED_IX_KEY` when culling)
+            to a dict of each link's value.
+        """
+        links = actions.link_arrays(self.devices.arrays.index)
+        if self.culling or self.sinr_update != 'full':
+            arrays = self.link_metrics(links)
+        else:
+            arrays = self._lazy_link_metrics(links)
+        ids = list(actions.keys())
+        return select_metrics(LazyState({key: partial(_link_values, ids, arrays, key) for key in arrays}), metrics)
+
+    def link_metrics(self, links: LinkArrays) -> Dict[str, np.ndarray]:
+        """Calculate the metrics of links given as arrays of registry indices.
+
+        :param links: The links to calculate.
+        :returns: A dict mapping each of `STATE_KEYS` (and `NEGLECTED_IX_KEY` when culling) to an array,
+            in the same order as the links.
+        """
+        if self.culling:
+            return self._culled_link_metrics(links)
+        if self.sinr_update != 'full' and self.path_loss_cache.path_loss.cacheable:
+            metrics = self._delta_link_metrics(links)
+            if self.sinr_update == 'check':
+                self._check_metrics(metrics, self._full_link_metrics(links))
+            return metrics
+        return self._full_link_metrics(links)
+
+    def _full_link_metrics(self, links: LinkArrays) -> Dict[str, np.ndarray]:
+        metrics = self._lazy_link_metrics(links)
+        return {key: metrics[key] for key in STATE_KEYS}
+
+    def _lazy_link_metrics(self, links: LinkArrays) -> LazyState:
+        arrays, cache = self.devices.arrays, self.path_loss_cache
+        tx_idxs, rx_idxs, rbs = links.tx_idxs, links.rx_idxs, links.rbs
+        eirp_dBm = links.tx_pwrs_dBm + arrays.tx_offset_dB[tx_idxs]
+
+        def sum_ix_pwr_mW() -> np.ndarray:
+            co_channel = rbs[:, None] == rbs[None, :]
+            np.fill_diagonal(co_channel, False)
+            path_loss_dB = cache.matrix(tx_idxs, rx_idxs, mask=co_channel)
+            with np.errstate(invalid='ignore'):
+                ix_pwr_mW = np.where(co_channel, np.power(10.0, (eirp_dBm[:, None] - path_loss_dB) / 10), 0.0)
+            return ix_pwr_mW.sum(axis=0)
+
+        return lazy_metrics(
+            lambda: eirp_dBm - cache.pairs(tx_idxs, rx_idxs) + arrays.rx_offset_dB[rx_idxs],
+            sum_ix_pwr_mW,
+            arrays.thermal_noise_dBm[rx_idxs],
+            arrays.noise_mW[rx_idxs],
+            arrays.rx_sensitivity_dBm[rx_idxs],
+            arrays.rb_bandwidth_Hz[tx_idxs],
+        )
+
+    def invalidate(self, *args) -> None:
+        """Discard the last step's interference, so the next step recalculates every link."""
+        self.delta_state = None
+
+    def _delta_link_metrics(self, links: LinkArrays) -> Dict[str, np.ndarray]:
+        arrays, cache = self.devices.arrays, self.path_loss_cache
+        tx_idxs, rx_idxs, rbs = links.tx_idxs, links.rx_idxs, links.rbs
+        eirp_dBm = links.tx_pwrs_dBm + arrays.tx_offset_dB[tx_idxs]
+        state = self.delta_state
+        if state is None or not np.array_equal(tx_idxs, state.tx_idxs) or not np.array_equal(rx_idxs, state.rx_idxs) \
+                or rbs.max(initial=0) >= len(state.rb_ix_mW):
+            return self._rebuild_delta_state(links, eirp_dBm)
+        changed = np.flatnonzero((rbs != state.rbs) | (eirp_dBm != state.eirp_dBm))
+        if len(changed) > DELTA_SINR_MAX_CHANGED_FRACTION * len(links):
+            return self._rebuild_delta_state(links, eirp_dBm)
+
+        self.delta_updates += 1
+        if len(changed) == 0:
+            return {key: values.copy() for key, values in state.metrics.items()}
+        # move each changed TX's contribution at every RX from its old RB & power to its new ones
+        gains = np.power(10.0, -cache.matrix(tx_idxs[changed], rx_idxs) / 10)  # (changed, L)
+        gains[np.arange(len(changed)), changed] = 0.0  # a link's own TX doesn't interfere with it
+        np.add.at(state.rb_ix_mW, state.rbs[changed], -np.power(10.0, state.eirp_dBm[changed, None] / 10) * gains)
+        np.add.at(state.rb_ix_mW, rbs[changed], np.power(10.0, eirp_dBm[changed, None] / 10) * gains)
+        state.rx_pwr_dBm[changed] = eirp_dBm[changed] - cache.pairs(tx_idxs[changed], rx_idxs[changed]) \
+            + arrays.rx_offset_dB[rx_idxs[changed]]
+        affected_rbs = np.zeros(len(state.rb_ix_mW), dtype=bool)
+        affected_rbs[state.rbs[changed]] = affected_rbs[rbs[changed]] = True
+        state.rbs, state.eirp_dBm = rbs.copy(), eirp_dBm
+
+        # only links on an RB whose interference changed need recalculating
+        affected = np.flatnonzero(affected_rbs[rbs])
+        affected_rx_idxs = rx_idxs[affected]
+        # cancelling contributions can leave a tiny negative rounding error
+        sum_ix_pwr_mW = np.maximum(state.rb_ix_mW[rbs[affected], affected], 0.0)
+        metrics = _metrics(state.rx_pwr_dBm[affected], sum_ix_pwr_mW, arrays.thermal_noise_dBm[affected_rx_idxs],
+                           arrays.noise_mW[affected_rx_idxs], arrays.rx_sensitivity_dBm[affected_rx_idxs],
+                           arrays.rb_bandwidth_Hz[tx_idxs[affected]])
+        for key, values in metrics.items():
+            state.metrics[key][affected] = values
+        return {key: values.copy() for key, values in state.metrics.items()}
+
+    def _rebuild_delta_state(self, links: LinkArrays, eirp_dBm: np.ndarray) -> Dict[str, np.ndarray]:
+        arrays = self.devices.arrays
+        tx_idxs, rx_idxs, rbs = links.tx_idxs, links.rx_idxs, links.rbs
+        self.full_updates += 1
+        # every TX's power at every RX, since changed TXs may move to any RB
+        path_loss_dB = self.path_loss_cache.matrix(tx_idxs, rx_idxs)
+        rx_pwr_mW = np.power(10.0, (eirp_dBm[:, None] - path_loss_dB) / 10)
+        np.fill_diagonal(rx_pwr_mW, 0.0)
+        rb_ix_mW = np.zeros((int(rbs.max(initial=0)) + 1, len(links)))
+        np.add.at(rb_ix_mW, rbs, rx_pwr_mW)
+        rx_pwr_dBm = eirp_dBm - np.diagonal(path_loss_dB) + arrays.rx_offset_dB[rx_idxs]
+        metrics = _metrics(rx_pwr_dBm, rb_ix_mW[rbs, np.arange(len(links))], arrays.thermal_noise_dBm[rx_idxs],
+                           arrays.noise_mW[rx_idxs], arrays.rx_sensitivity_dBm[rx_idxs],
+                           arrays.rb_bandwidth_Hz[tx_idxs])
+        self.delta_state = DeltaSinrState(tx_idxs.copy(), rx_idxs.copy(), rbs.copy(), eirp_dBm, rx_pwr_dBm,
+                                          rb_ix_mW, metrics)
+        return {key: values.copy() for key, values in metrics.items()}
+
+    @staticmethod
+    def _check_metrics(metrics: Dict[str, np.ndarray], expected: Dict[str, np.ndarray]) -> None:
+        for key, expected_values in expected.items():
+            if not np.allclose(metrics[key], expected_values, rtol=DELTA_SINR_CHECK_RTOL, atol=1e-9, equal_nan=True):
+                max_error = float(np.nanmax(np.abs(metrics[key] - expected_values)))
+                raise RuntimeError(f'Delta SINR update of "{key}" differs from recalculating every link '
+                                   f'by up to {max_error}.')
+
+    def _culled_link_metrics(self, links: LinkArrays) -> Dict[str, np.ndarray]:
+        arrays, cache = self.devices.arrays, self.path_loss_cache
+        tx_idxs, rx_idxs, rbs = links.tx_idxs, links.rx_idxs, links.rbs
+        num_links = len(links)
+        eirp_dBm = links.tx_pwrs_dBm + arrays.tx_offset_dB[tx_idxs]
+        rx_pwr_dBm = eirp_dBm - cache.pairs(tx_idxs, rx_idxs) + arrays.rx_offset_dB[rx_idxs]
+
+        radius_m = self.radius_m(float(eirp_dBm.max(initial=-np.inf)))
+        if np.isinf(radius_m):
+            interferers, victims = np.nonzero(rbs[:, None] == rbs[None, :])
+            keep = interferers != victims
+            interferers, victims = interferers[keep], victims[keep]
+        else:
+            positions = arrays.positions
+            interferers, victims = co_channel_pairs_within(positions[tx_idxs], positions[rx_idxs], rbs, radius_m)
+        ix_path_loss_dB = cache.pairs(tx_idxs[interferers], rx_idxs[victims])
+        eirp_mW = np.power(10.0, eirp_dBm / 10)
+        ix_pwr_mW = eirp_mW[interferers] * np.power(10.0, -ix_path_loss_dB / 10)
+        sum_ix_pwr_mW = np.bincount(victims, weights=ix_pwr_mW, minlength=num_links)
+
+        metrics = _metrics(rx_pwr_dBm, sum_ix_pwr_mW, arrays.thermal_noise_dBm[rx_idxs], arrays.noise_mW[rx_idxs],
+                           arrays.rx_sensitivity_dBm[rx_idxs], arrays.rb_bandwidth_Hz[tx_idxs])
+        # every culled interferer is at least `radius_m` away, so its path loss is at least the model's bound
+        rb_eirp_mW = np.bincount(rbs, weights=eirp_mW)[rbs]
+        summed_eirp_mW = np.bincount(victims, weights=eirp_mW[interferers], minlength=num_links)
+        culled_eirp_mW = np.maximum(rb_eirp_mW - eirp_mW - summed_eirp_mW, 0.0)
+        min_path_loss_dB = cache.path_loss.min_path_loss_dB(radius_m) if np.isfinite(radius_m) else np.inf
+        metrics[NEGLECTED_IX_KEY] = culled_eirp_mW * np.power(10.0, -min_path_loss_dB / 10)
+        return metrics
+
+    def radius_m(self, max_eirp_dBm: float) -> float:
+        """The radius within which interferers are summed, derived from the threshold if one is configured.
+
+        :param max_eirp_dBm: The maximum EIRP of the step's transmitters.
+        :returns: The radius in metres.
+        """
+        if self.interference_threshold_dB is None:
+            return float(self.interference_radius_m)
+        arrays = self.devices.arrays
+        noise_floor_dBm = float(np.min(arrays.thermal_noise_dBm + arrays.noise_figure_dB))
+        return culling_radius_m(self.path_loss_cache.path_loss, max_eirp_dBm,
+                                noise_floor_dBm + self.interference_threshold_dB)
@@ -0,0 +1,142 @@
+import json
+from pathlib import Path
+import struct
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from .id import Id
+from .rng import Seed
+
+
+MAGIC = b'GYMD2DTB'
+VERSION = 1
+ALIGNMENT = 64  # byte alignment of each array in the file
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class TopologyBank:
+    """A read-only bank of precomputed scenarios (topologies), memory-mapped from a single binary file.
+
+    Each scenario holds the position of every device and, for cacheable path loss models,
+    the path loss from every TX (CUEs & DUE TXs) to every RX (the MBS & DUE RXs).
+    For path loss models with per-topology state, such as the shadowing map of `CorrelatedShadowingPathLoss`,
+    each scenario also holds that state, so path losses evaluated later, e.g. after devices move, are consistent.
+    Device IDs & configs are shared by every scenario.
+    The arrays are memory-mapped, so many processes can open the same bank & share its pages without copying.
+
+    File layout: the magic bytes `GYMD2DTB`, a little-endian uint64 header length, a JSON header,
+    then each array in C order, aligned to 64 bytes at the offset recorded in the header.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        super().__init__()
+        self.path = Path(path)
+        with self.path.open(mode='rb') as fid:
+            if fid.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'"{self.path}" is not a topology bank.')
+            header_len, = struct.unpack('<Q', fid.read(8))
+            header = json.loads(fid.read(header_len).decode('utf-8'))
+        if header['version'] != VERSION:
+            raise ValueError(f'Unsupported topology bank version {header["version"]}, expected {VERSION}.')
+        self.ids: List[Id] = [Id(device_id) for device_id in header['ids']]
+        self.tx_ids: List[Id] = [Id(device_id) for device_id in header['tx_ids']]
+        self.rx_ids: List[Id] = [Id(device_id) for device_id in header['rx_ids']]
+        self.device_configs: Dict[Id, dict] = {Id(device_id): config
+                                               for device_id, config in header['device_configs'].items()}
+        self.metadata: dict = header['metadata']
+        arrays = {name: np.memmap(self.path, dtype=np.dtype(spec['dtype']), mode='r', offset=spec['offset'],
+                                  shape=tuple(spec['shape']))
+                  for name, spec in header['arrays'].items()}
+        self.positions: np.ndarray = arrays['positions']
+        self.path_loss_dB: Optional[np.ndarray] = arrays.get('path_loss_dB')
+        self.path_loss_states: Optional[np.ndarray] = arrays.get('path_loss_states')
+
+    def __len__(self) -> int:
+        return self.positions.shape[0]
+
+    @classmethod
+    def build(cls, path: Union[str, Path], env_config: dict, num_scenarios: int, seed: Seed = None,
+              dtype=np.float32) -> 'TopologyBank':
+        """Generate scenarios with a simulator & save them as a topology bank.
+
+        :param path: The filepath to save to.
+        :param env_config: The environment config of the simulator generating the scenarios.
+        :param num_scenarios: The number of scenarios to generate.
+        :param seed: Seeds the simulator, see `Simulator.seed()`, otherwise the env config's `seed` is used.
+        :param dtype: The dtype to store path losses with.
+        :returns: The saved topology bank.
+        """
+        # import the envs first, to resolve the simulator -> envs -> simulator import cycle
+        from .envs import D2DEnv  # noqa: F401
+        from .simulator import Simulator
+
+        if num_scenarios < 1:
+            raise ValueError(f'Invalid number of scenarios {num_scenarios}, expected >= 1.')
+        simulator = Simulator(dict(env_config))
+        if seed is not None:
+            simulator.seed(seed)
+        devices = simulator.devices
+        tx_ids = [*devices.cues, *devices.due_pairs]
+        rx_ids = [*devices.base_stations, *devices.due_pairs_inv]
+        # the first scenario's reset, so the shape of any path loss state is known
+        simulator.reset()
+        path_loss_state = simulator.path_loss.topology_state()
+        specs = {'positions': ((num_scenarios, len(devices), 2), np.dtype(np.float64))}
+        if simulator.path_loss.cacheable:
+            specs['path_loss_dB'] = ((num_scenarios, len(tx_ids), len(rx_ids)), np.dtype(dtype))
+        if path_loss_state is not None:
+            specs['path_loss_states'] = ((num_scenarios, *path_loss_state.shape), np.dtype(dtype))
+        header = {
+            'version': VERSION,
+            'ids': list(devices.arrays.ids),
+            'tx_ids': tx_ids,
+            'rx_ids': rx_ids,
+            'device_configs': {device.id: device.config for device in devices.values()},
+            'metadata': {
+                'path_loss_model': getattr(simulator.config.path_loss_model, '__name__', None),
+                'carrier_freq_GHz': simulator.config.carrier_freq_GHz,
+                'cell_radius_m': simulator.config.cell_radius_m,
+                'num_cells': simulator.config.num_cells,
+                'd2d_radius_m': simulator.config.d2d_radius_m,
+            },
+            'arrays': {},
+        }
+        # the arrays start after the header, whose length depends on their offsets, so repeat until they agree
+        data_offset = 0
+        while True:
+            offset = data_offset
+            for name, (shape, array_dtype) in specs.items():
+                header['arrays'][name] = {'dtype': array_dtype.str, 'shape': list(shape), 'offset': offset}
+                offset = _align(offset + int(np.prod(shape)) * array_dtype.itemsize)
+            header_bytes = json.dumps(header).encode('utf-8')
+            min_data_offset = _align(len(MAGIC) + 8 + len(header_bytes))
+            if data_offset >= min_data_offset:
+                break
+            data_offset = min_data_offset
+
+        path = Path(path)
+        with path.open(mode='wb') as fid:
+            fid.write(MAGIC)
+            fid.write(struct.pack('<Q', len(header_bytes)))
+            fid.write(header_bytes)
+            fid.truncate(max(offset, fid.tell()))
+        arrays = {name: np.memmap(path, dtype=spec['dtype'], mode='r+', offset=spec['offset'],
+                                  shape=tuple(spec['shape']))
+                  for name, spec in header['arrays'].items()}
+        tx_idxs, rx_idxs = devices.arrays.indices(tx_ids), devices.arrays.indices(rx_ids)
+        for scenario in range(num_scenarios):
+            if scenario > 0:
+                simulator.reset()
+            arrays['positions'][scenario] = devices.arrays.positions
+            if 'path_loss_dB' in arrays:
+                arrays['path_loss_dB'][scenario] = simulator.path_loss_cache.matrix(tx_idxs, rx_idxs)
+            if 'path_loss_states' in arrays:
+                arrays['path_loss_states'][scenario] = simulator.path_loss.topology_state()
+        for array in arrays.values():
+            array.flush()
+        del arrays
+        return cls(path)
@@ -1,6 +1,12 @@
-from gym_d2d.actions import Actions, Action
+from abc import ABC, abstractmethod
+from typing import Dict, Sequence
+
+import numpy as np
+
+from gym_d2d.actions import Actions, Action, LinkArrays
 from .devices import Devices
 from .link_type import LinkType
+from .rng import Seed, make_rng
 
 
 class TrafficModel:
@@ -9,24 +15,207 @@ class TrafficModel:
         self.num_rbs: int = num_rbs
 
     def get_traffic(self, devices: Devices) -> Actions:
-        pass
-
+        """Generate the automated traffic's actions.
 
-class UplinkTrafficModel(TrafficModel):
-    def get_traffic(self, devices: Devices) -> Actions:
-        rb = 0
+        :param devices: The devices in the simulation.
+        :returns: The actions, in the order of `get_traffic_arrays()`.
+        """
+        links = self.get_traffic_arrays(devices)
+        arrays = devices.arrays
         traffic = Actions()
-        for cue_id, cue in devices.cues.items():
-            traffic[(cue_id, devices.bs.id)] = Action(cue, devices.bs, LinkType.UPLINK, rb, cue.max_tx_power_dBm)
-            rb = (rb + 1) % self.num_rbs
+        for tx_idx, rx_idx, rb, tx_pwr_dBm, link_type in zip(
+                links.tx_idxs.tolist(), links.rx_idxs.tolist(), links.rbs.tolist(), links.tx_pwrs_dBm.tolist(),
+                links.link_types.tolist()):
+            tx, rx = arrays.devices[tx_idx], arrays.devices[rx_idx]
+            traffic[(tx.id, rx.id)] = Action(tx, rx, LinkType(link_type), rb, tx_pwr_dBm)
         return traffic
 
+    def get_traffic_arrays(self, devices: Devices) -> LinkArrays:
+        """Generate the automated traffic's links as arrays of registry indices, without creating `Action`s.
+
+        :param devices: The devices in the simulation.
+        :returns: The links.
+        """
+        raise NotImplementedError
+
+
+class UplinkTrafficModel(TrafficModel):
+    def get_traffic_arrays(self, devices: Devices) -> LinkArrays:
+        cue_idxs = devices.arrays.indices(list(devices.cues))
+        bs_idxs = devices.arrays.indices([devices.serving_bs[cue_id] for cue_id in devices.cues])
+        return _round_robin_links(devices, cue_idxs, bs_idxs, cue_idxs, LinkType.UPLINK, self.num_rbs)
+
 
 class DownlinkTrafficModel(TrafficModel):
-    def get_traffic(self, devices: Devices) -> Actions:
-        rb = 0
-        traffic = Actions()
-        for cue_id, cue in devices.cues.items():
-            traffic[(devices.bs.id, cue_id)] = Action(devices.bs, cue, LinkType.DOWNLINK, rb, cue.max_tx_power_dBm)
-            rb = (rb + 1) % self.num_rbs
-        return traffic
+    def get_traffic_arrays(self, devices: Devices) -> LinkArrays:
+        cue_idxs = devices.arrays.indices(list(devices.cues))
+        bs_idxs = devices.arrays.indices([devices.serving_bs[cue_id] for cue_id in devices.cues])
+        return _round_robin_links(devices, bs_idxs, cue_idxs, cue_idxs, LinkType.DOWNLINK, self.num_rbs)
+
+
+def _round_robin_links(devices: Devices, tx_idxs: np.ndarray, rx_idxs: np.ndarray, pwr_idxs: np.ndarray,
+                       link_type: LinkType, num_rbs: int) -> LinkArrays:
+    """Links assigned to the RBs in turn, at the max TX power of the devices `pwr_idxs`."""
+    num_links = len(tx_idxs)
+    return LinkArrays(tx_idxs, rx_idxs, np.arange(num_links) % num_rbs,
+                      devices.arrays.max_tx_power_dBm[pwr_idxs], np.full(num_links, link_type.value, dtype=np.int8))
+
+
+class ArrivalModel(ABC):
+    """Generates the traffic arriving in UEs' buffers each step, for every UE at once.
+
+    :param step_duration_s: The simulated time between steps, in seconds.
+    """
+
+    def __init__(self, step_duration_s: float) -> None:
+        super().__init__()
+        self.step_duration_s = float(step_duration_s)
+        self.seed()
+
+    def seed(self, seed: Seed = None) -> None:
+        """Seed the model's random number generator.
+
+        :param seed: An int, a `SeedSequence`, or None for fresh, unpredictable entropy.
+        """
+        self.rng: np.random.Generator = make_rng(seed)
+
+    def reset(self, num_ues: int) -> None:
+        """Called at the start of each episode, for models with per-UE state.
+
+        :param num_ues: The number of UEs generating traffic.
+        """
+        pass
+
+    @abstractmethod
+    def arrivals_bits(self, queue_bits: np.ndarray) -> np.ndarray:
+        """Draw the traffic arriving at each UE during a step.
+
+        :param queue_bits: The (U,) bits buffered at each UE before the arrivals.
+        :returns: A (U,) array of the bits arriving at each UE.
+        """
+        pass
+
+
+class FullBufferArrivals(ArrivalModel):
+    """Every UE always has more data to send than it can, so it's only limited by its link capacity."""
+
+    def arrivals_bits(self, queue_bits: np.ndarray) -> np.ndarray:
+        return np.full(len(queue_bits), np.inf)
+
+
+class PoissonArrivals(ArrivalModel):
+    """Fixed size packets arrive at each UE as a Poisson process.
+
+    :param step_duration_s: The simulated time between steps, in seconds.
+    :param packet_rate_hz: The mean number of packets arriving per second.
+    :param packet_size_bits: The size of each packet.
+    """
+
+    def __init__(self, step_duration_s: float, packet_rate_hz=100.0, packet_size_bits=12000) -> None:
+        super().__init__(step_duration_s)
+        self.packet_rate_hz = float(packet_rate_hz)
+        self.packet_size_bits = float(packet_size_bits)
+
+    def arrivals_bits(self, queue_bits: np.ndarray) -> np.ndarray:
+        num_packets = self.rng.poisson(self.packet_rate_hz * self.step_duration_s, len(queue_bits))
+        return num_packets * self.packet_size_bits
+
+
+class FtpArrivals(ArrivalModel):
+    """Each UE downloads a file, reads it for an exponentially distributed time, then downloads the next.
+
+    Like the 3GPP FTP traffic model 2, a UE's next file only arrives once its buffer has emptied
+    and its reading time has passed.
+
+    :param step_duration_s: The simulated time between steps, in seconds.
+    :param file_size_bits: The size of each file, 0.5 MB by default.
+    :param mean_reading_time_s: The mean time between emptying the buffer & the next file arriving.
+    """
+
+    def __init__(self, step_duration_s: float, file_size_bits=4e6, mean_reading_time_s=5.0) -> None:
+        super().__init__(step_duration_s)
+        self.file_size_bits = float(file_size_bits)
+        self.mean_reading_time_s = float(mean_reading_time_s)
+        self.reading_times_s = np.zeros(0)
+
+    def reset(self, num_ues: int) -> None:
+        # stagger the first files
+        self.reading_times_s = self.rng.exponential(self.mean_reading_time_s, num_ues)
+
+    def arrivals_bits(self, queue_bits: np.ndarray) -> np.ndarray:
+        idle = queue_bits <= 0
+        self.reading_times_s[idle] -= self.step_duration_s
+        new_files = idle & (self.reading_times_s <= 0)
+        self.reading_times_s[new_files] = self.rng.exponential(self.mean_reading_time_s, int(new_files.sum()))
+        return np.where(new_files, self.file_size_bits, 0.0)
+
+
+class TrafficQueues:
+    """The traffic buffered at every UE, held as arrays indexed by device registry index.
+
+    Each step, traffic arrives at the source UEs from the arrival model,
+    then each link serves its UE's buffer at up to its capacity for the step's duration.
+    A link serves the buffer of its transmitting UE, or its receiving UE for downlinks.
+    Every UE should be served by at most one link each step.
+    Per-UE totals of the bits that arrived & were served are kept, so throughput & queueing delays can be derived.
+
+    :param arrivals: The arrival model.
+    :param num_devices: The number of devices in the registry.
+    :param source_idxs: The registry indices of the UEs generating traffic.
+    :param step_duration_s: The simulated time between steps, in seconds.
+    """
+
+    def __init__(self, arrivals: ArrivalModel, num_devices: int, source_idxs: Sequence[int],
+                 step_duration_s: float) -> None:
+        super().__init__()
+        self.arrivals = arrivals
+        self.source_idxs = np.asarray(source_idxs, dtype=np.intp)
+        self.step_duration_s = float(step_duration_s)
+        self.queue_bits = np.zeros(num_devices)
+        self.arrived_bits = np.zeros(num_devices)  # totals this episode
+        self.served_bits = np.zeros(num_devices)
+        self.summed_queue_bits = np.zeros(num_devices)  # the sum of the backlogs after each step, for the mean
+        self.num_steps = 0
+
+    def reset(self) -> None:
+        """Empty every buffer for a new episode."""
+        self.queue_bits.fill(0.0)
+        self.arrived_bits.fill(0.0)
+        self.served_bits.fill(0.0)
+        self.summed_queue_bits.fill(0.0)
+        self.num_steps = 0
+        self.arrivals.reset(len(self.source_idxs))
+
+    def step(self, ue_idxs: np.ndarray, capacity_mbps: np.ndarray) -> Dict[str, np.ndarray]:
+        """Add a step's arrivals & serve each link's buffer.
+
+        :param ue_idxs: The registry index of the (L,) UE whose buffer each link serves.
+        :param capacity_mbps: The (L,) capacity of each link.
+        :returns: A dict of (L,) arrays of each link's bits served this step (`served_bits`)
+            and bits still buffered afterwards (`queue_bits`).
+        """
+        sources = self.source_idxs
+        arrived_bits = self.arrivals.arrivals_bits(self.queue_bits[sources])
+        self.queue_bits[sources] += arrived_bits
+        self.arrived_bits[sources] += arrived_bits
+
+        served_bits = np.minimum(self.queue_bits[ue_idxs], capacity_mbps * 1e6 * self.step_duration_s)
+        self.queue_bits[ue_idxs] -= served_bits
+        self.served_bits[ue_idxs] += served_bits
+        self.summed_queue_bits += self.queue_bits
+        self.num_steps += 1
+        return {'served_bits': served_bits, 'queue_bits': self.queue_bits[ue_idxs]}
+
+    def throughput_bps(self) -> np.ndarray:
+        """The mean rate each UE's buffer has been served at this episode."""
+        return self.served_bits / self._elapsed_s()
+
+    def mean_delay_s(self) -> np.ndarray:
+        """Each UE's mean queueing delay this episode by Little's law, its mean backlog divided by its arrival rate."""
+        arrival_rate_bps = self.arrived_bits / self._elapsed_s()
+        mean_queue_bits = self.summed_queue_bits / max(self.num_steps, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(arrival_rate_bps > 0, mean_queue_bits / arrival_rate_bps, 0.0)
+
+    def _elapsed_s(self) -> float:
+        return max(self.num_steps, 1) * self.step_duration_s
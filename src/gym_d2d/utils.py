@@ -37,12 +37,13 @@ def plot_devices(env, out_file: str = ''):
         due_rx_ys.append(due_rx.position.y)
     fig = plt.figure()
     ax = fig.add_subplot(111)
-    mbs_pos = env.simulator.devices.bs.position
-    ax.add_artist(plt.Circle(mbs_pos.as_tuple(), env.simulator.config.cell_radius_m, color='b', alpha=0.1))
+    mbs_positions = [bs.position for bs in env.simulator.devices.base_stations.values()]
+    for mbs_pos in mbs_positions:
+        ax.add_artist(plt.Circle(mbs_pos.as_tuple(), env.simulator.config.cell_radius_m, color='b', alpha=0.1))
     ax.scatter(due_tx_xs, due_tx_ys, c='r', label='DUE_TX')
     ax.scatter(due_rx_xs, due_rx_ys, c='m', label='DUE_RX')
     ax.scatter(cue_xs, cue_ys, c='b', label='CUE')
-    ax.scatter(mbs_pos.x, mbs_pos.y, c='k', label='MBS')
+    ax.scatter([pos.x for pos in mbs_positions], [pos.y for pos in mbs_positions], c='k', label='MBS')
     ax.legend()
     if out_file:
         plt.savefig(out_file)
@@ -46,3 +46,40 @@ def test_get_actions_by_rb_after_clear(actions):
     assert actions.get_actions_by_rb(0) == {test_action}
     assert actions.get_actions_by_rb(1) == set()
     assert actions.get_actions_by_rb(2) == set()
+
+
+def test_link_arrays(actions):
+    index = {'due00': 0, 'due01': 1, 'due02': 2, 'due03': 3, 'cue': 4, 'bs': 5}
+    links = actions.link_arrays(index)
+    assert len(links) == 3
+    assert list(links.tx_idxs) == [0, 2, 4]
+    assert list(links.rx_idxs) == [1, 3, 5]
+    assert list(links.rbs) == [0, 1, 0]
+    assert list(links.tx_pwrs_dBm) == [17, 15, 23]
+    assert list(links.link_types) == [LinkType.SIDELINK.value, LinkType.SIDELINK.value, LinkType.UPLINK.value]
+
+
+def test_get_actions_by_rb_after_mutation(actions):
+    # ensure the RB grouping tracks actions set or deleted after it was built
+    _ = actions.get_actions_by_rb(0)
+    moved = Action(UserEquipment('due02'), UserEquipment('due03'), LinkType.SIDELINK, 0, 15)
+    actions[('due02', 'due03')] = moved
+    assert actions.get_actions_by_rb(0) == {actions[('due00', 'due01')], actions[('cue', 'bs')], moved}
+    assert actions.get_actions_by_rb(1) == set()
+    del actions[('cue', 'bs')]
+    assert actions.get_actions_by_rb(0) == {actions[('due00', 'due01')], moved}
+
+
+def test_rb_totals(actions):
+    totals = actions.rb_totals({('due00', 'due01'): 1.0, ('due02', 'due03'): 2.0, ('cue', 'bs'): 4.0})
+    assert totals[0] == 5.0
+    assert totals[1] == 2.0
+    assert totals[2] == 0.0
+
+
+def test_rx_power_by_rb(actions):
+    # each link's interference is the power received by its RX from every other co-channel TX
+    index = actions.rx_power_by_rb(lambda action, rx: 10.0 if action.rx is rx else 1.0)
+    assert index.interference_mW(('due00', 'due01'), actions[('due00', 'due01')]) == 1.0
+    assert index.interference_mW(('cue', 'bs'), actions[('cue', 'bs')]) == 1.0
+    assert index.interference_mW(('due02', 'due03'), actions[('due02', 'due03')]) == 0.0
@@ -0,0 +1,126 @@
+import json
+import pickle
+import random
+
+import numpy as np
+import pytest
+from pytest import approx
+
+from gym_d2d.envs import D2DEnv
+from gym_d2d.envs.reward_fn import CueSinrShannonRewardFunction, RewardFunction, SystemCapacityRewardFunction
+from gym_d2d import simulator
+from gym_d2d.mobility import RandomWaypointMobility
+from gym_d2d.sinr_engine import STATE_KEYS
+
+
+ENV_CONFIG = {'num_rbs': 4, 'num_cues': 5, 'num_due_pairs': 5}
+
+
+def test_agent_ids():
+    env = D2DEnv(dict(ENV_CONFIG))
+    assert env.agent_ids == [':'.join(tx_rx_id) for tx_rx_id in env.random_actions().keys()]
+
+
+def test_step_arrays_matches_step():
+    random.seed(1)
+    env = D2DEnv(dict(ENV_CONFIG))
+    env.reset()
+    positions = [device.position for device in env.simulator.devices.values()]
+    actions = np.array([env.action_space['due'].sample() % (env._agent_num_pwr_actions[i] * ENV_CONFIG['num_rbs'])
+                        for i in range(len(env.agent_ids))])
+    obs, rewards, game_over, infos = env.step_arrays(actions)
+    assert obs.shape == (len(env.agent_ids), *env.observation_space.shape)
+    assert not game_over
+
+    other = D2DEnv(dict(ENV_CONFIG))
+    other.reset()
+    for device, pos in zip(other.simulator.devices.values(), positions):
+        device.set_position(pos)
+    expected_obs, expected_rewards, _, expected_infos = other.step(dict(zip(env.agent_ids, actions.tolist())))
+    for i, agent_id in enumerate(env.agent_ids):
+        assert obs[i] == approx(expected_obs[agent_id])
+        assert rewards[i] == approx(expected_rewards[agent_id])
+        for key, values in infos.items():
+            assert values[i] == approx(expected_infos[agent_id][key])
+
+    rb_pwr_actions = np.stack([infos['rb'], infos['tx_pwr_dbm']], axis=1)
+    assert env.step_arrays(rb_pwr_actions)[1] == approx(rewards)
+
+
+def test_seed():
+    env = D2DEnv(dict(ENV_CONFIG))
+    assert env.seed(7) == [7]
+    obs = env.reset()
+    actions = env.actions
+    env.seed(7)
+    for agent_id, agent_obs in env.reset().items():
+        assert agent_obs == approx(obs[agent_id])
+    assert [(a.rb, a.tx_pwr_dBm) for a in env.actions.values()] == [(a.rb, a.tx_pwr_dBm) for a in actions.values()]
+
+
+@pytest.mark.parametrize('sinr_engine', ['python', 'numpy'])
+def test_infos_are_calculated_with_the_step(sinr_engine):
+    env = D2DEnv({**ENV_CONFIG, 'sinr_engine': sinr_engine, 'mobility_model': RandomWaypointMobility, 'seed': 0})
+    env.reset()
+    _, _, _, infos = env.step({agent_id: 0 for agent_id in env.agent_ids})
+    info = infos[env.agent_ids[0]]
+    assert type(info) is dict
+    assert list(info) == ['rb', 'tx_pwr_dbm', 'snr_db', 'sinr_db', 'rate_bps', 'capacity_mbps']
+    expected = json.loads(json.dumps(infos))
+    state = env.state
+    assert type(state) is dict and list(state) == list(STATE_KEYS)
+    expected_state = {key: dict(values) for key, values in state.items()}
+
+    # later steps & resets move devices, which mustn't change the metrics already returned
+    env.step({agent_id: 0 for agent_id in env.agent_ids})
+    env.reset()
+    assert json.loads(json.dumps(infos)) == expected
+    assert state == expected_state
+
+
+@pytest.mark.parametrize('sinr_engine', ['python', 'numpy'])
+def test_infos_and_state_can_be_pickled(sinr_engine):
+    env = D2DEnv({'num_rbs': 2, 'num_cues': 2, 'num_due_pairs': 2, 'sinr_engine': sinr_engine})
+    env.reset()
+    _, _, _, infos = env.step({agent_id: 0 for agent_id in env.agent_ids})
+    assert pickle.loads(pickle.dumps(infos)) == infos
+    assert pickle.loads(pickle.dumps(env.state)) == env.state
+    _, _, _, infos = env.step_arrays(np.zeros(len(env.agent_ids), dtype=int))
+    unpickled = pickle.loads(pickle.dumps(infos))
+    assert type(unpickled) is dict
+    assert unpickled.keys() == infos.keys()
+    for key, values in infos.items():
+        assert unpickled[key] == approx(values)
+
+
+class PerLinkCapacityReward(RewardFunction):
+    def __call__(self, actions, state):
+        return {':'.join(tx_rx_id): state['capacity_mbps'][tx_rx_id] for tx_rx_id in actions.keys()}
+
+
+def test_evaluate_batch_matches_step(monkeypatch):
+    monkeypatch.setattr(simulator, 'EVALUATE_BATCH_MAX_ELEMENTS', 200)  # force several sub-batches
+    for reward_fn in [SystemCapacityRewardFunction, CueSinrShannonRewardFunction, PerLinkCapacityReward]:
+        env = D2DEnv({**ENV_CONFIG, 'seed': 3, 'reward_fn': reward_fn})
+        env.reset()
+        rng = np.random.default_rng(0)
+        candidates = rng.integers(env._agent_num_pwr_actions * ENV_CONFIG['num_rbs'], size=(6, len(env.agent_ids)))
+        scores = env.evaluate_batch(candidates)
+        assert scores['sinr_db'].shape == scores['rewards'].shape == (6, len(env.agent_ids))
+        for candidate, sinrs_db, capacities, rewards in zip(candidates, scores['sinr_db'], scores['capacity_mbps'],
+                                                            scores['rewards']):
+            _, step_rewards, _, infos = env.step_arrays(candidate)
+            assert sinrs_db == approx(infos['sinr_db'])
+            assert capacities == approx(infos['capacity_mbps'])
+            assert rewards == approx(step_rewards)
+
+
+def test_evaluate_batch_rb_pwr_pairs():
+    env = D2DEnv(dict(ENV_CONFIG))
+    env.reset()
+    rb_pwr_actions = np.stack([np.arange(len(env.agent_ids)) % ENV_CONFIG['num_rbs'],
+                               np.full(len(env.agent_ids), 10)], axis=1)
+    scores = env.evaluate_batch(rb_pwr_actions[None])
+    _, rewards, _, infos = env.step_arrays(rb_pwr_actions)
+    assert scores['snr_db'][0] == approx(infos['snr_db'])
+    assert scores['rewards'][0] == approx(rewards)
@@ -2,6 +2,7 @@ import random
 
 from pytest import approx
 
+from gym_d2d.conversion import dB_to_linear
 from gym_d2d.device import BaseStation, UserEquipment, DEFAULT_UE_CONFIG, DEFAULT_BASE_STATION_CONFIG
 from gym_d2d.id import Id
 from gym_d2d.position import Position
@@ -97,3 +98,29 @@ class TestDevice:
             DEFAULT_UE_CONFIG['noise_figure_dB'] + DEFAULT_UE_CONFIG['thermal_noise_dBm'])
         assert bs.rx_noise_floor_dBm == approx(
             DEFAULT_BASE_STATION_CONFIG['noise_figure_dB'] + DEFAULT_BASE_STATION_CONFIG['thermal_noise_dBm'])
+
+    def test_link_budget(self):
+        for device in [UserEquipment('ue'), BaseStation('bs')]:
+            budget = device.link_budget
+            assert 23 + budget.tx_offset_dB == approx(device.eirp_dBm(23))
+            assert 10 - 90 + budget.rx_offset_dB == approx(device.rx_signal_level_dBm(10, 90))
+            assert budget.noise_mW == approx(dB_to_linear(device.thermal_noise_dBm))
+            assert budget.rx_sensitivity_dBm == approx(device.rx_sensitivity_dBm)
+
+    def test_update_config_recompiles_link_budget(self):
+        ue = UserEquipment('ue')
+        changed = []
+        ue.add_config_listener(changed.append)
+        tx_offset_dB = ue.link_budget.tx_offset_dB
+        ue.update_config({'tx_antenna_gain_dBi': 5.0})
+        assert changed == [ue]
+        assert ue.tx_antenna_gain_dBi == 5.0
+        assert ue.link_budget.tx_offset_dB == approx(tx_offset_dB + 5.0)
+
+    def test_link_budget_includes_subclass_terms(self):
+        class FeederLossUE(UserEquipment):
+            def eirp_dBm(self, tx_pwr_dBm: float) -> float:
+                return super().eirp_dBm(tx_pwr_dBm) - 1.5
+
+        expected_dB = UserEquipment('ue').link_budget.tx_offset_dB - 1.5
+        assert FeederLossUE('ue').link_budget.tx_offset_dB == approx(expected_dB)
@@ -0,0 +1,67 @@
+import json
+import sys
+
+import numpy as np
+import pytest
+
+from gym_d2d import device_config
+from gym_d2d.device_config import DeviceConfigTable, get_positions, load_device_config, save_device_config
+from gym_d2d.envs import D2DEnv
+
+
+DEVICES = {
+    'mbs': {'position': (0.0, 0.0), 'config': {'max_tx_power_dBm': 46.0, 'num_subcarriers': 12}},
+    'cue00': {'position': (10.5, -3.0)},
+    'cue01': {'config': {'max_tx_power_dBm': 20.5}},
+}
+
+
+def test_from_dict_round_trip():
+    table = DeviceConfigTable.from_dict(DEVICES)
+    assert table.to_dict() == DEVICES
+    assert isinstance(table['mbs']['config']['num_subcarriers'], int)
+    assert table.get('due00', {}) == {}
+    assert 'cue01' in table
+
+
+def test_save_load(tmp_path):
+    path = tmp_path / 'devices.npz'
+    save_device_config(DEVICES, path)
+    table = load_device_config(path)
+    assert isinstance(table, DeviceConfigTable)
+    assert table.to_dict() == DEVICES
+
+
+def test_get_positions():
+    ids = ['cue01', 'cue00', 'due00']
+    for devices in [DEVICES, DeviceConfigTable.from_dict(DEVICES)]:
+        positions = get_positions(devices, ids)
+        assert np.isnan(positions[[0, 2]]).all()
+        assert positions[1].tolist() == [10.5, -3.0]
+
+
+def test_non_numeric_config():
+    with pytest.raises(ValueError):
+        DeviceConfigTable.from_dict({'mbs': {'config': {'name': 'macro'}}})
+
+
+def test_convert(tmp_path, monkeypatch):
+    src, dst = tmp_path / 'devices.json', tmp_path / 'devices.npz'
+    src.write_text(json.dumps(DEVICES))
+    monkeypatch.setattr(sys, 'argv', ['device_config', str(src), str(dst)])
+    device_config.main()
+    assert load_device_config(dst).to_dict() == DEVICES
+
+
+def test_env_round_trip(tmp_path):
+    env_config = {'num_cues': 3, 'num_due_pairs': 3}
+    env = D2DEnv(dict(env_config))
+    env.reset()
+    path = tmp_path / 'devices.npz'
+    env.save_device_config(path)
+
+    other = D2DEnv({**env_config, 'device_config_file': path})
+    other.reset()
+    assert np.array_equal(other.simulator.devices.arrays.positions, env.simulator.devices.arrays.positions)
+    for device_id, device in env.simulator.devices.items():
+        assert other.simulator.devices[device_id].config == device.config
@@ -0,0 +1,51 @@
+import numpy as np
+from pytest import approx
+
+from gym_d2d.devices import CONFIG_COLUMNS, DeviceType
+from gym_d2d.envs.env_config import EnvConfig
+from gym_d2d.position import Position
+from gym_d2d.simulator import create_devices
+
+
+def test_device_arrays_layout():
+    devices = create_devices(EnvConfig(num_cues=2, num_due_pairs=1))
+    arrays = devices.arrays
+    assert arrays.ids == list(devices.keys())
+    assert list(arrays.indices(['due01', 'mbs'])) == [4, 0]
+    assert list(arrays.device_type) == [DeviceType.BASE_STATION.value] + [DeviceType.CUE.value] * 2 \
+        + [DeviceType.DUE.value] * 2
+    for i, device in enumerate(devices.values()):
+        assert arrays.antenna_height_m[i] == device.antenna_height_m
+        assert arrays.thermal_noise_dBm[i] == device.thermal_noise_dBm
+        assert arrays.rx_sensitivity_dBm[i] == approx(device.rx_sensitivity_dBm)
+        assert arrays.tx_offset_dB[i] + 10 == approx(device.eirp_dBm(10))
+        assert arrays.rx_offset_dB[i] + 5 - 80 == approx(device.rx_signal_level_dBm(5, 80))
+
+
+def test_device_arrays_track_positions():
+    devices = create_devices(EnvConfig(num_cues=2, num_due_pairs=1))
+    devices['cue01'].set_position(Position(12.5, -3.0))
+    assert devices.arrays.positions[2] == approx(np.array([12.5, -3.0]))
+
+
+def test_device_arrays_follow_config_changes():
+    devices = create_devices(EnvConfig(num_cues=2, num_due_pairs=1))
+    devices['cue00'].update_config({'antenna_height_m': 3.0, 'thermal_noise_dBm': -100.0})
+    assert devices.arrays.antenna_height_m[1] == 3.0
+    assert devices.arrays.noise_mW[1] == approx(1e-10)
+    # only the changed device's row is updated, matching rebuilding every column
+    columns = {name: getattr(devices.arrays, name).copy() for name in CONFIG_COLUMNS}
+    devices.arrays.refresh()
+    for name, values in columns.items():
+        assert getattr(devices.arrays, name) == approx(values)
+
+
+def test_device_arrays_set_positions():
+    devices = create_devices(EnvConfig(num_cues=2, num_due_pairs=1))
+    moved = []
+    devices.arrays.add_move_listener(moved.append)
+    devices.arrays.set_positions([[1.0, 2.0], [3.0, 4.0]], idxs=[2, 4])
+    assert devices['cue01'].position == Position(1.0, 2.0)
+    assert devices['due01'].position == Position(3.0, 4.0)
+    assert devices.arrays.positions[[2, 4]] == approx(np.array([[1.0, 2.0], [3.0, 4.0]]))
+    assert list(moved[0]) == [2, 4]
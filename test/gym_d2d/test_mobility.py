@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from pytest import approx
+
+from gym_d2d.envs import D2DEnv
+from gym_d2d.mobility import GaussMarkovMobility, MobilityModel, RandomWaypointMobility, StaticMobility
+from gym_d2d.simulator import Simulator
+
+
+CONFIG = {'num_rbs': 2, 'num_cues': 6, 'num_due_pairs': 4, 'cell_radius_m': 100.0, 'num_cells': 2,
+          'sinr_engine': 'numpy', 'seed': 0}
+
+
+@pytest.mark.parametrize('mobility_model', [RandomWaypointMobility, GaussMarkovMobility])
+def test_ues_move_within_their_cells(mobility_model):
+    simulator = Simulator({**CONFIG, 'mobility_model': mobility_model, 'step_duration_s': 5.0})
+    simulator.reset()
+    devices, arrays = simulator.devices, simulator.devices.arrays
+    bs_positions = arrays.positions[arrays.indices(list(devices.base_stations))].copy()
+    due_offsets = {tx_id: devices[rx_id].position.distance(devices[tx_id].position)
+                   for tx_id, rx_id in devices.due_pairs.items()}
+    for _ in range(50):
+        previous = arrays.positions.copy()
+        moved_idxs = simulator.move()
+        assert len(moved_idxs)
+        assert np.flatnonzero((arrays.positions != previous).any(axis=1)) == approx(moved_idxs)
+        assert arrays.positions[arrays.indices(list(devices.base_stations))] == approx(bs_positions)
+        for cue_id in devices.cues:
+            assert devices[cue_id].position.distance(devices[devices.serving_bs[cue_id]].position) <= 100.0 + 1e-9
+        for tx_id, rx_id in devices.due_pairs.items():
+            assert devices[rx_id].position.distance(devices[tx_id].position) == approx(due_offsets[tx_id])
+    assert np.hypot(*(arrays.positions - previous).T).max() <= 5.0 * 5.0
+
+
+def test_static_mobility_never_moves():
+    simulator = Simulator({**CONFIG, 'mobility_model': StaticMobility})
+    simulator.reset()
+    positions = simulator.devices.arrays.positions.copy()
+    assert len(simulator.move()) == 0
+    assert simulator.devices.arrays.positions == approx(positions)
+
+
+class FirstUeMobility(MobilityModel):
+    def move(self, positions):
+        positions = positions.copy()
+        positions[0] += 1.0
+        return positions
+
+
+def test_move_only_discards_moved_path_losses():
+    simulator = Simulator({**CONFIG, 'mobility_model': FirstUeMobility})
+    simulator.reset()
+    cache = simulator.path_loss_cache
+    all_idxs = np.arange(len(simulator.devices.arrays))
+    pairs = ~np.eye(len(all_idxs), dtype=bool)  # every pair of different devices
+    cache.matrix(all_idxs, all_idxs, pairs)
+    moved_idxs = simulator.move()
+    assert simulator.devices.arrays.ids[moved_idxs[0]] == 'cue00'
+    assert len(moved_idxs) == 1
+    discarded = np.zeros(cache.path_losses_dB.shape, dtype=bool)
+    discarded[moved_idxs, :] = discarded[:, moved_idxs] = True
+    assert (np.isnan(cache.path_losses_dB) == (discarded | ~pairs)).all()
+
+    # the incrementally updated path losses match recalculating them all from scratch
+    misses = cache.misses
+    updated_dB = cache.matrix(all_idxs, all_idxs, pairs)
+    assert cache.misses - misses == (discarded & pairs).sum()
+    cache.clear()
+    assert cache.matrix(all_idxs, all_idxs, pairs) == approx(updated_dB)
+
+
+def test_env_steps_move_ues():
+    env = D2DEnv({**CONFIG, 'mobility_model': GaussMarkovMobility})
+    env.reset()
+    actions = np.zeros(len(env.agent_ids), dtype=int)
+    for _ in range(3):
+        positions = env.simulator.devices.arrays.positions.copy()
+        _, _, _, infos = env.step_arrays(actions)
+        assert (env.simulator.devices.arrays.positions != positions).any()
+        env.simulator.path_loss_cache.clear()
+        state = env.simulator.step(env.actions)
+        assert list(state['sinrs_db'].values()) == approx(infos['sinr_db'].tolist())
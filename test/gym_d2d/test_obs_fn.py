@@ -0,0 +1,55 @@
+import numpy as np
+from pytest import approx
+
+from gym_d2d.envs import D2DEnv
+from gym_d2d.envs.obs_fn import LinearObsFunction
+
+
+def expected_obs(actions, state):
+    features = {
+        tx_rx_id: [*action.tx.position.as_tuple(), *action.rx.position.as_tuple(),
+                   state['sinrs_db'][tx_rx_id], state['snrs_db'][tx_rx_id]]
+        for tx_rx_id, action in actions.items()}
+    return {
+        ':'.join(tx_rx_id): np.array(obs + [x for other_id, other in features.items() if other_id != tx_rx_id
+                                            for x in other])
+        for tx_rx_id, obs in features.items()}
+
+
+def make_env():
+    env = D2DEnv({'num_cues': 4, 'num_due_pairs': 3})
+    env.reset()
+    return env
+
+
+class TestLinearObsFunction:
+    def test_get_state(self):
+        env = make_env()
+        obses = LinearObsFunction().get_state(env.actions, env.state, env.simulator.devices)
+        expected = expected_obs(env.actions, env.state)
+        assert obses.keys() == expected.keys()
+        for agent_id, obs in obses.items():
+            assert obs.shape == env.observation_space.shape
+            assert obs == approx(expected[agent_id])
+
+    def test_get_state_shared_buffers(self):
+        env = make_env()
+        obs_fn = LinearObsFunction(shared_buffers=True)
+        obses = obs_fn.get_state(env.actions, env.state, env.simulator.devices)
+        expected = expected_obs(env.actions, env.state)
+        for agent_id, obs in obses.items():
+            assert obs.dtype == np.float32
+            assert obs == approx(expected[agent_id], rel=1e-5)
+        # buffers are reused across steps
+        next_obses = obs_fn.get_state(env.actions, env.state, env.simulator.devices)
+        for agent_id in obses:
+            assert np.shares_memory(obses[agent_id], next_obses[agent_id])
+
+    def test_get_table(self):
+        env = make_env()
+        table, agent_ids = LinearObsFunction().get_table(env.actions, env.state, env.simulator.devices)
+        assert table.shape == (len(env.actions), LinearObsFunction.NUM_FEATURES)
+        assert agent_ids == [':'.join(tx_rx_id) for tx_rx_id in env.actions.keys()]
+        expected = expected_obs(env.actions, env.state)
+        for agent_id, row in zip(agent_ids, table):
+            assert row == approx(expected[agent_id][:LinearObsFunction.NUM_FEATURES])
@@ -1,6 +1,15 @@
+from functools import partial
+from math import log10
+
+import numpy as np
+import pytest
 from pytest import approx
 
-from gym_d2d.path_loss import pl_constant_dB, LogDistancePathLoss, ShadowingPathLoss, AreaType, CostHataPathLoss
+from gym_d2d.envs.env_config import EnvConfig
+from gym_d2d.path_loss import pl_constant_dB, LogDistancePathLoss, ShadowingPathLoss, AreaType, CostHataPathLoss, \
+    CorrelatedShadowingPathLoss, PathLoss
+from gym_d2d.path_loss_cache import PathLossCache
+from gym_d2d.simulator import create_devices
 from gym_d2d.device import BaseStation, UserEquipment
 from gym_d2d.position import Position
 
@@ -50,3 +59,81 @@ class TestCostHataPathLoss:
         ue.set_position(Position(0, 500))
         assert pl(bs, ue) == approx(132.2768393081241)
         assert pl(ue, bs) == approx(127.5231950610599)
+
+
+def test_shadowing_seed():
+    bs = BaseStation('bs')
+    ue = UserEquipment('ue')
+    ue.set_position(Position(250, 0))
+    pl = ShadowingPathLoss(2.1)
+    pl.seed(1)
+    expected = [pl(ue, bs) for _ in range(5)]
+    assert len(set(expected)) == 5
+    pl.seed(1)
+    assert [pl(ue, bs) for _ in range(5)] == expected
+    pl.seed(2)
+    assert [pl(ue, bs) for _ in range(5)] != expected
+
+
+def test_correlated_shadowing():
+    pl = CorrelatedShadowingPathLoss(2.1, decorrelation_m=50.0, cell_radius_m=500.0)
+    pl.seed(0)
+    pl.reset(500.0)
+    bs = BaseStation('bs')
+    ue = UserEquipment('ue')
+    ue.set_position(Position(250, 30))
+    # the same link always gets the same value, in either direction & from the vectorised lookup
+    assert pl(ue, bs) == pl(ue, bs) == approx(pl(bs, ue))
+    shadowing_dB = pl.shadowing_dB(np.array([250.0, 30.0]), np.array([0.0, 0.0]))
+    assert pl(ue, bs) == approx(LogDistancePathLoss(2.1)(ue, bs) + shadowing_dB)
+
+    # the map has unit variance & nearby positions are more correlated than distant ones
+    xs = np.linspace(-400, 400, 81)
+    values = pl.shadowing_map_at(np.stack(np.meshgrid(xs, xs), axis=-1))
+    assert values.std() == approx(1.0, abs=0.25)
+    near = np.corrcoef(values[:, :-1].ravel(), values[:, 1:].ravel())[0, 1]  # 10 m apart
+    far = np.corrcoef(values[:, :-20].ravel(), values[:, 20:].ravel())[0, 1]  # 200 m apart
+    assert near > 0.7
+    assert abs(far) < 0.3
+
+    first_map = pl.shadowing_map.copy()
+    pl.reset(500.0)
+    assert not np.allclose(first_map, pl.shadowing_map)
+
+
+class FooPathLoss(PathLoss):
+    def __call__(self, tx, rx):
+        return 20 * log10(tx.position.distance(rx.position)) - tx.tx_antenna_gain_dBi - rx.rx_antenna_gain_dBi
+
+
+class ScaledLogDistancePathLoss(LogDistancePathLoss):
+    def __call__(self, tx, rx):
+        return 2 * super().__call__(tx, rx)
+
+
+def random_cache(path_loss_model) -> PathLossCache:
+    devices = create_devices(EnvConfig(num_cues=10, num_due_pairs=10))
+    devices.arrays.set_positions(np.random.default_rng(0).uniform(-500, 500, (len(devices.arrays), 2)))
+    path_loss = path_loss_model(2.1)
+    path_loss.seed(0)
+    return PathLossCache(path_loss, devices)
+
+
+@pytest.mark.parametrize('path_loss_model', [
+    LogDistancePathLoss, ShadowingPathLoss, CorrelatedShadowingPathLoss, CostHataPathLoss,
+    partial(CostHataPathLoss, area_type=AreaType.URBAN), FooPathLoss, ScaledLogDistancePathLoss])
+def test_batch_matches_scalar(path_loss_model):
+    cache = random_cache(path_loss_model)
+    path_loss, devices = cache.path_loss, cache.devices
+    tx_idxs, rx_idxs = np.nonzero(~np.eye(len(devices), dtype=bool))
+    batch_dB = cache.evaluate(tx_idxs, rx_idxs)
+    path_loss.seed(0)  # replay the same shadowing
+    assert batch_dB == approx([path_loss(devices[t], devices[r]) for t, r in zip(tx_idxs, rx_idxs)])
+
+
+def test_supports_batch():
+    assert LogDistancePathLoss(2.1).supports_batch
+    assert CostHataPathLoss(2.1).supports_batch
+    # models that only define `__call__()`, or override it, fall back to evaluating each pair
+    assert not FooPathLoss(2.1).supports_batch
+    assert not ScaledLogDistancePathLoss(2.1).supports_batch
@@ -0,0 +1,58 @@
+import numpy as np
+from pytest import approx
+
+from gym_d2d.envs.env_config import EnvConfig
+from gym_d2d.path_loss import LogDistancePathLoss, ShadowingPathLoss
+from gym_d2d.path_loss_cache import PathLossCache
+from gym_d2d.position import Position
+from gym_d2d.simulator import create_devices
+
+
+def make_cache(path_loss_model=LogDistancePathLoss):
+    devices = create_devices(EnvConfig(num_cues=2, num_due_pairs=1))
+    for i, device in enumerate(devices.values()):
+        device.set_position(Position(10.0 * (i + 1), 0.0))
+    return PathLossCache(path_loss_model(2.1), devices), devices
+
+
+def test_call_counts_hits_and_misses():
+    cache, devices = make_cache()
+    cue, bs = devices['cue00'], devices['mbs']
+    assert cache(cue, bs) == approx(cache.path_loss(cue, bs))
+    assert (cache.hits, cache.misses) == (0, 1)
+    cache(cue, bs)
+    cache(cue, bs)
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert cache.hit_rate == approx(2 / 3)
+
+
+def test_set_position_invalidates_device():
+    cache, devices = make_cache()
+    cue, bs, other = devices['cue00'], devices['mbs'], devices['cue01']
+    cache(cue, bs)
+    cache(other, bs)
+    cue.set_position(Position(100.0, 100.0))
+    assert cache(cue, bs) == approx(cache.path_loss(cue, bs))
+    cache(other, bs)
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_matrix_only_calculates_masked_pairs():
+    cache, devices = make_cache()
+    idxs = np.array([cache.index[device_id] for device_id in ['cue00', 'cue01', 'due00', 'due01']])
+    mask = np.array([[True, False, True], [False, True, False], [True, False, True]])
+    tx_idxs, rx_idxs = idxs[:3], idxs[[1, 0, 3]]
+    matrix = cache.matrix(tx_idxs, rx_idxs, mask)
+    assert cache.misses == 5
+    assert np.isinf(matrix[~mask]).all()
+    assert matrix[0, 0] == approx(cache.path_loss(devices['cue00'], devices['cue01']))
+    cache.matrix(tx_idxs, rx_idxs, mask)
+    assert (cache.hits, cache.misses) == (5, 5)
+
+
+def test_uncacheable_path_loss_is_always_evaluated():
+    cache, devices = make_cache(ShadowingPathLoss)
+    cue, bs = devices['cue00'], devices['mbs']
+    cache(cue, bs)
+    cache(cue, bs)
+    assert (cache.hits, cache.misses) == (0, 2)
@@ -1,9 +1,11 @@
 from math import sqrt
 import random
 
+import numpy as np
 from pytest import approx
 
-from gym_d2d.position import Position, get_random_position, get_random_position_nearby
+from gym_d2d.position import Position, get_random_position, get_random_position_nearby, get_random_positions, \
+    get_random_positions_nearby, hex_cell_centres
 
 
 NUM_TEST_REPEATS = 10
@@ -42,3 +44,30 @@ def test_get_random_position_nearby_in_radius():
         pos = get_random_position_nearby(radius, anchor_pos, anchor_radius)
         assert sqrt(pos.x ** 2 + pos.y ** 2) <= radius
         assert pos.distance(anchor_pos) <= anchor_radius
+
+
+def test_get_random_positions_in_radius():
+    rng = np.random.default_rng(0)
+    positions = get_random_positions(500.0, 1000, rng)
+    assert positions.shape == (1000, 2)
+    assert (np.hypot(positions[:, 0], positions[:, 1]) <= 500.0).all()
+
+
+def test_get_random_positions_nearby_in_radius():
+    rng = np.random.default_rng(0)
+    # anchors on the edge of the cell force some positions to be redrawn
+    anchors = np.concatenate([get_random_positions(500.0, 100, rng), [[500.0, 0.0], [0.0, -500.0]]])
+    positions = get_random_positions_nearby(500.0, anchors, 50.0, rng)
+    assert (np.hypot(positions[:, 0], positions[:, 1]) <= 500.0).all()
+    assert (np.hypot(*(positions - anchors).T) <= 50.0).all()
+
+
+def test_hex_cell_centres():
+    centres = hex_cell_centres(19, 100.0)
+    assert centres[0] == approx([0.0, 0.0])
+    dists = np.hypot(*centres.T)
+    # the first ring of 6 cells is one inter-site distance away, the second ring of 12 is further out
+    assert dists[1:7] == approx(np.full(6, sqrt(3) * 100.0))
+    assert (dists[7:] > dists[1] * 1.5).all()
+    assert len(np.unique(np.round(centres, 6), axis=0)) == 19
+    assert hex_cell_centres(3, 100.0) == approx(centres[:3])
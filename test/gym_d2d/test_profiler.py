@@ -0,0 +1,52 @@
+from gym_d2d.envs import D2DEnv
+from gym_d2d.profiler import Profiler
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    with profiler.phase('sinrs'):
+        pass
+    profiler.count('path_loss_evaluations', 3)
+    profiler.tick()
+    assert profiler.stats() == {'steps': 0, 'phases': {}, 'counters': {}}
+
+
+def test_phases_and_counters():
+    profiler = Profiler(enabled=True)
+    for _ in range(3):
+        with profiler.phase('outer'):
+            with profiler.phase('inner'):
+                pass
+    profiler.count('pairs', 2)
+    profiler.count('pairs')
+    stats = profiler.stats()
+    assert stats['phases']['outer']['calls'] == 3
+    assert stats['phases']['inner']['calls'] == 3
+    assert stats['phases']['outer']['total_s'] >= stats['phases']['inner']['total_s']
+    assert stats['counters'] == {'pairs': 3}
+    profiler.reset()
+    assert profiler.stats() == {'steps': 0, 'phases': {}, 'counters': {}}
+
+
+def test_periodic_summary():
+    summaries = []
+    profiler = Profiler(enabled=True, summary_every=2, summary_fn=summaries.append)
+    for _ in range(5):
+        profiler.tick()
+    assert len(summaries) == 2
+    assert summaries[-1].startswith('Profile after 4 steps')
+
+
+def test_env_profiling():
+    env = D2DEnv({'num_rbs': 2, 'num_cues': 3, 'num_due_pairs': 3, 'profile': True})
+    env.reset()
+    env.step({agent_id: 0 for agent_id in env.agent_ids})
+    stats = env.profiler.stats()
+    assert stats['steps'] == 1
+    for phase in ['env.reset', 'simulator.reset', 'env.step', 'decode_actions', 'simulator.step', 'sinrs', 'snrs',
+                  'obs_fn', 'reward_fn', 'infos']:
+        assert phase in stats['phases']
+    assert stats['phases']['simulator.step']['calls'] == 2
+    # every link is on RB 0 in the 2nd step
+    assert stats['counters']['interferer_pairs'] >= 6 * 5
+    assert stats['counters']['path_loss_evaluations'] > 0
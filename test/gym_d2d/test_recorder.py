@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from pytest import approx
+
+from gym_d2d.envs import D2DEnv, TrajectoryDataset, TrajectoryRecorder
+
+
+ENV_CONFIG = {'num_rbs': 2, 'num_cues': 2, 'num_due_pairs': 2, 'seed': 0}
+
+
+@pytest.fixture
+def env():
+    return D2DEnv(ENV_CONFIG)
+
+
+def random_array_actions(env, rng):
+    return rng.integers(env._agent_num_pwr_actions * ENV_CONFIG['num_rbs'])
+
+
+def random_actions(env, rng):
+    return dict(zip(env.agent_ids, random_array_actions(env, rng).tolist()))
+
+
+def test_record_dict_steps(env, tmp_path):
+    recorder = TrajectoryRecorder(env, tmp_path, chunk_size=3)
+    rng = np.random.default_rng(0)
+    obs = recorder.reset()
+    first_obs = np.stack([obs[agent_id] for agent_id in env.agent_ids])
+    steps = []
+    for _ in range(7):
+        steps.append(recorder.step(random_actions(env, rng)))
+    recorder.close()
+
+    dataset = TrajectoryDataset(tmp_path)
+    assert len(dataset) == 7
+    assert dataset.chunk_lengths == [3, 3, 1]
+    assert dataset.agent_ids == env.agent_ids
+    assert dataset['obs'][0] == approx(first_obs)
+    for i, (obs, rewards, _, infos) in enumerate(steps):
+        assert dataset['next_obs'][i] == approx(np.stack([obs[agent_id] for agent_id in env.agent_ids]))
+        assert dataset['rewards'][i] == approx([rewards[agent_id] for agent_id in env.agent_ids])
+        assert dataset['sinr_db'][i] == approx([infos[agent_id]['sinr_db'] for agent_id in env.agent_ids])
+        assert dataset['rb'][i].tolist() == [infos[agent_id]['rb'] for agent_id in env.agent_ids]
+    assert dataset['obs'][1:] == approx(dataset['next_obs'][:-1])
+    assert dataset['episode'][:].tolist() == [0] * 7
+
+
+def test_record_array_steps(env, tmp_path):
+    recorder = TrajectoryRecorder(env, tmp_path, chunk_size=4)
+    rng = np.random.default_rng(0)
+    rewards = []
+    for _ in range(2):
+        recorder.reset()
+        for _ in range(3):
+            _, step_rewards, _, infos = recorder.step_arrays(random_array_actions(env, rng))
+            rewards.append(step_rewards)
+    recorder.close()
+
+    dataset = TrajectoryDataset(tmp_path)
+    assert dataset.num_episodes == 2
+    assert dataset['rewards'].shape == (6, len(env.agent_ids))
+    assert dataset['rewards'][:] == approx(np.stack(rewards))
+    assert dataset['capacity_mbps'][-1] == approx(infos['capacity_mbps'])
+    assert dataset['episode'][[0, 3, 5]].tolist() == [0, 1, 1]
+
+
+def test_append(env, tmp_path):
+    for _ in range(2):
+        recorder = TrajectoryRecorder(env, tmp_path, chunk_size=4)
+        recorder.reset()
+        for _ in range(5):
+            recorder.step(random_actions(env, np.random.default_rng(0)))
+        recorder.close()
+
+    dataset = TrajectoryDataset(tmp_path)
+    assert len(dataset) == 10
+    assert dataset.chunk_lengths == [4, 1, 4, 1]
+    assert dataset['episode'][[4, 5]].tolist() == [0, 1]
+
+    other_env = D2DEnv({**ENV_CONFIG, 'num_cues': 3})
+    with pytest.raises(ValueError):
+        TrajectoryRecorder(other_env, tmp_path)
+
+
+def test_lazy_chunks(env, tmp_path):
+    recorder = TrajectoryRecorder(env, tmp_path, chunk_size=2)
+    recorder.reset()
+    for _ in range(5):
+        recorder.step(random_actions(env, np.random.default_rng(0)))
+    # full chunks are readable before the recorder is closed
+    assert len(TrajectoryDataset(tmp_path)) == 4
+    recorder.close()
+
+    dataset = TrajectoryDataset(tmp_path)
+    chunks = list(dataset.iter_chunks('rewards'))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert isinstance(chunks[0], np.memmap)
+    assert dataset['rewards'][-1] == approx(chunks[-1][0])
+    with pytest.raises(IndexError):
+        dataset['rewards'][5]
@@ -1,5 +1,13 @@
+import json
+
+import numpy as np
+from pytest import approx
+
+from gym_d2d.actions import Action, Actions
 from gym_d2d.envs.env_config import EnvConfig
-from gym_d2d.simulator import create_devices
+from gym_d2d.link_type import LinkType
+from gym_d2d.rng import spawn_seeds
+from gym_d2d.simulator import create_devices, Simulator, BASE_STATION_ID
 
 
 def test_create_devices():
@@ -16,3 +24,100 @@ def test_create_devices():
     due_pair = devices.dues[('due00', 'due01')]
     assert due_pair[0].max_tx_power_dBm == 7.0
     assert due_pair[1].max_tx_power_dBm == 7.0
+
+
+def test_step_reuses_cached_path_losses():
+    simulator = Simulator({'num_rbs': 1, 'num_cues': 2, 'num_due_pairs': 2})
+    simulator.reset()
+    devices = simulator.devices
+    actions = Actions({
+        ('cue00', BASE_STATION_ID): Action(devices['cue00'], devices.bs, LinkType.UPLINK, 0, 23),
+        ('cue01', BASE_STATION_ID): Action(devices['cue01'], devices.bs, LinkType.UPLINK, 0, 23),
+        ('due00', 'due01'): Action(devices['due00'], devices['due01'], LinkType.SIDELINK, 0, 20),
+    })
+    first = simulator.step(actions)
+    misses = simulator.path_loss_cache.misses
+    assert simulator.step(actions) == first
+    assert simulator.path_loss_cache.misses == misses
+    simulator.reset()
+    simulator.step(actions)
+    assert simulator.path_loss_cache.misses == 2 * misses
+
+
+def test_reset_placement(tmp_path):
+    device_config_file = tmp_path / 'devices.json'
+    device_config_file.write_text(json.dumps({'cue03': {'position': [7.0, 8.0]}}))
+    config = {'num_cues': 10, 'num_due_pairs': 10, 'cell_radius_m': 200.0, 'd2d_radius_m': 15.0,
+              'device_config_file': device_config_file}
+    simulator = Simulator(config)
+    simulator.seed(3)
+    simulator.reset()
+    devices = simulator.devices
+    positions = devices.arrays.positions.copy()
+    assert devices.bs.position.as_tuple() == (0.0, 0.0)
+    assert devices['cue03'].position.as_tuple() == (7.0, 8.0)
+    for device in devices.values():
+        assert device.position.distance(devices.bs.position) <= 200.0
+    for tx, rx in devices.dues.values():
+        assert tx.position.distance(rx.position) <= 15.0
+
+    # the same seed gives the same topology
+    simulator.reset()
+    simulator.seed(3)
+    simulator.reset()
+    assert (devices.arrays.positions == positions).all()
+
+
+def test_seed_streams():
+    seeds = spawn_seeds(11, 2)
+    positions = []
+    for seed in [seeds[0], seeds[0], seeds[1]]:
+        simulator = Simulator({'num_cues': 5, 'num_due_pairs': 5})
+        simulator.seed(seed)
+        simulator.reset()
+        positions.append(simulator.devices.arrays.positions.copy())
+    assert (positions[0] == positions[1]).all()
+    assert not np.allclose(positions[0], positions[2])
+
+
+def test_multi_cell_placement():
+    simulator = Simulator({'num_cells': 7, 'num_cues': 14, 'num_due_pairs': 7, 'cell_radius_m': 200.0})
+    devices = simulator.devices
+    assert list(devices.base_stations) == [BASE_STATION_ID, *[f'mbs{cell:02d}' for cell in range(1, 7)]]
+    assert devices.bs is devices.base_stations[BASE_STATION_ID]
+    assert devices.serving_bs['cue08'] == 'mbs01'
+    assert devices.serving_bs['due02'] == devices.serving_bs['due03'] == 'mbs01'
+    simulator.reset()
+    for ue_id, bs_id in devices.serving_bs.items():
+        assert devices[ue_id].position.distance(devices[bs_id].position) <= 200.0 + 1e-9
+    assert np.allclose(devices.arrays.positions[:7], simulator.config.cell_centres)
+
+
+def test_sharded_cells_match_exact_interference():
+    env_config = {'num_cells': 7, 'num_rbs': 2, 'num_cues': 14, 'num_due_pairs': 7, 'seed': 3}
+    exact = Simulator(dict(env_config))
+    exact.reset()
+    devices = exact.devices
+    actions = Actions()
+    for i, (cue_id, cue) in enumerate(devices.cues.items()):
+        bs = devices[devices.serving_bs[cue_id]]
+        actions[(cue_id, bs.id)] = Action(cue, bs, LinkType.UPLINK, i % 2, 23)
+    for i, ((tx_id, rx_id), (tx, rx)) in enumerate(devices.dues.items()):
+        actions[(tx_id, rx_id)] = Action(tx, rx, LinkType.SIDELINK, i % 2, 10)
+    expected = exact.step(actions)
+
+    for num_workers in [1, 3]:
+        sharded = Simulator({**env_config, 'num_shard_workers': num_workers})
+        try:
+            sharded.reset()
+            assert np.allclose(sharded.devices.arrays.positions, devices.arrays.positions)
+            state = sharded.step(Actions({
+                ids: Action(sharded.devices[ids[0]], sharded.devices[ids[1]], a.link_type, a.rb, a.tx_pwr_dBm)
+                for ids, a in actions.items()}))
+        finally:
+            sharded.close()
+        for ids, action in actions.items():
+            if num_workers == 1 or action.link_type == LinkType.UPLINK:
+                # inter-cell interference aggregated at base stations is exact for uplinks
+                assert state['sinrs_db'][ids] == approx(expected['sinrs_db'][ids])
+            assert state['snrs_db'][ids] == approx(expected['snrs_db'][ids])
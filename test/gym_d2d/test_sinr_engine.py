@@ -0,0 +1,196 @@
+from functools import partial
+import random
+
+import numpy as np
+import pytest
+from pytest import approx
+
+from gym_d2d.actions import Action, Actions
+from gym_d2d.link_type import LinkType
+from gym_d2d.path_loss import LogDistancePathLoss, CostHataPathLoss, CorrelatedShadowingPathLoss
+from gym_d2d.simulator import Simulator, BASE_STATION_ID
+from gym_d2d.sinr_engine import NEGLECTED_IX_KEY, STATE_KEYS, co_channel_pairs_within
+
+
+def random_actions(simulator: Simulator, num_rbs: int) -> Actions:
+    devices = simulator.devices
+    actions = Actions()
+    for cue_id, cue in devices.cues.items():
+        actions[(cue_id, BASE_STATION_ID)] = \
+            Action(cue, devices.bs, LinkType.UPLINK, random.randrange(num_rbs), random.randint(0, 23))
+    for (tx_id, rx_id), (tx, rx) in devices.dues.items():
+        actions[(tx_id, rx_id)] = Action(tx, rx, LinkType.SIDELINK, random.randrange(num_rbs), random.randint(0, 20))
+    return actions
+
+
+@pytest.mark.parametrize('path_loss_model', [LogDistancePathLoss, CostHataPathLoss, CorrelatedShadowingPathLoss])
+def test_numpy_engine_matches_python_loop(path_loss_model):
+    env_config = {'num_rbs': 5, 'num_cues': 10, 'num_due_pairs': 10, 'path_loss_model': path_loss_model, 'seed': 0}
+    python_sim = Simulator(dict(env_config))
+    numpy_sim = Simulator({**env_config, 'sinr_engine': 'numpy'})
+    python_sim.reset()
+    numpy_sim.reset()  # same seed, so the same shadowing map
+    for device_id, device in python_sim.devices.items():
+        numpy_sim.devices[device_id].set_position(device.position)
+
+    actions = random_actions(python_sim, 5)
+    expected = python_sim.step(actions)
+    actual = numpy_sim.step(Actions({
+        ids: Action(numpy_sim.devices[ids[0]], numpy_sim.devices[ids[1]], a.link_type, a.rb, a.tx_pwr_dBm)
+        for ids, a in actions.items()}))
+    assert set(actual.keys()) == set(expected.keys())
+    for key in expected:
+        assert actual[key].keys() == expected[key].keys()
+        for ids in expected[key]:
+            assert actual[key][ids] == approx(expected[key][ids])
+
+
+@pytest.mark.parametrize('sinr_engine', ['python', 'numpy'])
+def test_step_only_calculates_requested_metrics(sinr_engine):
+    simulator = Simulator({'num_rbs': 2, 'num_cues': 6, 'num_due_pairs': 6, 'sinr_engine': sinr_engine, 'seed': 0})
+    simulator.reset()
+    random.seed(0)
+    actions = random_actions(simulator, 2)
+    cache = simulator.path_loss_cache
+    state = simulator.step(actions, ('snrs_db',))
+    assert list(state) == ['snrs_db']
+    assert cache.misses == len(actions)  # only each link's own path loss, no interferers
+
+    expected = simulator.step(actions)
+    assert list(expected) == list(STATE_KEYS)
+    assert cache.misses > len(actions)
+    assert state['snrs_db'] == expected['snrs_db']
+    assert simulator.step(actions, ('capacity_mbps', 'sinrs_db')) == {
+        key: expected[key] for key in ('sinrs_db', 'capacity_mbps')}
+    with pytest.raises(ValueError):
+        simulator.step(actions, ('foo',))
+
+
+def test_invalid_engine():
+    with pytest.raises(ValueError):
+        Simulator({'sinr_engine': 'foo'})
+
+
+def test_co_channel_pairs_within():
+    rng = np.random.default_rng(0)
+    tx_pos, rx_pos = rng.uniform(-500, 500, (200, 2)), rng.uniform(-500, 500, (200, 2))
+    rbs = rng.integers(3, size=200)
+    interferers, victims = co_channel_pairs_within(tx_pos, rx_pos, rbs, 120.0)
+    dists = np.hypot(*(tx_pos[:, None] - rx_pos[None, :]).transpose(2, 0, 1))
+    expected = (rbs[:, None] == rbs[None, :]) & (dists <= 120.0) & ~np.eye(200, dtype=bool)
+    assert sorted(zip(interferers.tolist(), victims.tolist())) == list(zip(*np.nonzero(expected)))
+
+
+def culled_and_exact_states(culling_config: dict):
+    """Step the same actions in simulators with & without interference culling."""
+    env_config = {'num_rbs': 3, 'num_cues': 30, 'num_due_pairs': 30, 'cell_radius_m': 2000.0,
+                  'sinr_engine': 'numpy', 'seed': 0}
+    exact_sim = Simulator(dict(env_config))
+    culled_sim = Simulator({**env_config, **culling_config})
+    exact_sim.reset()
+    culled_sim.reset()  # same seed, so the same topology
+    random.seed(1)
+    actions = random_actions(exact_sim, 3)
+    culled_actions = Actions({
+        ids: Action(culled_sim.devices[ids[0]], culled_sim.devices[ids[1]], a.link_type, a.rb, a.tx_pwr_dBm)
+        for ids, a in actions.items()})
+    return culled_sim, culled_sim.step(culled_actions), exact_sim.step(actions), actions
+
+
+def test_culling_bounds_neglected_interference():
+    culled_sim, culled, exact, _ = culled_and_exact_states({'interference_radius_m': 500.0})
+    assert any(bound > 0 for bound in culled[NEGLECTED_IX_KEY].values())
+    arrays = culled_sim.devices.arrays
+    for ids, exact_sinr_db in exact['sinrs_db'].items():
+        rx_pwr_dBm = exact['snrs_db'][ids] + arrays.thermal_noise_dBm[arrays.index[ids[1]]]
+        exact_ix_mW = 10 ** ((rx_pwr_dBm - exact_sinr_db) / 10)
+        culled_ix_mW = 10 ** ((rx_pwr_dBm - culled['sinrs_db'][ids]) / 10)
+        assert culled['sinrs_db'][ids] >= exact_sinr_db - 1e-9
+        assert exact_ix_mW - culled_ix_mW <= culled[NEGLECTED_IX_KEY][ids] * (1 + 1e-9) + 1e-30
+
+
+def test_culling_with_large_radius_is_exact():
+    _, culled, exact, _ = culled_and_exact_states({'interference_radius_m': 1e5})
+    for key in exact:
+        for ids in exact[key]:
+            assert culled[key][ids] == approx(exact[key][ids])
+    assert all(bound == approx(0.0, abs=1e-20) for bound in culled[NEGLECTED_IX_KEY].values())
+
+
+def test_culling_threshold():
+    culling_config = {'path_loss_model': partial(LogDistancePathLoss, ple=3.5), 'interference_threshold_dB': -10.0}
+    culled_sim, _, _, actions = culled_and_exact_states(culling_config)
+    arrays = culled_sim.devices.arrays
+    max_eirp_dBm = max(action.tx_pwr_dBm + action.tx.link_budget.tx_offset_dB for action in actions.values())
+    radius_m = culled_sim.numpy_engine.radius_m(max_eirp_dBm)
+    noise_floor_dBm = np.min(arrays.thermal_noise_dBm + arrays.noise_figure_dB)
+    # any interferer beyond the radius is received at most 10 dB below the noise floor
+    assert max_eirp_dBm - culled_sim.path_loss.min_path_loss_dB(radius_m) == approx(noise_floor_dBm - 10.0, abs=1e-3)
+    assert 0 < radius_m < 4000
+
+
+@pytest.mark.parametrize('env_config', [
+    {'interference_radius_m': 100.0},
+    {'sinr_engine': 'numpy', 'interference_radius_m': 0.0},
+    {'sinr_engine': 'numpy', 'interference_radius_m': 100.0, 'interference_threshold_dB': -10.0},
+])
+def test_invalid_culling_config(env_config):
+    with pytest.raises(ValueError):
+        Simulator(env_config)
+
+
+def with_changed_links(actions: Actions, keys: list, rng: np.random.Generator, num_rbs: int) -> Actions:
+    changed = Actions(actions)
+    for key in keys:
+        action = actions[key]
+        changed[key] = Action(action.tx, action.rx, action.link_type, int(rng.integers(num_rbs)),
+                              int(rng.integers(21)))
+    return changed
+
+
+def test_delta_sinr_updates_match_recalculating():
+    env_config = {'num_rbs': 4, 'num_cues': 10, 'num_due_pairs': 10, 'sinr_engine': 'numpy', 'seed': 0}
+    simulator = Simulator({**env_config, 'sinr_update': 'check'})
+    full_sim = Simulator(dict(env_config))
+    simulator.reset()
+    full_sim.devices.arrays.set_positions(simulator.devices.arrays.positions)
+    random.seed(0)
+    rng = np.random.default_rng(0)
+    actions = random_actions(simulator, 4)
+    engine = simulator.numpy_engine
+    for _ in range(20):
+        keys = list(actions.keys())
+        actions = with_changed_links(actions, [keys[i] for i in rng.choice(len(keys), 3, replace=False)], rng, 4)
+        state = simulator.step(actions)  # raises if the delta update differs from recalculating every link
+        expected = full_sim.step(Actions({ids: Action(full_sim.devices[ids[0]], full_sim.devices[ids[1]],
+                                                      a.link_type, a.rb, a.tx_pwr_dBm)
+                                          for ids, a in actions.items()}))
+        for key in expected:
+            assert list(state[key].values()) == approx(list(expected[key].values()))
+    assert engine.full_updates == 1
+    assert engine.delta_updates == 19
+
+
+def test_delta_sinr_updates_fall_back_to_recalculating():
+    simulator = Simulator({'num_rbs': 4, 'num_cues': 10, 'num_due_pairs': 10, 'sinr_engine': 'numpy',
+                           'sinr_update': 'check', 'seed': 0})
+    simulator.reset()
+    random.seed(0)
+    rng = np.random.default_rng(0)
+    engine = simulator.numpy_engine
+    actions = random_actions(simulator, 4)
+    simulator.step(actions)
+    simulator.step(with_changed_links(actions, list(actions.keys()), rng, 4))  # too many links changed
+    assert engine.full_updates == 2
+    simulator.devices['cue00'].set_position(simulator.devices['cue01'].position)
+    simulator.step(actions)
+    assert engine.full_updates == 3
+    simulator.step(Actions(list(actions.items())[:-1]))  # different links
+    assert (engine.full_updates, engine.delta_updates) == (4, 0)
+
+
+def test_invalid_sinr_update():
+    with pytest.raises(ValueError):
+        Simulator({'sinr_update': 'foo'})
+    with pytest.raises(ValueError):
+        Simulator({'sinr_update': 'delta'})  # requires the numpy engine
@@ -0,0 +1,108 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from pytest import approx
+
+from gym_d2d.actions import Action, Actions
+from gym_d2d.envs import D2DEnv
+from gym_d2d.link_type import LinkType
+from gym_d2d.path_loss import CorrelatedShadowingPathLoss, ShadowingPathLoss
+from gym_d2d.simulator import Simulator, BASE_STATION_ID
+from gym_d2d.topology_bank import TopologyBank
+
+
+ENV_CONFIG = {'num_rbs': 1, 'num_cues': 3, 'num_due_pairs': 2}
+
+
+@pytest.fixture
+def bank_file(tmp_path):
+    path = tmp_path / 'bank.bin'
+    TopologyBank.build(path, ENV_CONFIG, num_scenarios=4, seed=0, dtype=np.float64)
+    return path
+
+
+def test_build(bank_file):
+    bank = TopologyBank(bank_file)
+    assert len(bank) == 4
+    assert bank.positions.shape == (4, 8, 2)
+    assert bank.path_loss_dB.shape == (4, 5, 3)
+    assert bank.tx_ids == ['cue00', 'cue01', 'cue02', 'due00', 'due02']
+    assert bank.rx_ids == [BASE_STATION_ID, 'due01', 'due03']
+    assert not bank.positions.flags.writeable
+    assert not np.allclose(bank.positions[0], bank.positions[1])
+
+
+def test_reset_from_bank(bank_file):
+    simulator = Simulator({**ENV_CONFIG, 'topology_bank_file': bank_file})
+    bank = simulator.config.topology_bank
+    simulator.reset(scenario=2)
+    assert simulator.devices.arrays.positions == approx(np.asarray(bank.positions[2]))
+    devices = simulator.devices
+    assert devices['due01'].position.as_tuple() == tuple(bank.positions[2, 5])
+
+    # path losses come from the bank rather than the path loss model
+    actions = Actions({
+        ('cue00', BASE_STATION_ID): Action(devices['cue00'], devices.bs, LinkType.UPLINK, 0, 23),
+        ('due02', 'due03'): Action(devices['due02'], devices['due03'], LinkType.SIDELINK, 0, 20),
+    })
+    simulator.step(actions)
+    assert simulator.path_loss_cache.misses == 0
+    assert simulator.path_loss_cache(devices['due02'], devices['due03']) \
+        == approx(simulator.path_loss(devices['due02'], devices['due03']))
+
+    simulator.reset()
+    assert any(np.allclose(simulator.devices.arrays.positions, positions) for positions in bank.positions)
+
+
+def test_bank_restores_shadowing_maps(tmp_path):
+    env_config = {**ENV_CONFIG, 'path_loss_model': CorrelatedShadowingPathLoss}
+    bank = TopologyBank.build(tmp_path / 'bank.bin', env_config, num_scenarios=2, seed=0, dtype=np.float64)
+    assert bank.path_loss_states.shape[0] == 2
+    simulator = Simulator({**env_config, 'topology_bank_file': tmp_path / 'bank.bin', 'seed': 1})
+    for scenario in [1, 0]:
+        simulator.reset(scenario=scenario)
+        assert simulator.path_loss.shadowing_map == approx(np.asarray(bank.path_loss_states[scenario]))
+        # path losses evaluated by the model, e.g. after devices move, match the bank's
+        cache = simulator.path_loss_cache
+        cache.clear()
+        assert cache.matrix(simulator._bank_tx_idxs, simulator._bank_rx_idxs) \
+            == approx(np.asarray(bank.path_loss_dB[scenario]))
+
+
+def test_build_uses_config_seed(tmp_path):
+    env_config = {**ENV_CONFIG, 'path_loss_model': CorrelatedShadowingPathLoss, 'seed': 7}
+    TopologyBank.build(tmp_path / 'a.bin', env_config, num_scenarios=2)
+    TopologyBank.build(tmp_path / 'b.bin', env_config, num_scenarios=2)
+    assert (tmp_path / 'a.bin').read_bytes() == (tmp_path / 'b.bin').read_bytes()
+
+
+def test_build_in_fresh_interpreter(tmp_path):
+    # as in the README, importing the bank before anything else
+    script = f"""
+from pathlib import Path
+from gym_d2d.topology_bank import TopologyBank
+TopologyBank.build(Path({str(tmp_path / 'bank.bin')!r}), env_config={{'num_cues': 2, 'num_due_pairs': 2}},
+                   num_scenarios=2)
+"""
+    subprocess.run([sys.executable, '-c', script], check=True)
+    assert len(TopologyBank(tmp_path / 'bank.bin')) == 2
+
+
+def test_uncacheable_bank_has_positions_only(tmp_path):
+    bank = TopologyBank.build(tmp_path / 'bank.bin', {**ENV_CONFIG, 'path_loss_model': ShadowingPathLoss}, 2)
+    assert bank.path_loss_dB is None
+    assert bank.positions.shape == (2, 8, 2)
+
+
+def test_mismatched_bank(bank_file):
+    with pytest.raises(ValueError):
+        Simulator({**ENV_CONFIG, 'num_cues': 4, 'topology_bank_file': bank_file})
+
+
+def test_env_with_bank(bank_file):
+    env = D2DEnv({**ENV_CONFIG, 'topology_bank_file': bank_file, 'seed': 1})
+    env.reset()
+    bank = env.simulator.config.topology_bank
+    assert any(np.allclose(env.simulator.devices.arrays.positions, positions) for positions in bank.positions)
@@ -0,0 +1,81 @@
+from functools import partial
+
+import numpy as np
+from pytest import approx
+
+from gym_d2d.envs import D2DEnv, VectorD2DEnv
+from gym_d2d.link_type import LinkType
+from gym_d2d.simulator import Simulator
+from gym_d2d.traffic_model import (
+    DownlinkTrafficModel, FtpArrivals, FullBufferArrivals, PoissonArrivals, TrafficQueues, UplinkTrafficModel)
+
+
+CONFIG = {'num_rbs': 3, 'num_cues': 4, 'num_due_pairs': 3, 'seed': 0}
+
+
+def test_round_robin_traffic():
+    simulator = Simulator(dict(CONFIG))
+    devices = simulator.devices
+    uplink = UplinkTrafficModel(3).get_traffic(devices)
+    assert list(uplink.keys()) == [(cue_id, 'mbs') for cue_id in devices.cues]
+    assert [action.rb for action in uplink.values()] == [0, 1, 2, 0]
+    assert all(action.link_type == LinkType.UPLINK and action.tx_pwr_dBm == 23 for action in uplink.values())
+    downlink = DownlinkTrafficModel(3).get_traffic(devices)
+    assert list(downlink.keys()) == [('mbs', cue_id) for cue_id in devices.cues]
+
+
+def test_queues_conserve_bits():
+    queues = TrafficQueues(PoissonArrivals(0.1, packet_rate_hz=50.0), 5, [1, 2, 3, 4], 0.1)
+    queues.arrivals.seed(0)
+    queues.reset()
+    ue_idxs = np.array([1, 2, 3, 4])
+    capacity_mbps = np.array([0.0, 0.01, 0.1, 10.0])
+    for _ in range(100):
+        traffic = queues.step(ue_idxs, capacity_mbps)
+        assert (traffic['served_bits'] <= capacity_mbps * 1e6 * 0.1 + 1e-9).all()
+        assert traffic['queue_bits'] == approx(queues.queue_bits[ue_idxs])
+    assert queues.arrived_bits == approx(queues.served_bits + queues.queue_bits)
+    assert queues.arrived_bits[1:] / 10.0 == approx(50.0 * 12000, rel=0.2)
+    assert queues.served_bits[1] == 0.0
+    assert queues.queue_bits[4] == 0.0  # served faster than it arrives
+    delays_s = queues.mean_delay_s()
+    assert delays_s[4] < delays_s[1:4].min()
+    assert queues.throughput_bps()[4] == approx(queues.arrived_bits[4] / 10.0)
+
+
+def test_full_buffer_serves_capacity():
+    queues = TrafficQueues(FullBufferArrivals(1.0), 3, [0, 1, 2], 1.0)
+    queues.reset()
+    traffic = queues.step(np.array([0, 2]), np.array([1.5, 0.5]))
+    assert traffic['served_bits'] == approx([1.5e6, 0.5e6])
+    assert np.isinf(traffic['queue_bits']).all()
+
+
+def test_ftp_files_arrive_once_read():
+    arrivals = FtpArrivals(1.0, file_size_bits=1e6, mean_reading_time_s=3.0)
+    arrivals.seed(0)
+    queues = TrafficQueues(arrivals, 50, np.arange(50), 1.0)
+    queues.reset()
+    for _ in range(30):
+        queue_bits = queues.queue_bits.copy()
+        queues.step(np.arange(50), np.full(50, 0.4))
+        arrived = queues.queue_bits > queue_bits
+        assert (queue_bits[arrived] == 0).all()
+    assert (queues.arrived_bits % 1e6 == 0).all()
+    assert queues.arrived_bits.sum() > 0
+
+
+def test_env_infos_include_queues():
+    env_config = {**CONFIG, 'arrival_model': partial(PoissonArrivals, packet_rate_hz=10.0)}
+    env = D2DEnv(dict(env_config))
+    env.reset()
+    _, _, _, infos = env.step_arrays(np.zeros(len(env.agent_ids), dtype=int))
+    assert (infos['served_bits'] <= infos['capacity_mbps'] * 1e6 + 1e-9).all()
+    _, _, _, infos = env.step({agent_id: 0 for agent_id in env.agent_ids})
+    assert all(info['queue_bits'] >= 0 for info in infos.values())
+    assert env.simulator.traffic.num_steps == 2
+
+    vec_env = VectorD2DEnv(2, dict(env_config))
+    vec_env.reset()
+    _, _, _, vec_infos = vec_env.step(np.zeros((2, vec_env.num_agents), dtype=int))
+    assert vec_infos['queue_bits'].shape == (2, vec_env.num_agents)
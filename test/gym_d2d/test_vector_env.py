@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+from pytest import approx
+
+from gym_d2d.envs import D2DEnv, SubprocVectorD2DEnv, VectorD2DEnv
+from gym_d2d.envs.d2d_env import EPISODE_LENGTH
+from gym_d2d.envs.obs_fn import LinearObsFunction
+from gym_d2d.envs.reward_fn import SystemCapacityRewardFunction, ShannonRewardFunction, CueSinrShannonRewardFunction
+from gym_d2d.path_loss import ShadowingPathLoss
+from gym_d2d.rng import spawn_seeds
+
+
+NUM_ENVS = 3
+ENV_CONFIG = {'num_rbs': 4, 'num_cues': 5, 'num_due_pairs': 5}
+
+
+class StackedObsFunction(LinearObsFunction):
+    def get_batch_state(self, links):
+        raise NotImplementedError
+
+
+@pytest.mark.parametrize('obs_fn', [LinearObsFunction, StackedObsFunction])
+@pytest.mark.parametrize('reward_fn', [
+    SystemCapacityRewardFunction, ShannonRewardFunction, CueSinrShannonRewardFunction])
+def test_matches_separate_envs(obs_fn, reward_fn):
+    env_config = {**ENV_CONFIG, 'obs_fn': obs_fn, 'reward_fn': reward_fn, 'seed': 0}
+    vec_env = VectorD2DEnv(NUM_ENVS, env_config)
+    vec_obs = vec_env.reset()
+
+    envs = [D2DEnv(dict(env_config)) for _ in range(NUM_ENVS)]
+    for env, seed in zip(envs, spawn_seeds(0, NUM_ENVS)):
+        env.seed(seed)
+    for b, env in enumerate(envs):
+        obs = env.reset()
+        assert np.stack([obs[agent_id] for agent_id in vec_env.agent_ids]) == approx(vec_obs[b])
+
+    actions = np.random.randint(0, vec_env.num_pwr_actions * ENV_CONFIG['num_rbs'], (NUM_ENVS, vec_env.num_agents))
+    vec_obs, vec_rewards, _, vec_infos = vec_env.step(actions)
+    for b, env in enumerate(envs):
+        obs, rewards, _, infos = env.step(dict(zip(vec_env.agent_ids, actions[b].tolist())))
+        for i, agent_id in enumerate(vec_env.agent_ids):
+            assert obs[agent_id] == approx(vec_obs[b, i])
+            assert rewards[agent_id] == approx(vec_rewards[b, i])
+            assert infos[agent_id]['sinr_db'] == approx(vec_infos['sinr_db'][b, i])
+            assert infos[agent_id]['capacity_mbps'] == approx(vec_infos['capacity_mbps'][b, i])
+
+
+def test_auto_reset():
+    vec_env = VectorD2DEnv(NUM_ENVS, dict(ENV_CONFIG))
+    vec_env.reset()
+    actions = np.zeros((NUM_ENVS, vec_env.num_agents, 2))
+    for _ in range(EPISODE_LENGTH - 1):
+        obs, rewards, game_over, infos = vec_env.step(actions)
+        assert obs.shape == (NUM_ENVS, vec_env.num_agents, 6 * vec_env.num_agents)
+        assert rewards.shape == (NUM_ENVS, vec_env.num_agents)
+        assert not game_over.any()
+    tx_pos = vec_env.tx_pos.copy()
+    obs, rewards, game_over, infos = vec_env.step(actions)
+    assert game_over.all()
+    assert 'terminal_obs' in infos
+    assert vec_env.num_steps == 0
+    assert not np.allclose(tx_pos, vec_env.tx_pos)
+
+
+def test_close_stops_shard_workers():
+    vec_env = VectorD2DEnv(2, {**ENV_CONFIG, 'num_cells': 2, 'num_shard_workers': 1})
+    processes = [process for env in vec_env.envs for process in env.simulator.shards._processes]
+    assert all(process.is_alive() for process in processes)
+    vec_env.close()
+    assert not any(process.is_alive() for process in processes)
+
+
+def test_subproc_vector_env():
+    vec_env = SubprocVectorD2DEnv(NUM_ENVS, dict(ENV_CONFIG), num_workers=2)
+    try:
+        obs = vec_env.reset()
+        assert obs.shape == (NUM_ENVS, vec_env.num_agents, 6 * vec_env.num_agents)
+        num_pwr_actions = VectorD2DEnv(1, dict(ENV_CONFIG)).num_pwr_actions
+        actions = np.random.randint(0, num_pwr_actions * ENV_CONFIG['num_rbs'], (NUM_ENVS, vec_env.num_agents))
+        for _ in range(EPISODE_LENGTH - 1):
+            obs, rewards, game_over, infos = vec_env.step(actions)
+            assert not game_over.any()
+            assert (infos['rb'] == actions // num_pwr_actions).all()
+            assert (infos['tx_pwr_dbm'] == actions % num_pwr_actions).all()
+            # the default reward function gives every agent the same reward
+            assert (rewards == rewards[:, :1]).all()
+            assert 'terminal_obs' not in infos
+        obs, rewards, game_over, infos = vec_env.step(actions)
+        assert game_over.all()
+        assert infos['terminal_obs'].shape == obs.shape
+        assert vec_env.call('close') == [None] * NUM_ENVS
+    finally:
+        vec_env.close()
+
+
+def test_subproc_vector_env_closes_probe_env(monkeypatch):
+    closed = []
+    close = D2DEnv.close
+    monkeypatch.setattr(D2DEnv, 'close', lambda env: closed.append(env) or close(env))
+    vec_env = SubprocVectorD2DEnv(NUM_ENVS, dict(ENV_CONFIG), num_workers=1)
+    try:
+        # the env probed for the spaces & agent order in this process, any in the workers are closed there
+        assert len(closed) == 1
+    finally:
+        vec_env.close()
+
+
+def test_subproc_vector_env_seeding():
+    # environments get the same streams whatever the number of workers
+    env_config = {**ENV_CONFIG, 'path_loss_model': ShadowingPathLoss, 'seed': 3}
+    results = []
+    for num_workers in [1, 2]:
+        vec_env = SubprocVectorD2DEnv(NUM_ENVS, dict(env_config), num_workers=num_workers)
+        try:
+            obs = vec_env.reset().copy()
+            rewards = vec_env.step(np.ones((NUM_ENVS, vec_env.num_agents), dtype=int))[1].copy()
+            results.append((obs, rewards))
+        finally:
+            vec_env.close()
+    assert results[0][0] == approx(results[1][0])
+    assert results[0][1] == approx(results[1][1])
+    assert not np.allclose(results[0][0][0], results[0][0][1])